@@ -0,0 +1,76 @@
+"""
+Compares load time and memory footprint of the CSV and columnar ingestion paths.
+
+    python benchmarks/bench_io.py --rows 10000000
+
+Synthetic reservation files are generated once under --workdir and reused.
+Each case runs in a fresh process so peak RSS is measured in isolation.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.data_loader import load_data
+from src.synthetic_data import write_reservations
+from src.utils import get_logger, get_peak_rss_mb
+
+logger = get_logger("BenchIO")
+
+# Columns the model consumes: everything except the target
+FEATURE_COLUMNS = [
+    'Booking_ID', 'no_of_adults', 'no_of_children', 'no_of_weekend_nights', 'no_of_week_nights',
+    'type_of_meal_plan', 'required_car_parking_space', 'room_type_reserved', 'lead_time',
+    'arrival_year', 'arrival_month', 'arrival_date', 'market_segment_type', 'repeated_guest',
+    'no_of_previous_cancellations', 'no_of_previous_bookings_not_canceled', 'avg_price_per_room',
+    'no_of_special_requests',
+]
+
+def _run_case(path, columns, compact):
+    start = time.perf_counter()
+    df = load_data(path, columns=columns, compact=compact)
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": len(df),
+        "columns": df.shape[1],
+        "load_seconds": round(elapsed, 3),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 1024 ** 2, 1),
+        "peak_rss_mb": round(get_peak_rss_mb() or 0.0, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV vs Parquet ingestion.")
+    parser.add_argument("--rows", type=int, default=10000000)
+    parser.add_argument("--workdir", default="benchmarks/data")
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    csv_path = os.path.join(args.workdir, f"reservations_{args.rows}.csv")
+    parquet_path = os.path.join(args.workdir, f"reservations_{args.rows}.parquet")
+    for path in (csv_path, parquet_path):
+        if not os.path.exists(path):
+            write_reservations(path, args.rows)
+
+    cases = [
+        ("csv (current default dtypes)", csv_path, None, False),
+        ("csv compact dtypes", csv_path, None, True),
+        ("parquet compact dtypes", parquet_path, None, True),
+        ("parquet compact + projection", parquet_path, FEATURE_COLUMNS, True),
+    ]
+    results = {}
+    for name, path, columns, compact in cases:
+        logger.info(f"Running case: {name}")
+        # A fresh worker per case keeps peak RSS from leaking between cases
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results[name] = pool.submit(_run_case, path, columns, compact).result()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
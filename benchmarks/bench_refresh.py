@@ -0,0 +1,127 @@
+"""
+Time-to-refresh of an incremental update against a full retrain.
+
+    python benchmarks/bench_refresh.py --history-rows 1000000 --delta-rows 5000 --days 5 --model xgboost
+
+Trains a production model on synthetic history, registers it in a scratch
+registry, then for each simulated day writes a delta of newly resolved
+bookings and refreshes the model two ways:
+
+*   incremental: `refresh_model` on the delta alone (continued boosting or
+    SGD partial_fit, validated on the rolling holdout);
+*   full retrain: reload, clean and preprocess the whole history plus every
+    delta so far, and fit the same model with the same hyperparameters.
+
+Both are scored on one fixed set of future bookings. The full retrain here
+skips EDA, SMOTE and the hyperparameter search, so it is a lower bound on
+what a main.py run costs.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.clean_data import clean_data
+from src.data_loader import load_data
+from src.evaluate import threshold_sweep
+from src.inference import load_artifacts
+from src.model_registry import ModelRegistry
+from src.online_update import DEFAULT_ROUNDS, DEFAULT_UPDATE_LEARNING_RATE, refresh_model
+from src.preprocessing import Preprocessor
+from src.synthetic_data import generate_reservations, write_reservations
+from src.utils import get_logger
+
+logger = get_logger("BenchRefresh")
+
+def build_model(family):
+    from sklearn.linear_model import LogisticRegression
+    from xgboost import XGBClassifier
+    from lightgbm import LGBMClassifier
+    return {
+        "xgboost": lambda: XGBClassifier(n_estimators=300, eval_metric='logloss', random_state=42),
+        "lightgbm": lambda: LGBMClassifier(n_estimators=300, random_state=42, verbose=-1),
+        "logistic": lambda: LogisticRegression(max_iter=1000, random_state=42),
+    }[family]()
+
+def full_retrain(paths, family):
+    """
+    Everything a from-scratch refresh redoes: load, clean, preprocess and fit.
+    Returns the model, its preprocessor and the wall time.
+    """
+    start = time.perf_counter()
+    df = clean_data(pd.concat([load_data(path) for path in paths], ignore_index=True))
+    preprocessor = Preprocessor()
+    X = preprocessor.fit_transform(df)
+    y = X.pop(preprocessor.target)
+    model = build_model(family).fit(X, y)
+    return model, preprocessor, time.perf_counter() - start
+
+def _auc(model, preprocessor, future):
+    X = preprocessor.transform(future)
+    y = X.pop(preprocessor.target)
+    return threshold_sweep(y.to_numpy(), model.predict_proba(X)[:, 1])[1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental model refresh against full retraining.")
+    parser.add_argument("--history-rows", type=int, default=200000)
+    parser.add_argument("--delta-rows", type=int, default=5000, help="Resolved bookings per day")
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--model", choices=["xgboost", "lightgbm", "logistic"], default="xgboost")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Boosting rounds added per incremental update")
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_UPDATE_LEARNING_RATE,
+                        help="Learning rate of the added rounds")
+    parser.add_argument("--workdir", default="benchmarks/data/refresh")
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    shutil.rmtree(args.workdir, ignore_errors=True)
+    registry_dir = os.path.join(args.workdir, "registry")
+    history_path = os.path.join(args.workdir, "history.parquet")
+    write_reservations(history_path, args.history_rows, seed=1)
+    future = generate_reservations(20000, seed=999, start_id=10 ** 9)
+
+    model, preprocessor, seconds = full_retrain([history_path], args.model)
+    ModelRegistry(registry_dir).register(model, preprocessor, tags=("production",))
+    logger.info(f"Initial {args.model} model trained on {args.history_rows} rows in {seconds:.1f}s")
+
+    paths, results = [history_path], []
+    for day in range(1, args.days + 1):
+        delta_path = os.path.join(args.workdir, f"delta_{day}.parquet")
+        write_reservations(delta_path, args.delta_rows, seed=100 + day)
+        paths.append(delta_path)
+
+        record = refresh_model(delta_path, registry_dir, rounds=args.rounds, learning_rate=args.learning_rate)
+        registry = ModelRegistry(registry_dir)
+        production = registry.model_path(tag="production")
+        incremental_model, incremental_preprocessor = load_artifacts(production)
+
+        retrained, retrained_preprocessor, retrain_seconds = full_retrain(paths, args.model)
+        results.append({
+            "day": day,
+            "training_rows": args.history_rows + day * args.delta_rows,
+            "refresh_seconds": record["total_seconds"],
+            "update_seconds": record["update_seconds"],
+            "full_retrain_seconds": round(retrain_seconds, 3),
+            "speedup": round(retrain_seconds / record["total_seconds"], 1),
+            "promoted": record["promoted"],
+            "incremental_auc": round(_auc(incremental_model, incremental_preprocessor, future), 4),
+            "full_retrain_auc": round(_auc(retrained, retrained_preprocessor, future), 4),
+        })
+
+    print(f"\n{args.model}: {args.history_rows} history rows, {args.delta_rows} new rows per day")
+    print(f"{'day':>4}{'refresh':>10}{'retrain':>10}{'speedup':>9}{'promoted':>10}{'AUC inc':>9}{'AUC full':>10}")
+    for r in results:
+        print(f"{r['day']:>4}{r['refresh_seconds']:>9.2f}s{r['full_retrain_seconds']:>9.2f}s{r['speedup']:>8.1f}x"
+              f"{str(r['promoted']):>10}{r['incremental_auc']:>9.4f}{r['full_retrain_auc']:>10.4f}")
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"model": args.model, "history_rows": args.history_rows, "delta_rows": args.delta_rows,
+                       "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measures how batch scoring throughput scales with the number of worker processes.
+
+    python benchmarks/bench_scoring.py --rows 2000000 --max-workers 8
+
+Scores a synthetic reservations file with parallel_predictions for 1..N
+workers and reports rows/sec, speedup over one worker and parallel
+efficiency. Uses the best saved model, or its compiled export with --compiled.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.inference import find_best_model, parallel_predictions
+from src.synthetic_data import write_reservations
+from src.utils import get_logger
+
+logger = get_logger("BenchScoring")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-process batch scoring.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeats", type=int, default=2, help="Runs per worker count; the fastest is kept")
+    parser.add_argument("--model", default=None, help="Model path (defaults to the best model in models/)")
+    parser.add_argument("--compiled", action="store_true", help="Score with the compiled export if one was exported")
+    parser.add_argument("--workdir", default="benchmarks/data")
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    model_path = args.model or find_best_model("models")
+    if model_path is None:
+        logger.error("No trained model found in models/ directory. Run main.py first.")
+        sys.exit(1)
+    data_path = os.path.join(args.workdir, f"reservations_{args.rows}.parquet")
+    if not os.path.exists(data_path):
+        write_reservations(data_path, args.rows)
+    output_path = os.path.join(args.workdir, "bench_predictions.parquet")
+
+    results = []
+    for n_workers in range(1, args.max_workers + 1):
+        # The first run also pays for worker start-up and artifact loading
+        runs = [parallel_predictions(data_path, model_path, output_path, n_workers=n_workers, compiled=args.compiled)
+                for _ in range(args.repeats)]
+        best = max(runs, key=lambda run: run["rows_per_second"])
+        best["cold_seconds"] = runs[0]["seconds"]
+        results.append(best)
+
+    single = results[0]["rows_per_second"]
+    print(f"\n{'workers':>7} {'rows/sec':>12} {'speedup':>8} {'efficiency':>10}")
+    for result in results:
+        result["speedup"] = round(result["rows_per_second"] / single, 2)
+        result["efficiency"] = round(result["speedup"] / result["workers"], 2)
+        print(f"{result['workers']:>7} {result['rows_per_second']:>12,.0f} {result['speedup']:>8.2f} {result['efficiency']:>10.0%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "model": model_path, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
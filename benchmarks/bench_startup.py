@@ -0,0 +1,128 @@
+"""
+Measures cold-start cost of each entry point: import time, the heavy
+libraries that came with it, artifact load time and first-prediction latency.
+
+    python benchmarks/bench_startup.py --repeats 5
+
+Every measurement runs in a fresh interpreter, so nothing is already
+imported or cached in memory (the OS file cache stays warm after the first
+run). For each entry point the child process imports the module, loads the
+model and preprocessor the way that entry point would by default (the
+compiled export for src.score, the pickled model otherwise), scores one row
+and then a second one. The median over --repeats runs is reported.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Entry point -> whether it scores with the compiled export by default
+ENTRY_POINTS = {
+    "main": False,
+    "src.inference": False,
+    "src.serving": False,
+    "src.score": True,
+}
+
+def _child(module, model_path, data_path, compiled):
+    """
+    Runs inside the fresh interpreter and prints one JSON record.
+    """
+    import importlib
+    start = time.perf_counter()
+    importlib.import_module(module)
+    import_seconds = time.perf_counter() - start
+
+    # Timed from here on: only what the entry point did not already import
+    from src.score import heavy_modules_loaded
+    heavy_after_import = heavy_modules_loaded()
+    from src.data_loader import load_data
+    from src.inference import load_artifacts, resolve_model_path, score_frame
+
+    start = time.perf_counter()
+    model, preprocessor = load_artifacts(resolve_model_path(model_path, compiled))
+    load_seconds = time.perf_counter() - start
+
+    rows = load_data(data_path, columns=preprocessor.required_columns()).head(2)
+    start = time.perf_counter()
+    score_frame(rows.iloc[:1], model, preprocessor)
+    first_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    score_frame(rows.iloc[1:], model, preprocessor)
+    second_seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "entry_point": module,
+        "compiled": compiled,
+        "import_ms": round(import_seconds * 1000, 1),
+        "load_ms": round(load_seconds * 1000, 1),
+        "first_predict_ms": round(first_seconds * 1000, 1),
+        "warm_predict_ms": round(second_seconds * 1000, 1),
+        "heavy_after_import": heavy_after_import,
+        "heavy_after_predict": heavy_modules_loaded(),
+    }))
+
+def _run_child(module, model_path, data_path, compiled):
+    command = [sys.executable, os.path.abspath(__file__), "--child", module, "--model", model_path, "--data", data_path]
+    if compiled:
+        command.append("--compiled")
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    total_seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{module} failed:\n{completed.stderr}")
+    record = json.loads(completed.stdout.strip().splitlines()[-1])
+    # Interpreter start-up plus everything above, as a worker would experience it
+    record["process_ms"] = round(total_seconds * 1000, 1)
+    return record
+
+def _median(records):
+    summary = dict(records[0])
+    for key in ("import_ms", "load_ms", "first_predict_ms", "warm_predict_ms", "process_ms"):
+        summary[key] = round(statistics.median(record[key] for record in records), 1)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark entry point import time and first-prediction latency.")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh processes per entry point; the median is reported")
+    parser.add_argument("--model", default=None, help="Model path (defaults to the registered model, then the best model in models/)")
+    parser.add_argument("--data", default="tests/sample_data.csv", help="Rows to score")
+    parser.add_argument("--entry-points", nargs="+", default=list(ENTRY_POINTS), choices=list(ENTRY_POINTS))
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--compiled", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.model, args.data, args.compiled)
+        return
+
+    from src.inference import find_best_model, find_registered_model
+    model_path = args.model or find_registered_model() or find_best_model("models")
+    if model_path is None:
+        print("No trained model found in the registry or models/. Run main.py first.", file=sys.stderr)
+        sys.exit(1)
+
+    results = []
+    for module in args.entry_points:
+        results.append(_median([_run_child(module, model_path, args.data, ENTRY_POINTS[module]) for _ in range(args.repeats)]))
+
+    print(f"Model: {model_path} (median of {args.repeats} cold start(s))")
+    print(f"{'entry point':<15}{'process':>10}{'import':>10}{'load':>10}{'1st pred':>10}{'2nd pred':>10}  heavy modules loaded")
+    for r in results:
+        heavy = ", ".join(r["heavy_after_predict"]) or "-"
+        print(f"{r['entry_point']:<15}{r['process_ms']:>8.0f}ms{r['import_ms']:>8.0f}ms{r['load_ms']:>8.0f}ms"
+              f"{r['first_predict_ms']:>8.1f}ms{r['warm_predict_ms']:>8.1f}ms  {heavy}")
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"model": model_path, "repeats": args.repeats, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Load test for the scoring server (src/serving.py).
+
+Start the server first:
+    python -m src.serving --max-batch-size 64 --max-wait-ms 2
+Then run:
+    python benchmarks/load_test.py --requests 20000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import get_logger
+
+logger = get_logger("LoadTest")
+
+async def _request(reader, writer, host, method, path, body=b""):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.decode("latin-1").split("\r\n"):
+        if line.lower().startswith("content-length:"):
+            length = int(line.split(":", 1)[1])
+    payload = await reader.readexactly(length)
+    return status, payload
+
+async def _client(host, port, payloads, counter, n_requests, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            i = counter[0]
+            if i >= n_requests:
+                break
+            counter[0] += 1
+            body = payloads[i % len(payloads)]
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, host, "POST", "/predict", body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                errors[0] += 1
+    finally:
+        writer.close()
+
+async def run_load_test(host, port, payloads, n_requests, concurrency):
+    latencies = []
+    errors = [0]
+    counter = [0]
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _client(host, port, payloads, counter, n_requests, latencies, errors)
+        for _ in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server_metrics = await _request(reader, writer, host, "GET", "/metrics")
+    writer.close()
+
+    latencies = np.array(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        "client_latency_ms_p50": round(float(np.percentile(latencies, 50)), 3),
+        "client_latency_ms_p95": round(float(np.percentile(latencies, 95)), 3),
+        "client_latency_ms_p99": round(float(np.percentile(latencies, 99)), 3),
+        "server_metrics": json.loads(server_metrics),
+    }
+
+def build_payloads(data_path, rows_per_request):
+    df = pd.read_csv(data_path).drop(columns=["booking_status"], errors="ignore")
+    records = json.loads(df.to_json(orient="records"))
+    payloads = []
+    for i in range(0, len(records), rows_per_request):
+        chunk = records[i:i + rows_per_request]
+        payloads.append(json.dumps(chunk[0] if rows_per_request == 1 else chunk).encode("utf-8"))
+    return payloads
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the local scoring server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--data", default="tests/sample_data.csv", help="Reservations used as request payloads")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rows-per-request", type=int, default=1)
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.data, args.rows_per_request)
+    logger.info(f"Sending {args.requests} requests with concurrency {args.concurrency}...")
+    report = asyncio.run(run_load_test(args.host, args.port, payloads, args.requests, args.concurrency))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Times every pipeline stage on synthetic reservations at several sizes.
+
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 1000000
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 --save-baseline
+
+For each size and stage it records wall time, throughput and the peak RSS
+increase of this process (train_models fits in worker processes, so its
+figure covers only the parent's share). Results go to benchmarks/results/<timestamp>.json. The run is
+flagged (exit code 1) when a stage is slower or uses more memory than the
+stored baseline by more than --tolerance, or when a stage scales clearly
+worse than linearly between sizes.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.clean_data import clean_data
+from src.data_loader import load_data
+from src.encoding import encode_data
+from src.feature_engineering import engineer_features
+from src.inference import score_frame
+from src.outlier_treatment import treat_outliers
+from src.preprocessing import Preprocessor
+from src.synthetic_data import write_reservations
+from src.train import train_models
+from src.utils import get_logger, MemoryMonitor
+
+logger = get_logger("Benchmarks")
+
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+# Time growth exponent between sizes above which a stage is flagged as superlinear
+SCALING_LIMIT = 1.3
+
+def _measure(stage, n_rows, func, *args, **kwargs):
+    with MemoryMonitor() as memory:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    record = {
+        "stage": stage,
+        "rows": n_rows,
+        "seconds": round(elapsed, 4),
+        "rows_per_second": round(n_rows / elapsed, 1) if elapsed else None,
+        "peak_rss_delta_mb": round(memory.delta_mb, 1),
+    }
+    logger.info(f"{stage} @ {n_rows} rows: {record['seconds']}s, +{record['peak_rss_delta_mb']} MB")
+    return result, record
+
+def run_size(n_rows, workdir, train_max_rows, tuning_budget):
+    """
+    Runs the pipeline stages in order on `n_rows` synthetic reservations.
+    """
+    path = os.path.join(workdir, f"reservations_{n_rows}.parquet")
+    if not os.path.exists(path):
+        write_reservations(path, n_rows)
+
+    records = []
+    raw, record = _measure("load_data", n_rows, load_data, path)
+    records.append(record)
+
+    # Legacy stage functions, each fed with the previous stage's output
+    df, record = _measure("clean_data", n_rows, clean_data, raw.copy())
+    records.append(record)
+    df, record = _measure("engineer_features", n_rows, engineer_features, df)
+    records.append(record)
+    df, record = _measure("treat_outliers", n_rows, treat_outliers, df)
+    records.append(record)
+    _, record = _measure("encode_data", n_rows, encode_data, df)
+    records.append(record)
+
+    # Fitted preprocessing and scoring, as used by main.py and inference
+    cleaned = clean_data(raw.copy())
+    preprocessor = Preprocessor()
+    _, record = _measure("preprocessor_fit", n_rows, preprocessor.fit, cleaned)
+    records.append(record)
+    processed, record = _measure("preprocessor_transform", n_rows, preprocessor.transform, cleaned)
+    records.append(record)
+
+    if n_rows <= train_max_rows:
+        (models, *_), record = _measure("train_models", n_rows, train_models, processed,
+                                         cache_dir=None, tuning_budget=tuning_budget)
+        records.append(record)
+        model = models["XGBoost"]
+        # score_frame is the preprocessing + scoring core of make_predictions
+        _, record = _measure("make_predictions", n_rows, score_frame, raw, model, preprocessor)
+        records.append(record)
+    return records
+
+def scaling_flags(records):
+    """
+    Flags stages whose time grows faster than linearly between consecutive sizes.
+    """
+    flags = []
+    by_stage = {}
+    for record in records:
+        by_stage.setdefault(record["stage"], []).append(record)
+    for stage, runs in by_stage.items():
+        runs = sorted(runs, key=lambda r: r["rows"])
+        for small, large in zip(runs, runs[1:]):
+            # Runs this short are dominated by fixed overhead
+            if small["seconds"] < 0.05:
+                continue
+            exponent = math.log(large["seconds"] / small["seconds"]) / math.log(large["rows"] / small["rows"])
+            if exponent > SCALING_LIMIT:
+                flags.append(f"{stage}: time grows as n^{exponent:.2f} between {small['rows']} and {large['rows']} rows")
+    return flags
+
+def baseline_flags(records, baseline, tolerance):
+    """
+    Flags stages that are slower or more memory-hungry than the baseline.
+    """
+    flags = []
+    reference = {(r["stage"], r["rows"]): r for r in baseline["records"]}
+    for record in records:
+        base = reference.get((record["stage"], record["rows"]))
+        if base is None:
+            continue
+        if base["seconds"] >= 0.05 and record["seconds"] > base["seconds"] * (1 + tolerance):
+            flags.append(f"{record['stage']} @ {record['rows']}: {record['seconds']}s vs baseline {base['seconds']}s")
+        if base["peak_rss_delta_mb"] >= 50 and record["peak_rss_delta_mb"] > base["peak_rss_delta_mb"] * (1 + tolerance):
+            flags.append(f"{record['stage']} @ {record['rows']}: +{record['peak_rss_delta_mb']} MB vs baseline +{base['peak_rss_delta_mb']} MB")
+    return flags
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--workdir", default="benchmarks/data", help="Where synthetic inputs are generated")
+    parser.add_argument("--results-dir", default="benchmarks/results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown vs the baseline")
+    parser.add_argument("--train-max-rows", type=int, default=100000, help="Skip training/prediction above this size")
+    parser.add_argument("--tuning-budget", type=float, default=30, help="Seconds per tuned model family")
+    args = parser.parse_args()
+
+    # Stage-level INFO logs would drown the benchmark output
+    for name in ("DataLoader", "DataCleaning", "FeatureEngineering", "OutlierTreatment", "Encoding",
+                 "Preprocessing", "ModelTraining", "Tuning", "SyntheticData"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    records = []
+    for n_rows in sorted(args.sizes):
+        records.extend(run_size(n_rows, args.workdir, args.train_max_rows, args.tuning_budget))
+
+    flags = scaling_flags(records)
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            flags += baseline_flags(records, json.load(f), args.tolerance)
+
+    result = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "cpu_count": os.cpu_count(), "records": records, "flags": flags}
+    os.makedirs(args.results_dir, exist_ok=True)
+    result_path = os.path.join(args.results_dir, f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(result_path, "w") as f:
+        json.dump(result, f, indent=2)
+    logger.info(f"Results saved to {result_path}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        logger.info(f"Baseline saved to {args.baseline}")
+
+    for flag in flags:
+        logger.warning(f"Regression: {flag}")
+    sys.exit(1 if flags else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,186 @@
 from src.data_loader import load_data
 from src.eda import perform_eda
 from src.clean_data import clean_data
-from src.feature_engineering import engineer_features
-from src.outlier_treatment import treat_outliers
-from src.encoding import encode_data
+from src.preprocessing import Preprocessor, PREPROCESSOR_FILENAME
 from src.train import train_models
-from src.evaluate import evaluate_models
+from src.evaluate import evaluate_models, evaluate_on_holdout
+from src.cross_validation import SPLIT_MODES, cross_validate
+from src.inference import save_threshold
+from src.pipeline_cache import IncrementalPipeline
+from src.tree_compiler import compile_model, check_agreement, compiled_path_for
+from src.model_registry import ModelRegistry, data_fingerprint
+from src.sharding import MIN_SHARD_ROWS, train_sharded
+from src.monitoring import DataProfile, reference_profile_path_for
+from src.instrumentation import add_tracing_args, configure_tracing, flush_tracing, stage
 from src.utils import get_logger
+import argparse
 import joblib
 import os
+import pandas as pd
 
 logger = get_logger("Main")
 
-def main():
-    data_path = "data/Hotel Reservations.csv"
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the hotel cancellation models.")
+    parser.add_argument("--data", default="data/Hotel Reservations.csv")
+    parser.add_argument("--cache-dir", default="data/cache", help="Where cached load/clean stage outputs are kept")
+    parser.add_argument("--no-cache", action="store_true", help="Run load and clean stages from scratch without caching")
+    parser.add_argument("--sketch-bounds", action="store_true",
+                        help="Cap outliers with bounds from the cache's quantile sketches instead of exact quartiles; "
+                             "for incremental refits where the history is not rescanned (default: exact)")
+    parser.add_argument("--dedup-ignore-id", action="store_true", help="Treat rows that differ only in Booking_ID as duplicates")
+    parser.add_argument("--imbalance", choices=["smote", "weights"], default="smote",
+                        help="Oversample with SMOTE, or reweight classes without materializing synthetic rows")
+    parser.add_argument("--skip-eda", action="store_true", help="Skip exploratory data analysis and plotting")
+    parser.add_argument("--skip-plots", action="store_true", help="Skip confusion matrix and feature importance plots")
+    parser.add_argument("--cv-folds", type=int, default=0,
+                        help="Also cross-validate every trained model configuration on this many folds (0 = off)")
+    parser.add_argument("--cv-repeats", type=int, default=1, help="Repeats of stratified cross-validation")
+    parser.add_argument("--cv-split", choices=SPLIT_MODES, default="stratified",
+                        help="Stratified folds, or forward-looking folds by arrival year and month")
+    parser.add_argument("--shard-column", default=None,
+                        help="Also train one model per value of this feature (e.g. market_segment_type), routed at scoring time")
+    parser.add_argument("--min-shard-rows", type=int, default=MIN_SHARD_ROWS,
+                        help="Shards with fewer training rows use the global model")
+    parser.add_argument("--registry", default="models/registry", help="Model registry the best model is added to")
+    parser.add_argument("--model-name", default="cancellation", help="Name the best model is registered under")
+    parser.add_argument("--no-promote", action="store_true", help="Register the best model without tagging it 'production'")
+    add_tracing_args(parser)
+    args = parser.parse_args(argv)
+    if args.sketch_bounds and args.no_cache:
+        parser.error("--sketch-bounds needs the stage cache (drop --no-cache)")
+    return args
+
+def fit_outlier_bounds(args, pipeline):
+    """
+    Capping bounds passed to the preprocessor: None (exact quartiles of the
+    in-memory frame) unless --sketch-bounds asks for the cached sketches.
+    """
+    if not args.sketch_bounds:
+        return None
+    bounds = pipeline.outlier_bounds()
+    if bounds is None:
+        logger.warning("No cached quantile sketches. Using exact quartiles.")
+    return bounds
+
+def main(argv=None):
+    args = parse_args(argv)
+    data_path = args.data
+    dedup_ignore = ['Booking_ID'] if args.dedup_ignore_id else None
+    
+    configure_tracing(args.trace_dir, args.profile_stage, args.tracemalloc)
     
     try:
-        # Step 1: Load Data
-        df = load_data(data_path)
-        
-        # Step 2: EDA
-        perform_eda(df)
-        
-        # Step 3: Data Cleaning
-        df = clean_data(df)
+        if args.no_cache:
+            # Step 1: Load Data
+            with stage("load") as s:
+                df = s.output(load_data(data_path))
+            
+            # Step 2: EDA
+            if not args.skip_eda:
+                with stage("eda", rows_in=df):
+                    perform_eda(df)
+            
+            # Step 3: Data Cleaning
+            with stage("clean", rows_in=df) as s:
+                df = s.output(clean_data(df, dedup_ignore))
+        else:
+            # Steps 1 & 3: Load and Clean, reusing cached stages (only appended rows are reprocessed)
+            pipeline = IncrementalPipeline(args.cache_dir, dedup_ignore)
+            with stage("load_clean") as s:
+                df = s.output(pipeline.run(data_path))
+            
+            # Step 2: EDA
+            if not args.skip_eda:
+                with stage("eda", rows_in=df):
+                    perform_eda(pipeline.load_output())
         
-        # Step 4: Feature Engineering
-        df = engineer_features(df)
+        # Step 4, 5, 5b: Feature Engineering, Outlier Treatment & Encoding
+        # Fitted once here and reused as-is at inference time
+        # Capping bounds are exact quartiles of the full frame; --sketch-bounds uses the cached sketches instead
+        preprocessor = Preprocessor()
+        outlier_bounds = None if args.no_cache else fit_outlier_bounds(args, pipeline)
+        with stage("preprocess", rows_in=df) as s:
+            clean_df, df = df, s.output(preprocessor.fit_transform(df, outlier_bounds))
         
-        # Step 5: Outlier Treatment
-        df = treat_outliers(df)
-        
-        # Step 5b: Encoding (Task 5)
-        df = encode_data(df)
+        # Step 5c: Reference profile of the training inputs, for drift monitoring at scoring time
+        with stage("profile", rows_in=clean_df):
+            reference_profile = DataProfile.from_frame(clean_df, preprocessor.input_columns_)
+        del clean_df
         
         logger.info("Preprocessing completed. Starting Model Training...")
         
         # Step 6, 7, 8: Train Models (includes SMOTE & Tuning)
-        trained_models, X_test, y_test = train_models(df)
+        with stage("train", rows_in=df) as s:
+            trained_models, X_val, y_val, X_test, y_test = train_models(df, imbalance=args.imbalance)
+            s.rows_out = len(X_test)
+        
+        # Step 9: Evaluate Models (thresholds chosen on the validation rows, reported on the test rows)
+        with stage("evaluate", rows_in=X_test):
+            best_model, best_model_name, best_threshold = evaluate_models(trained_models, X_test, y_test, X_val, y_val,
+                                                                          plots=not args.skip_plots)
+        
+        # Step 9b: Cross-validate the trained configurations, reusing the preprocessed frame and per-fold resampling
+        if args.cv_folds:
+            with stage("cross_validate", rows_in=df):
+                cross_validate(df, trained_models, args.cv_folds, args.cv_repeats, args.cv_split, args.imbalance)
         
-        # Step 9: Evaluate Models
-        best_model, best_model_name = evaluate_models(trained_models, X_test, y_test)
+        # Step 10: Per-shard models with the best model as fallback, kept only if the routed model scores
+        # better on the validation rows (the test rows are only reported on)
+        if args.shard_column:
+            with stage("shard", rows_in=df):
+                sharded = train_sharded(df, X_val, y_val, best_model, args.shard_column, args.min_shard_rows,
+                                        preprocessor=preprocessor, exclude=X_test.index)
+                results = pd.read_csv("models/evaluation_results.csv")
+                best_f1 = results.loc[results["Model"] == best_model_name, "Validation F1 @ Best"].iloc[0]
+                sharded_name = f"{best_model_name} by {args.shard_column}"
+                result, _, _ = evaluate_on_holdout(sharded_name, sharded, X_val, y_val, X_test, y_test)
+                pd.concat([results, pd.DataFrame([result])]).to_csv("models/evaluation_results.csv", index=False)
+            sharded_f1 = result["Validation F1 @ Best"]
+            if sharded.n_shards and sharded_f1 > best_f1:
+                logger.info(f"Sharded model wins (validation F1 {sharded_f1:.4f} vs {best_f1:.4f}).")
+                best_model, best_model_name, best_threshold = sharded, sharded_name, result["Best Threshold"]
+            else:
+                logger.info(f"Keeping the global model (sharded validation F1 {sharded_f1:.4f} vs {best_f1:.4f}).")
         
         # Step 12: Save Best Model
         os.makedirs("models", exist_ok=True)
         model_path = f"models/best_model_{best_model_name.replace(' ', '_')}.joblib"
-        joblib.dump(best_model, model_path)
-        logger.info(f"Best model saved to {model_path}")
+        with stage("save"):
+            joblib.dump(best_model, model_path)
+            logger.info(f"Best model saved to {model_path}")
+            save_threshold(model_path, best_threshold)
+            preprocessor.save(os.path.join("models", PREPROCESSOR_FILENAME))
+            reference_profile.save(reference_profile_path_for(model_path))
+        
+        # Step 13: Export tree models to the compact array format for low-latency scoring
+        compiled = None
+        try:
+            with stage("compile", rows_in=X_test):
+                compiled = compile_model(best_model, feature_names=list(X_test.columns))
+                check_agreement(best_model, compiled, X_test)
+                compiled.save(compiled_path_for(model_path))
+        except TypeError as e:
+            logger.info(f"Skipping compiled export: {e}")
+        except ValueError as e:
+            compiled = None
+            logger.error(f"Compiled export rejected: {e}")
+        
+        # Step 14: Add the best model, its artifacts and metrics to the registry as a new version
+        with stage("register", rows_in=df):
+            results = pd.read_csv("models/evaluation_results.csv")
+            metrics = results[results["Model"] == best_model_name].iloc[0].drop("Model").to_dict()
+            ModelRegistry(args.registry).register(
+                best_model, preprocessor, name=args.model_name, metrics=metrics, threshold=best_threshold,
+                fingerprint=data_fingerprint(df), compiled=compiled, reference_profile=reference_profile,
+                tags=() if args.no_promote else ("production",), extra={"trained_as": best_model_name})
         
     except Exception as e:
         logger.error(f"Pipeline failed: {e}")
         import sys
         sys.exit(1)
+    finally:
+        flush_tracing()
 
 if __name__ == "__main__":
     main()
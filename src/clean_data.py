@@ -1,33 +1,166 @@
+import os
+import numpy as np
 import pandas as pd
 from src.utils import get_logger
 
 logger = get_logger("DataCleaning")
 
-def clean_data(df):
+# FNV-1a parameters for hashing strings, and the digest used for missing values
+_FNV_OFFSET = np.uint64(14695981039346656037)
+_FNV_PRIME = np.uint64(1099511628211)
+_NA_DIGEST = np.uint64(0x9E3779B97F4A7C15)
+
+def _string_digests(values):
+    """
+    FNV-1a over the UTF-8 bytes of each string, computed byte position by
+    byte position straight from the Arrow buffers. Much faster than pandas'
+    per-object hashing of high-cardinality strings such as booking IDs.
+    Missing values get a fixed digest.
+    """
+    import pyarrow as pa
+    arr = pa.array(values, type=pa.large_string(), from_pandas=True)
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    _, offsets_buffer, data_buffer = arr.buffers()
+    offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[arr.offset:arr.offset + len(arr) + 1]
+    data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None and data_buffer.size else np.zeros(1, dtype=np.uint8)
+    starts, lengths = offsets[:-1], np.diff(offsets)
+
+    digests = np.full(len(arr), _FNV_OFFSET)
+    for i in range(int(lengths.max()) if len(lengths) else 0):
+        active = lengths > i
+        position = np.minimum(starts + i, len(data) - 1)
+        mixed = (digests ^ data[position]) * _FNV_PRIME
+        digests = np.where(active, mixed, digests)
+    if arr.null_count:
+        digests[arr.is_null().to_numpy(zero_copy_only=False)] = _NA_DIGEST
+    return digests
+
+def _column_digests(col):
+    """
+    Replaces string and categorical columns by uint64 digests of their values,
+    so a categorical and a plain string column with equal values hash alike.
+    Numeric columns are cast to float64, so a value hashes the same whether
+    its chunk parsed the column as int8, int64 or (with a NaN) float64.
+    Other columns are returned unchanged.
+    """
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        categories = _string_digests(col.cat.categories.astype(str))
+        codes = col.cat.codes.to_numpy()
+        return np.where(codes >= 0, categories[np.maximum(codes, 0)], _NA_DIGEST)
+    if pd.api.types.is_string_dtype(col.dtype):
+        return _string_digests(col)
+    if pd.api.types.is_numeric_dtype(col.dtype):
+        return col.to_numpy(dtype=np.float64, na_value=np.nan)
+    return col.to_numpy()
+
+def row_hashes(df, ignore_columns=None):
+    """
+    64-bit digest per row over all column values (index excluded),
+    optionally leaving out columns such as identifiers.
+    """
+    columns = [col for col in df.columns if col not in (ignore_columns or [])]
+    digests = pd.DataFrame({i: _column_digests(df[col]) for i, col in enumerate(columns)}, copy=False)
+    return pd.util.hash_pandas_object(digests, index=False).to_numpy()
+
+class DigestSet:
+    """
+    Sorted array of row digests seen so far, persisted as .npy, so
+    duplicates can be dropped across chunks and runs at 8 bytes per row.
+    """
+
+    def __init__(self, digests=None):
+        self.digests = np.unique(np.asarray(digests, dtype=np.uint64)) if digests is not None else np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.digests)
+
+    def contains(self, digests):
+        if not len(self.digests):
+            return np.zeros(len(digests), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.digests, digests), len(self.digests) - 1)
+        return self.digests[positions] == digests
+
+    def add(self, digests):
+        self.digests = np.union1d(self.digests, digests)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.save(path, self.digests)
+
+    @staticmethod
+    def load(path):
+        return DigestSet(np.load(path)) if os.path.exists(path) else DigestSet()
+
+def duplicate_mask(df, ignore_columns=None, seen=None):
+    """
+    Flags rows that repeat an earlier row, comparing 64-bit row digests
+    instead of full rows. With a DigestSet `seen`, rows seen in earlier
+    chunks also count, and the digests of kept rows are added to it.
+    """
+    digests = row_hashes(df, ignore_columns)
+    duplicated = pd.Series(digests).duplicated().to_numpy(copy=True)
+    if seen is not None:
+        duplicated |= seen.contains(digests)
+        seen.add(digests[~duplicated])
+    return duplicated
+
+def compute_fill_values(df, columns=None):
+    """
+    Learns imputation values: median for numerical columns, mode for the rest.
+    Medians of all numerical columns are computed in one call.
+    """
+    columns = list(df.columns if columns is None else columns)
+    numeric = [col for col in columns if pd.api.types.is_numeric_dtype(df[col])]
+    fill_values = df[numeric].median().to_dict() if numeric else {}
+    for col in columns:
+        if col not in fill_values:
+            mode = df[col].mode()
+            fill_values[col] = mode.iloc[0] if not mode.empty else None
+    # Columns that are entirely null have nothing to learn from
+    return {col: fill_values[col] for col in columns if pd.notna(fill_values[col])}
+
+def fill_missing(df, fill_values):
+    """
+    Applies previously learned imputation values in a single pass.
+    A categorical column gets its fill value added as a category first,
+    since a batch's own categories need not include the training mode.
+    """
+    fill_values = {col: val for col, val in fill_values.items() if col in df.columns}
+    if not fill_values:
+        return df
+    widened = {col: df[col].cat.add_categories([val]) for col, val in fill_values.items()
+               if isinstance(df[col].dtype, pd.CategoricalDtype) and val not in df[col].cat.categories}
+    if widened:
+        df = df.assign(**widened)
+    return df.fillna(fill_values)
+
+def clean_data(df, ignore_columns=None, seen=None, fill_values=None):
     """
     Cleans the dataset by handling duplicates and missing values.
+    Duplicates are found by row digest; `ignore_columns` (e.g. ['Booking_ID'])
+    also catches rows re-imported under a new identifier. For chunked data,
+    pass a shared DigestSet as `seen` and the `fill_values` learned up front.
     """
     logger.info("Starting data cleaning...")
     
     # 1. Remove Duplicates
     initial_shape = df.shape
-    df = df.drop_duplicates()
+    duplicated = duplicate_mask(df, ignore_columns, seen)
+    if duplicated.any():
+        df = df[~duplicated]
     logger.info(f"Removed duplicates. Rows dropped: {initial_shape[0] - df.shape[0]}")
 
     # 2. Handle Missing Values
-    # Check for missing values
-    missing_values = df.isnull().sum().sum()
+    # Null counts for every column in one pass
+    null_counts = df.isna().sum()
+    missing_values = null_counts.sum()
     if missing_values > 0:
         logger.info(f"Found {missing_values} missing values. Handling them...")
         # Strategy: Impute numerical with median, categorical with mode
-        for col in df.columns:
-            if df[col].isnull().sum() > 0:
-                if df[col].dtype in ['int64', 'float64']:
-                    median_val = df[col].median()
-                    df[col].fillna(median_val, inplace=True)
-                else:
-                    mode_val = df[col].mode()[0]
-                    df[col].fillna(mode_val, inplace=True)
+        if fill_values is None:
+            fill_values = compute_fill_values(df, columns=null_counts.index[null_counts > 0])
+        df = fill_missing(df, fill_values)
         logger.info("Missing values handled.")
     else:
         logger.info("No missing values found.")
@@ -0,0 +1,215 @@
+import os
+import tempfile
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from src.evaluate import evaluate_model
+from src.utils import get_logger, MemoryMonitor
+
+logger = get_logger("CrossValidation")
+
+SPLIT_MODES = ("stratified", "time")
+DEFAULT_FOLDS = 5
+
+# Period a booking belongs to for forward-looking (time-based) splits
+TIME_COLUMNS = ("arrival_year", "arrival_month")
+
+# Metrics averaged over folds in the summary
+SUMMARY_METRICS = ("ROC AUC", "F1 Score", "Precision", "Recall", "F1 Score @ Best")
+
+CV_RESULTS = "cv_results.csv"
+CV_FOLDS = "cv_folds.csv"
+
+def resample(X, y, imbalance="smote", random_state=42):
+    """
+    Oversamples the minority class with SMOTE when `imbalance="smote"`;
+    any other mode returns the rows unchanged. Only ever call this on the
+    training rows of a split, so no synthetic row is derived from (or
+    lands in) a validation fold. DataFrames stay DataFrames.
+    """
+    if imbalance != "smote":
+        return X, y
+    n_minority = int(np.bincount(np.asarray(y, dtype=np.int64)).min())
+    if n_minority < 2:
+        logger.warning(f"Only {n_minority} minority row(s); skipping SMOTE for this split.")
+        return X, y
+    from imblearn.over_sampling import SMOTE
+    # Small splits (e.g. early time-based folds) get a smaller neighbourhood than the default 5
+    X_res, y_res = SMOTE(k_neighbors=min(5, n_minority - 1), random_state=random_state).fit_resample(X, y)
+    if isinstance(X, pd.DataFrame):
+        return X_res.reset_index(drop=True), pd.Series(np.asarray(y_res), name=getattr(y, "name", None))
+    return np.ascontiguousarray(X_res, dtype=np.float32), np.asarray(y_res, dtype=np.int8)
+
+def stratified_folds(y, n_splits=DEFAULT_FOLDS, n_repeats=1, random_state=42):
+    """
+    Stratified (train, test) row indices for `n_repeats` shuffled rounds of
+    `n_splits`-fold cross-validation, as (repeat, train, test) tuples.
+    """
+    from sklearn.model_selection import RepeatedStratifiedKFold
+    splitter = RepeatedStratifiedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=random_state)
+    return [(i // n_splits, train, test) for i, (train, test) in enumerate(splitter.split(np.zeros(len(y)), y))]
+
+def time_folds(df, n_splits=DEFAULT_FOLDS, columns=TIME_COLUMNS):
+    """
+    Forward-looking splits on arrival period: rows are ordered by
+    (arrival_year, arrival_month) and cut into `n_splits + 1` blocks of
+    roughly equal size, never splitting a month. Fold k trains on blocks
+    0..k and tests on block k + 1 (an expanding window), so every test
+    fold lies entirely after its training rows.
+    """
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"Time-based splits need columns {missing}")
+    period = df[columns[0]].to_numpy(dtype=np.int64) * 12 + df[columns[1]].to_numpy(dtype=np.int64)
+    order = np.argsort(period, kind='stable')
+    ordered = period[order]
+    targets = [len(order) * k // (n_splits + 1) for k in range(1, n_splits + 1)]
+    # Snap each cut back to the first row of its month
+    cuts = np.unique(np.searchsorted(ordered, ordered[targets], side='left'))
+    cuts = cuts[cuts > 0]
+    if len(cuts) < n_splits:
+        raise ValueError(f"Only {len(np.unique(period))} arrival months; not enough for {n_splits} time-based folds")
+    bounds = list(cuts) + [len(order)]
+    return [(0, order[:bounds[k]], order[bounds[k]:bounds[k + 1]]) for k in range(n_splits)]
+
+def _prepare_fold(fold, train, X_path, y_path, shared_dir, imbalance, random_state):
+    """
+    Writes the training matrix of one fold, resampled once, for every model
+    evaluated on that fold to memory-map.
+    """
+    X = joblib.load(X_path, mmap_mode='r')
+    y = joblib.load(y_path, mmap_mode='r')
+    start = time.perf_counter()
+    X_train, y_train = resample(np.ascontiguousarray(X[train]), np.asarray(y[train]), imbalance, random_state)
+    seconds = time.perf_counter() - start
+    paths = (os.path.join(shared_dir, f"fold{fold}_X.joblib"), os.path.join(shared_dir, f"fold{fold}_y.joblib"))
+    joblib.dump(X_train, paths[0])
+    joblib.dump(y_train, paths[1])
+    return fold, paths, len(y_train), seconds
+
+def _fit_fold(name, estimator, fold, repeat, fold_paths, test, X_path, y_path, columns, imbalance):
+    """
+    Fits one model on one fold's memory-mapped training matrix and scores
+    the fold's test rows.
+    """
+    X_train = pd.DataFrame(joblib.load(fold_paths[0], mmap_mode='r'), columns=columns, copy=False)
+    y_train = joblib.load(fold_paths[1], mmap_mode='r')
+    if imbalance == "weights":
+        from src.train import apply_class_weights
+        apply_class_weights({name: estimator}, y_train)
+
+    start = time.perf_counter()
+    with MemoryMonitor() as memory:
+        estimator.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    X = joblib.load(X_path, mmap_mode='r')
+    y = joblib.load(y_path, mmap_mode='r')
+    X_test = pd.DataFrame(X[test], columns=columns)
+    result, _, _ = evaluate_model(f"{name} (fold {fold})", estimator, X_test, np.asarray(y[test]))
+    result.pop("Model")
+    return {"model": name, "fold": fold, "repeat": repeat, "train_rows": len(y_train), "test_rows": len(test),
+            "fit_seconds": round(fit_seconds, 3), "peak_rss_delta_mb": round(memory.delta_mb, 1), **result}
+
+def cross_validate(df, models, n_splits=DEFAULT_FOLDS, n_repeats=1, split="stratified", imbalance="smote",
+                   n_jobs=None, report_dir="models", random_state=42, target='booking_status'):
+    """
+    Cross-validates several (unfitted or fitted, they are cloned) models on
+    a preprocessed frame, at the cost of one preprocessing pass:
+
+    *   fold indices are computed once (`split="stratified"`, repeated
+        `n_repeats` times, or forward-looking `split="time"`);
+    *   each fold's training rows are resampled once (one SMOTE
+        nearest-neighbour search per fold, inside the fold so no synthetic
+        row leaks into a test fold) and shared by every model;
+    *   the design matrix and the fold matrices are written once and
+        memory-mapped by the workers instead of being pickled per task.
+
+    `df` is preprocessed once for all folds. That is leak-free for the
+    label-free statistics of the default encodings (fill values, outlier
+    caps, vocabularies), but not for target encoding.
+    Per-fold metrics go to `<report_dir>/cv_folds.csv`, their mean and
+    standard deviation per model to `<report_dir>/cv_results.csv`.
+    Returns the summary frame.
+    """
+    from sklearn.base import clone
+    from src.train import _set_threads
+
+    if split not in SPLIT_MODES:
+        raise ValueError(f"Unknown split '{split}'. Expected one of {SPLIT_MODES}")
+    start = time.perf_counter()
+    columns = [col for col in df.columns if col != target]
+    X = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float32))
+    y = df[target].to_numpy(dtype=np.int8)
+    folds = stratified_folds(y, n_splits, n_repeats, random_state) if split == "stratified" else time_folds(df, n_splits)
+
+    templates = {}
+    for name, model in models.items():
+        # Parallelism comes from running fold fits side by side
+        templates[name] = _set_threads(clone(model), 1)
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    logger.info(f"Cross-validating {len(models)} model(s) on {len(folds)} {split} fold(s) "
+                f"({imbalance} for imbalance, {n_jobs} worker(s))...")
+    with tempfile.TemporaryDirectory() as shared_dir:
+        X_path = os.path.join(shared_dir, "X.joblib")
+        y_path = os.path.join(shared_dir, "y.joblib")
+        joblib.dump(X, X_path)
+        joblib.dump(y, y_path)
+        del X
+
+        prepared = Parallel(n_jobs=min(n_jobs, len(folds)), backend='loky')(
+            delayed(_prepare_fold)(fold, train, X_path, y_path, shared_dir, imbalance, random_state)
+            for fold, (_, train, _) in enumerate(folds)
+        )
+        fold_paths = {fold: paths for fold, paths, _, _ in prepared}
+        resample_seconds = sum(seconds for _, _, _, seconds in prepared)
+
+        records = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(_fit_fold)(name, clone(template), fold, repeat, fold_paths[fold], test, X_path, y_path, columns, imbalance)
+            for fold, (repeat, _, test) in enumerate(folds) for name, template in templates.items()
+        )
+
+    fold_df = pd.DataFrame(records)
+    metrics = [metric for metric in SUMMARY_METRICS if metric in fold_df.columns]
+    grouped = fold_df.groupby("model", sort=False)
+    summary = pd.concat([grouped[metrics].mean(), grouped[metrics].std(ddof=0).add_suffix(" Std"),
+                         grouped["fit_seconds"].sum().rename("Fit Seconds")], axis=1)
+    summary = summary.reset_index().rename(columns={"model": "Model"}).sort_values("ROC AUC", ascending=False)
+    summary = summary[["Model", *[col for metric in metrics for col in (metric, f"{metric} Std")], "Fit Seconds"]]
+
+    os.makedirs(report_dir, exist_ok=True)
+    fold_df.to_csv(os.path.join(report_dir, CV_FOLDS), index=False)
+    summary.to_csv(os.path.join(report_dir, CV_RESULTS), index=False)
+    for row in summary.to_dict("records"):
+        logger.info(f"{row['Model']}: ROC AUC {row['ROC AUC']:.4f} ± {row['ROC AUC Std']:.4f}, "
+                    f"F1 {row['F1 Score']:.4f} ± {row['F1 Score Std']:.4f}")
+    logger.info(f"Cross-validation finished in {time.perf_counter() - start:.1f}s: {len(folds)} resampling(s) "
+                f"({resample_seconds:.1f}s, one per fold, shared by {len(models)} model(s)) and {len(records)} fit(s). "
+                f"Results saved to {report_dir}/{CV_RESULTS}")
+    return summary
+
+if __name__ == "__main__":
+    import argparse
+    from src.clean_data import clean_data
+    from src.data_loader import load_data
+    from src.preprocessing import Preprocessor
+    from src.train import build_models
+    parser = argparse.ArgumentParser(description="Cross-validate model families on one preprocessed copy of the data.")
+    parser.add_argument("--data", default="data/Hotel Reservations.csv")
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--repeats", type=int, default=1, help="Repeats of stratified cross-validation")
+    parser.add_argument("--split", choices=SPLIT_MODES, default="stratified")
+    parser.add_argument("--imbalance", choices=["smote", "weights"], default="smote")
+    parser.add_argument("--models", nargs="+", default=["Logistic Regression", "Random Forest", "XGBoost"],
+                        help="Models from train.build_models")
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--output-dir", default="models")
+    args = parser.parse_args()
+
+    df = Preprocessor().fit_transform(clean_data(load_data(args.data)))
+    models = {name: model for name, model in build_models().items() if name in args.models}
+    summary = cross_validate(df, models, args.folds, args.repeats, args.split, args.imbalance, args.n_jobs, args.output_dir)
+    print(summary.to_string(index=False))
@@ -1,12 +1,96 @@
 import pandas as pd
+import numpy as np
 import os
 from src.utils import get_logger
 
 logger = get_logger("DataLoader")
 
-def load_data(file_path):
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+FEATHER_EXTENSIONS = ('.feather', '.arrow')
+
+# Low-cardinality string columns loaded as pandas categoricals
+CATEGORICAL_COLUMNS = ['type_of_meal_plan', 'room_type_reserved', 'market_segment_type']
+
+# Small counts that fit comfortably in narrow integer types
+COMPACT_INT_COLUMNS = {
+    'no_of_adults': 'int8',
+    'no_of_children': 'int8',
+    'no_of_weekend_nights': 'int8',
+    'no_of_week_nights': 'int8',
+    'required_car_parking_space': 'int8',
+    'lead_time': 'int16',
+    'arrival_year': 'int16',
+    'arrival_month': 'int8',
+    'arrival_date': 'int8',
+    'repeated_guest': 'int8',
+    'no_of_previous_cancellations': 'int8',
+    'no_of_previous_bookings_not_canceled': 'int16',
+    'no_of_special_requests': 'int8',
+}
+
+def _csv_usecols(columns):
+    if columns is None:
+        return None
+    wanted = set(columns)
+    return lambda col: col in wanted
+
+def _file_format(file_path):
+    lower = file_path.lower()
+    if lower.endswith(PARQUET_EXTENSIONS):
+        return 'parquet'
+    if lower.endswith(FEATHER_EXTENSIONS):
+        return 'feather'
+    return 'csv'
+
+def read_columns(file_path):
+    """
+    Returns the column names of a data file without loading its rows
+    (the CSV header, or the Parquet/Arrow schema).
+    """
+    file_format = _file_format(file_path)
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_schema(file_path).names
+    if file_format == 'feather':
+        import pyarrow as pa
+        with pa.memory_map(file_path) as source:
+            return pa.ipc.open_file(source).schema.names
+    return list(pd.read_csv(file_path, nrows=0).columns)
+
+def _available_columns(file_path, file_format, columns):
+    """
+    Restricts a requested projection to the columns present in a columnar file.
+    """
+    if columns is None:
+        return None
+    schema_names = read_columns(file_path)
+    return [col for col in columns if col in schema_names]
+
+def compact_dtypes(df):
+    """
+    Downcasts known columns in place: low-cardinality strings to `category`
+    and small counts to int8/int16. Columns with nulls or out-of-range values
+    keep their original dtype.
+    """
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype) and pd.api.types.is_string_dtype(df[col]):
+            df[col] = df[col].astype('category')
+    for col, dtype in COMPACT_INT_COLUMNS.items():
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col]) and str(df[col].dtype) != dtype:
+            if df[col].between(*_int_range(dtype)).all():
+                df[col] = df[col].astype(dtype)
+    return df
+
+def _int_range(dtype):
+    info = np.iinfo(dtype)
+    return info.min, info.max
+
+def load_data(file_path, columns=None, compact=True):
     """
     Loads the dataset from the specified file path.
+    CSV, Parquet and Feather/Arrow files are supported (chosen by extension).
+    `columns` projects the read onto a subset of columns (missing ones are ignored),
+    and `compact` downcasts categoricals and small counts to save memory.
     """
     try:
         if not os.path.exists(file_path):
@@ -14,13 +98,54 @@ def load_data(file_path):
             raise FileNotFoundError(f"File not found at {file_path}")
 
         logger.info(f"Loading data from {file_path}...")
-        df = pd.read_csv(file_path)
+        file_format = _file_format(file_path)
+        if file_format == 'parquet':
+            df = pd.read_parquet(file_path, columns=_available_columns(file_path, file_format, columns))
+        elif file_format == 'feather':
+            df = pd.read_feather(file_path, columns=_available_columns(file_path, file_format, columns))
+        else:
+            usecols = _csv_usecols(columns)
+            dtype = {col: 'category' for col in CATEGORICAL_COLUMNS} if compact else None
+            df = pd.read_csv(file_path, usecols=usecols, dtype=dtype)
+
+        if compact:
+            df = compact_dtypes(df)
         logger.info(f"Data loaded successfully. Shape: {df.shape}")
         return df
     except Exception as e:
         logger.error(f"Error loading data: {e}")
         raise e
 
+def load_data_in_chunks(file_path, chunksize=100000, columns=None, compact=True):
+    """
+    Yields the dataset in DataFrames of at most `chunksize` rows,
+    so files larger than memory can be processed incrementally.
+    """
+    if not os.path.exists(file_path):
+        logger.error(f"File not found at {file_path}")
+        raise FileNotFoundError(f"File not found at {file_path}")
+
+    logger.info(f"Streaming data from {file_path} in chunks of {chunksize} rows...")
+    file_format = _file_format(file_path)
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=_available_columns(file_path, file_format, columns)):
+            chunk = batch.to_pandas()
+            yield compact_dtypes(chunk) if compact else chunk
+    elif file_format == 'feather':
+        # Feather files are memory-mapped, so slicing does not load the whole file
+        import pyarrow.feather as feather
+        table = feather.read_table(file_path, columns=_available_columns(file_path, file_format, columns), memory_map=True)
+        for offset in range(0, table.num_rows, chunksize):
+            chunk = table.slice(offset, chunksize).to_pandas()
+            yield compact_dtypes(chunk) if compact else chunk
+    else:
+        usecols = _csv_usecols(columns)
+        with pd.read_csv(file_path, chunksize=chunksize, usecols=usecols) as reader:
+            for chunk in reader:
+                yield compact_dtypes(chunk) if compact else chunk
+
 if __name__ == "__main__":
     # Example usage
     data_path = "data/Hotel Reservations.csv"
@@ -1,59 +1,144 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import base64
+import html
 import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
 from src.utils import get_logger
 from src.data_loader import load_data
+from src.clean_data import row_hashes
 
 logger = get_logger("EDA")
 
-def perform_eda(df, output_dir="plots"):
+def summarize(df):
+    """
+    Computes the dataset summary in one vectorized pass per statistic over all columns.
+    """
+    num_cols = df.select_dtypes(include='number').columns
+    values = df[num_cols].to_numpy(dtype='float64', na_value=np.nan)
+    quantiles = np.nanquantile(values, [0.25, 0.5, 0.75], axis=0) if len(df) else np.full((3, len(num_cols)), np.nan)
+    numeric = pd.DataFrame({
+        'count': np.count_nonzero(~np.isnan(values), axis=0),
+        'mean': np.nanmean(values, axis=0),
+        'std': np.nanstd(values, axis=0, ddof=1),
+        'min': np.nanmin(values, axis=0),
+        '25%': quantiles[0],
+        '50%': quantiles[1],
+        '75%': quantiles[2],
+        'max': np.nanmax(values, axis=0),
+    }, index=num_cols)
+
+    overview = pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'missing': df.isna().sum(),
+        'unique': df.nunique(),
+    })
+    # Row digests make the duplicate count a single hash pass
+    duplicates = int(pd.Series(row_hashes(df)).duplicated().sum())
+    return overview, numeric, duplicates
+
+def _render_plot(task):
+    """
+    Renders one plot to PNG. Runs in a worker process.
+    """
+    # Plotting libraries load only in the processes that draw
+    import matplotlib
+    matplotlib.use("Agg")  # Headless rendering
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    kind, col, data, path = task
+    if kind == 'hist':
+        plt.figure(figsize=(10, 6))
+        sns.histplot(data, kde=True)
+        plt.title(f'Distribution of {col}')
+    elif kind == 'count':
+        plt.figure(figsize=(10, 6))
+        order = pd.Series(data).value_counts().index
+        sns.countplot(y=pd.Series(data, name=col), order=order)
+        plt.title(f'Count of {col}')
+    else:
+        plt.figure(figsize=(12, 10))
+        sns.heatmap(data, annot=True, cmap='coolwarm', fmt=".2f")
+        plt.title('Correlation Matrix')
+    plt.savefig(path)
+    plt.close()
+    return path
+
+def _write_report(path, overview, numeric, duplicates, n_rows, sampled, skipped, plot_paths):
+    sections = [
+        "<h1>Exploratory Data Analysis</h1>",
+        f"<p>Rows: {n_rows}. Duplicate rows: {duplicates}."
+        + (f" Plots use a random sample of {sampled} rows." if sampled else "") + "</p>",
+    ]
+    if skipped:
+        sections.append(f"<p>Skipped high-cardinality columns: {html.escape(', '.join(skipped))}</p>")
+    sections.append("<h2>Columns</h2>" + overview.to_html())
+    sections.append("<h2>Statistical Summary</h2>" + numeric.to_html(float_format="%.3f"))
+    sections.append("<h2>Plots</h2>")
+    for plot_path in plot_paths:
+        with open(plot_path, "rb") as f:
+            encoded = base64.b64encode(f.read()).decode("ascii")
+        sections.append(f'<img src="data:image/png;base64,{encoded}" alt="{html.escape(os.path.basename(plot_path))}"/>')
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html><html><head><meta charset='utf-8'><title>EDA Report</title>"
+                "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;font-size:12px}"
+                "td,th{border:1px solid #ccc;padding:2px 6px}img{max-width:800px;display:block;margin:1em 0}</style>"
+                "</head><body>" + "\n".join(sections) + "</body></html>")
+
+def perform_eda(df, output_dir="plots", sample_size=100000, max_cardinality=50, n_jobs=None, report=True):
     """
     Performs Exploratory Data Analysis on the dataset.
+    Summary statistics use all rows. Histograms/KDEs use at most `sample_size`
+    rows, and columns with more than `max_cardinality` distinct values (such
+    as identifiers) get no count plot. Plots render in `n_jobs` worker
+    processes, and everything is collected in `<output_dir>/eda_report.html`.
     """
     logger.info("Starting EDA...")
-    
+
     # 1. Dataset Summary
     logger.info("Generating dataset summary...")
-    print("\n--- Dataset Info ---")
-    print(df.info())
-    print("\n--- Missing Values ---")
-    print(df.isnull().sum())
-    print("\n--- Duplicates ---")
-    print(f"Duplicate rows: {df.duplicated().sum()}")
-    print("\n--- Statistical Summary ---")
-    print(df.describe())
+    overview, numeric, duplicates = summarize(df)
+    logger.info(f"Rows: {len(df)}, columns: {df.shape[1]}, missing values: {int(overview['missing'].sum())}, duplicate rows: {duplicates}")
 
     # Create output directory for plots
     os.makedirs(output_dir, exist_ok=True)
 
     # 2. Visualizations
     logger.info(f"Saving visualizations to {output_dir}...")
-    
+    sampled = sample_size if len(df) > sample_size else None
+    plot_df = df.sample(sample_size, random_state=42) if sampled else df
+
+    tasks = []
     # Numerical columns distribution
-    num_cols = df.select_dtypes(include=['int64', 'float64']).columns
+    num_cols = df.select_dtypes(include='number').columns
     for col in num_cols:
-        plt.figure(figsize=(10, 6))
-        sns.histplot(df[col], kde=True)
-        plt.title(f'Distribution of {col}')
-        plt.savefig(f"{output_dir}/dist_{col}.png")
-        plt.close()
+        tasks.append(('hist', col, plot_df[col].to_numpy(), f"{output_dir}/dist_{col}.png"))
 
     # Correlation Heatmap
-    plt.figure(figsize=(12, 10))
-    sns.heatmap(df[num_cols].corr(), annot=True, cmap='coolwarm', fmt=".2f")
-    plt.title('Correlation Matrix')
-    plt.savefig(f"{output_dir}/correlation_matrix.png")
-    plt.close()
+    tasks.append(('corr', None, df[num_cols].corr(), f"{output_dir}/correlation_matrix.png"))
 
-    # Categorical columns count
-    cat_cols = df.select_dtypes(include=['object']).columns
+    # Categorical columns count (identifier-like columns are skipped)
+    cat_cols = df.select_dtypes(include=['object', 'category']).columns
+    skipped = [col for col in cat_cols if overview.loc[col, 'unique'] > max_cardinality]
     for col in cat_cols:
-        plt.figure(figsize=(10, 6))
-        sns.countplot(y=df[col], order=df[col].value_counts().index)
-        plt.title(f'Count of {col}')
-        plt.savefig(f"{output_dir}/count_{col}.png")
-        plt.close()
+        if col not in skipped:
+            tasks.append(('count', col, plot_df[col].astype(str).to_numpy(), f"{output_dir}/count_{col}.png"))
+    if skipped:
+        logger.info(f"Skipping count plots for high-cardinality columns: {skipped}")
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as pool:
+            plot_paths = list(pool.map(_render_plot, tasks))
+    else:
+        plot_paths = [_render_plot(task) for task in tasks]
+
+    if report:
+        report_path = os.path.join(output_dir, "eda_report.html")
+        _write_report(report_path, overview, numeric, duplicates, len(df), sampled, skipped, plot_paths)
+        logger.info(f"EDA report saved to {report_path}")
 
     logger.info("EDA completed.")
 
@@ -1,9 +1,147 @@
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import LabelEncoder
 from src.utils import get_logger
 
 logger = get_logger("Encoding")
 
+ENCODING_MODES = ('ordinal', 'onehot', 'target')
+
+class CategoricalCodec:
+    """
+    Learns the vocabulary of every categorical column once and applies it
+    with vectorized `pd.Categorical` lookups.
+
+    Modes:
+        'ordinal' - one integer column per feature, codes in sorted category
+                    order (the same codes LabelEncoder produced).
+        'onehot'  - one indicator column per category (optionally sparse).
+        'target'  - smoothed mean of the target per category.
+
+    Unseen and missing values map to `unknown_code` (ordinal), to no
+    indicator (onehot), or to the global target mean (target), so scoring
+    data can never shift the codes of known categories.
+    """
+
+    def __init__(self, mode='ordinal', sparse=False, smoothing=10.0, unknown_code=-1):
+        if mode not in ENCODING_MODES:
+            raise ValueError(f"Unknown encoding mode '{mode}'. Expected one of {ENCODING_MODES}.")
+        self.mode = mode
+        self.sparse = sparse
+        self.smoothing = smoothing
+        self.unknown_code = unknown_code
+
+    def fit(self, df, columns, y=None):
+        """
+        Learns the vocabularies of `columns` (and per-category target means in 'target' mode).
+        """
+        if self.mode == 'target' and y is None:
+            raise ValueError("Target encoding requires `y`.")
+
+        self.vocabularies_ = {}
+        self.target_means_ = {}
+        if y is not None:
+            y = np.asarray(y, dtype='float64')
+            self.prior_ = float(y.mean())
+        for col in columns:
+            values = df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Only the categories actually observed, not every declared level
+                observed = values.cat.remove_unused_categories().cat.categories
+                vocabulary = np.sort(observed.astype(str).to_numpy())
+            else:
+                vocabulary = np.sort(pd.unique(values.dropna().astype(str)))
+            self.vocabularies_[col] = vocabulary
+
+            if self.mode == 'target':
+                codes = self._codes(values, vocabulary)
+                known = codes >= 0
+                sums = np.bincount(codes[known], weights=y[known], minlength=len(vocabulary))
+                counts = np.bincount(codes[known], minlength=len(vocabulary))
+                self.target_means_[col] = (sums + self.smoothing * self.prior_) / (counts + self.smoothing)
+        return self
+
+    @staticmethod
+    def _codes(values, vocabulary):
+        """
+        Position of each value in `vocabulary`, -1 for unseen or missing values.
+        """
+        index = pd.Index(vocabulary)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Translate the category table once, then gather by the existing codes
+            lookup = index.get_indexer(values.cat.categories.astype(str))
+            codes = values.cat.codes.to_numpy()
+            return np.where(codes >= 0, lookup[codes], -1).astype('int64')
+        if not pd.api.types.is_string_dtype(values):
+            values = values.astype(str).where(values.notna())
+        return index.get_indexer(values).astype('int64')
+
+    def transform(self, df):
+        """
+        Encodes the fitted columns of `df`. Other columns are left as they are.
+        """
+        if not hasattr(self, 'vocabularies_'):
+            raise ValueError("CategoricalCodec is not fitted. Call fit() first.")
+
+        encoded = {}
+        for col, vocabulary in self.vocabularies_.items():
+            if col not in df.columns:
+                continue
+            codes = self._codes(df[col], vocabulary)
+            if self.mode == 'ordinal':
+                encoded[col] = np.where(codes >= 0, codes, self.unknown_code)
+            elif self.mode == 'target':
+                encoded[col] = np.where(codes >= 0, self.target_means_[col][np.maximum(codes, 0)], self.prior_)
+            else:
+                indicators = np.zeros((len(codes), len(vocabulary)), dtype='uint8')
+                known = codes >= 0
+                indicators[np.flatnonzero(known), codes[known]] = 1
+                for i, category in enumerate(vocabulary):
+                    column = pd.Series(indicators[:, i], index=df.index)
+                    encoded[f"{col}_{category}"] = column.astype(pd.SparseDtype('uint8', 0)) if self.sparse else column
+
+        if self.mode == 'onehot':
+            # Indicator columns replace the source columns, appended at the end
+            result = df.drop(columns=[col for col in self.vocabularies_ if col in df.columns])
+            return pd.concat([result, pd.DataFrame(encoded, index=df.index)], axis=1)
+
+        return df.assign(**encoded)
+
+    def fit_transform(self, df, columns, y=None):
+        return self.fit(df, columns, y).transform(df)
+
+    def to_dict(self):
+        """
+        Compact, JSON-serializable representation of the fitted codec.
+        """
+        state = {
+            "mode": self.mode,
+            "sparse": self.sparse,
+            "smoothing": self.smoothing,
+            "unknown_code": self.unknown_code,
+            "vocabularies": {col: vocab.tolist() for col, vocab in self.vocabularies_.items()},
+        }
+        if self.mode == 'target':
+            state["prior"] = self.prior_
+            state["target_means"] = {col: means.tolist() for col, means in self.target_means_.items()}
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        codec = cls(state["mode"], state["sparse"], state["smoothing"], state["unknown_code"])
+        codec.vocabularies_ = {col: np.asarray(vocab, dtype=object) for col, vocab in state["vocabularies"].items()}
+        codec.target_means_ = {col: np.asarray(means) for col, means in state.get("target_means", {}).items()}
+        if "prior" in state:
+            codec.prior_ = state["prior"]
+        return codec
+
+def encode_target(df, target='booking_status'):
+    """
+    Maps the target variable to 1 (Canceled) / 0 (Not_Canceled).
+    """
+    if target in df.columns and not pd.api.types.is_numeric_dtype(df[target]):
+        df[target] = df[target].map({'Canceled': 1, 'Not_Canceled': 0})
+    return df
+
 def encode_data(df):
     """
     Encodes categorical variables using Label Encoding.
@@ -26,6 +164,7 @@ def encode_data(df):
         if 'Canceled' in unique_vals and 'Not_Canceled' in unique_vals:
              df['booking_status'] = df['booking_status'].map({'Canceled': 1, 'Not_Canceled': 0})
         else:
+            from sklearn.preprocessing import LabelEncoder
             le = LabelEncoder()
             df['booking_status'] = le.fit_transform(df['booking_status'])
             logger.info(f"LabelEncoded 'booking_status'. Classes: {le.classes_}")
@@ -35,10 +174,8 @@ def encode_data(df):
             cat_cols.remove('booking_status')
 
     # Encode other categorical features
-    le = LabelEncoder()
-    for col in cat_cols:
-        df[col] = le.fit_transform(df[col].astype(str))
-        logger.info(f"Encoded column: {col}")
+    df = CategoricalCodec().fit_transform(df, cat_cols)
+    logger.info(f"Encoded columns: {cat_cols}")
 
     logger.info("Encoding completed.")
     return df
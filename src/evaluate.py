@@ -1,78 +1,198 @@
+import os
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, confusion_matrix
+from joblib import Parallel, delayed
 from src.utils import get_logger
 
 logger = get_logger("ModelEvaluation")
 
-def evaluate_models(models, X_test, y_test):
+# Threshold the reported fixed-cutoff metrics use (matches model.predict)
+DEFAULT_THRESHOLD = 0.5
+
+# Rows per model kept in the saved threshold sweep
+MAX_SWEEP_POINTS = 1000
+
+# np.trapz was renamed in numpy 2.0 (and later removed)
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
+def _divide(num, den):
+    num, den = np.asarray(num, dtype=np.float64), np.asarray(den, dtype=np.float64)
+    return np.divide(num, den, out=np.zeros(np.broadcast(num, den).shape), where=den > 0)
+
+def threshold_sweep(y_true, y_prob):
     """
-    Evaluates trained models and returns the best one.
+    Sorts the probabilities once and derives everything from cumulative
+    true/false positive counts: precision, recall and F1 for every distinct
+    cutoff (predict positive when prob >= cutoff) plus the ROC AUC.
+    Returns (sweep frame, ROC AUC, helpers for fixed-threshold metrics).
     """
-    logger.info("Starting model evaluation...")
-    
-    results = []
-    
-    for name, model in models.items():
-        logger.info(f"Evaluating {name}...")
-        y_pred = model.predict(X_test)
-        y_prob = model.predict_proba(X_test)[:, 1] if hasattr(model, "predict_proba") else [0]*len(y_test)
-        
-        acc = accuracy_score(y_test, y_pred)
-        prec = precision_score(y_test, y_pred)
-        rec = recall_score(y_test, y_pred)
-        f1 = f1_score(y_test, y_pred)
-        auc = roc_auc_score(y_test, y_prob)
-        
-        results.append({
-            "Model": name,
-            "Accuracy": acc,
-            "Precision": prec,
-            "Recall": rec,
-            "F1 Score": f1,
-            "ROC AUC": auc
-        })
-        
-        # Confusion Matrix
-        cm = confusion_matrix(y_test, y_pred)
+    y_true = np.asarray(y_true).astype(np.int64)
+    y_prob = np.asarray(y_prob, dtype=np.float64)
+    order = np.argsort(-y_prob, kind='mergesort')
+    prob, hits = y_prob[order], y_true[order]
+
+    tp_all = np.cumsum(hits)
+    # Last position of each run of tied probabilities
+    ends = np.r_[np.flatnonzero(np.diff(prob)), len(prob) - 1]
+    tp = tp_all[ends]
+    fp = ends + 1 - tp
+    positives, negatives = tp_all[-1], len(prob) - tp_all[-1]
+
+    sweep = pd.DataFrame({
+        'cutoff': prob[ends],
+        'precision': _divide(tp, tp + fp),
+        'recall': _divide(tp, positives),
+        'f1': _divide(2 * tp, tp + fp + positives),
+        'tp': tp,
+        'fp': fp,
+    })
+    tpr = np.r_[0.0, _divide(tp, positives)]
+    fpr = np.r_[0.0, _divide(fp, negatives)]
+    auc = float(_trapezoid(tpr, fpr)) if positives and negatives else float('nan')
+    return sweep, auc, (prob, tp_all, positives, negatives)
+
+def _counts_at(state, threshold):
+    """
+    Confusion counts for labels `prob > threshold`, by binary search on the sorted probabilities.
+    """
+    prob, tp_all, positives, negatives = state
+    n_predicted = int(np.searchsorted(-prob, -threshold, side='left'))
+    tp = int(tp_all[n_predicted - 1]) if n_predicted else 0
+    fp = n_predicted - tp
+    return {"tn": int(negatives - fp), "fp": fp, "fn": int(positives - tp), "tp": tp}
+
+def _metrics(counts):
+    tp, fp, fn, tn = counts["tp"], counts["fp"], counts["fn"], counts["tn"]
+    return {
+        "Accuracy": float(_divide(tp + tn, tp + fp + fn + tn)),
+        "Precision": float(_divide(tp, tp + fp)),
+        "Recall": float(_divide(tp, tp + fn)),
+        "F1 Score": float(_divide(2 * tp, 2 * tp + fp + fn)),
+    }
+
+def best_threshold(sweep):
+    """
+    Threshold with the highest F1. It lies halfway between the best cutoff and
+    the next lower probability, so `prob > threshold` reproduces that cutoff.
+    """
+    best = int(np.argmax(sweep['f1'].to_numpy()))
+    cutoffs = sweep['cutoff'].to_numpy()
+    lower = cutoffs[best + 1] if best + 1 < len(cutoffs) else 0.0
+    return float((cutoffs[best] + lower) / 2)
+
+def evaluate_model(name, model, X_test, y_test, threshold=None):
+    """
+    Scores one model once and returns its metrics at 0.5 and at its best
+    threshold, its confusion counts and its threshold sweep. The best
+    threshold maximizes F1 on these rows unless `threshold` fixes it
+    (e.g. the threshold the model is served with).
+    """
+    logger.info(f"Evaluating {name}...")
+    y_prob = model.predict_proba(X_test)[:, 1]
+    sweep, auc, state = threshold_sweep(y_test, y_prob)
+    counts = _counts_at(state, DEFAULT_THRESHOLD)
+    if threshold is None:
+        threshold = best_threshold(sweep)
+    best_counts = _counts_at(state, threshold)
+
+    result = {"Model": name, **_metrics(counts), "ROC AUC": auc, "Best Threshold": threshold}
+    result.update({f"{metric} @ Best": value for metric, value in _metrics(best_counts).items()
+                   if metric != "Accuracy"})
+    return result, counts, sweep
+
+def evaluate_on_holdout(name, model, X_val, y_val, X_test, y_test):
+    """
+    Chooses the model's best threshold on the validation rows, then scores the
+    test rows at it, so the "@ Best" test metrics are not fitted to the test set.
+    Returns the same (result, counts, sweep) as evaluate_model, with the
+    validation F1 at that threshold added to the result.
+    """
+    validation, _, _ = evaluate_model(name, model, X_val, y_val)
+    result, counts, sweep = evaluate_model(name, model, X_test, y_test, threshold=validation["Best Threshold"])
+    result["Validation F1 @ Best"] = validation["F1 Score @ Best"]
+    return result, counts, sweep
+
+def _sample_sweep(name, sweep):
+    if len(sweep) > MAX_SWEEP_POINTS:
+        sweep = sweep.iloc[np.linspace(0, len(sweep) - 1, MAX_SWEEP_POINTS).astype(int)]
+    return sweep.assign(model=name)[['model', 'cutoff', 'precision', 'recall', 'f1']]
+
+def _plot_results(models, confusion, X_test, best_model_name, plot_dir):
+    """
+    Renders confusion matrices from the counts already computed, plus the
+    best model's feature importances.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    os.makedirs(plot_dir, exist_ok=True)
+    for name, counts in confusion.items():
+        cm = np.array([[counts["tn"], counts["fp"]], [counts["fn"], counts["tp"]]])
         plt.figure(figsize=(6, 4))
         sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
         plt.title(f'Confusion Matrix - {name}')
         plt.ylabel('Actual')
         plt.xlabel('Predicted')
-        plt.savefig(f"plots/confusion_matrix_{name.replace(' ', '_')}.png")
+        plt.savefig(f"{plot_dir}/confusion_matrix_{name.replace(' ', '_')}.png")
         plt.close()
 
-    # Create Results DataFrame
-    results_df = pd.DataFrame(results)
-    print("\n--- Model Performance ---")
-    print(results_df)
-    import os
-    os.makedirs("models", exist_ok=True)
-    results_df.to_csv("models/evaluation_results.csv", index=False)
-    
-    # Identify Best Model (based on F1 Score)
-    best_model_name = results_df.sort_values(by="F1 Score", ascending=False).iloc[0]["Model"]
-    best_model = models[best_model_name]
-    logger.info(f"Best Model: {best_model_name}")
-    
     # Feature Importance (for Tree-based models)
+    best_model = models[best_model_name]
     if hasattr(best_model, "feature_importances_"):
         logger.info("Generating feature importance plot...")
-        importances = best_model.feature_importances_
-        feature_names = X_test.columns
-        feat_df = pd.DataFrame({'Feature': feature_names, 'Importance': importances})
+        feat_df = pd.DataFrame({'Feature': X_test.columns, 'Importance': best_model.feature_importances_})
         feat_df = feat_df.sort_values(by='Importance', ascending=False).head(10)
-        
+
         plt.figure(figsize=(10, 6))
         sns.barplot(x='Importance', y='Feature', data=feat_df)
         plt.title(f'Top 10 Features - {best_model_name}')
         plt.tight_layout()
-        plt.savefig("plots/feature_importance.png")
+        plt.savefig(f"{plot_dir}/feature_importance.png")
         plt.close()
-        
-    return best_model, best_model_name
+
+def evaluate_models(models, X_test, y_test, X_val=None, y_val=None, n_jobs=None, plots=True, plot_dir="plots",
+                    output_dir="models"):
+    """
+    Evaluates trained models and returns the best one.
+    Each model is scored once per split (models run side by side on threads),
+    and all metrics come from one sorted pass over its probabilities. Given
+    validation rows, each model's threshold is chosen on them and the best
+    model is the one with the highest validation F1 at its threshold; the
+    test set is only reported on. Without them, both come from the test set.
+    Plots are rendered only after evaluation, and only if `plots` is set.
+    Returns (best_model, best_model_name, best_threshold).
+    """
+    logger.info("Starting model evaluation...")
+
+    if X_val is not None:
+        tasks = (delayed(evaluate_on_holdout)(name, model, X_val, y_val, X_test, y_test) for name, model in models.items())
+    else:
+        tasks = (delayed(evaluate_model)(name, model, X_test, y_test) for name, model in models.items())
+    evaluated = Parallel(n_jobs=n_jobs or min(len(models), os.cpu_count() or 1), prefer='threads')(tasks)
+
+    # Create Results DataFrame
+    results_df = pd.DataFrame([result for result, _, _ in evaluated])
+    print("\n--- Model Performance ---")
+    print(results_df)
+    os.makedirs(output_dir, exist_ok=True)
+    results_df.to_csv(f"{output_dir}/evaluation_results.csv", index=False)
+    pd.concat([_sample_sweep(result["Model"], sweep) for result, _, sweep in evaluated]).to_csv(
+        f"{output_dir}/threshold_sweep.csv", index=False)
+
+    # Identify Best Model (F1 at each model's optimal threshold)
+    selection = "Validation F1 @ Best" if X_val is not None else "F1 Score @ Best"
+    best = results_df.sort_values(by=selection, ascending=False).iloc[0]
+    best_model_name, threshold = best["Model"], float(best["Best Threshold"])
+    logger.info(f"Best Model: {best_model_name} ({selection} {best[selection]:.4f} at threshold {threshold:.4f}; "
+                f"test F1 {best['F1 Score @ Best']:.4f} at that threshold, {best['F1 Score']:.4f} at {DEFAULT_THRESHOLD})")
+
+    if plots:
+        confusion = {result["Model"]: counts for result, counts, _ in evaluated}
+        _plot_results(models, confusion, X_test, best_model_name, plot_dir)
+
+    return models[best_model_name], best_model_name, threshold
 
 if __name__ == "__main__":
     pass
@@ -0,0 +1,228 @@
+import math
+import os
+import time
+import numpy as np
+import pandas as pd
+from src.data_loader import load_data
+from src.inference import (DEFAULT_THRESHOLD, _results_frame, _worker_artifacts, load_artifacts, save_predictions)
+from src.instrumentation import stage
+from src.preprocessing import preprocessor_path_for
+from src.tree_compiler import is_compiled_model
+from src.utils import get_logger
+
+logger = get_logger("Explain")
+
+# Reasons reported per booking by default
+DEFAULT_TOP_K = 3
+
+# Rows explained per task; bounds the dense (rows x features) contribution matrix of each task
+DEFAULT_CHUNK_ROWS = 50000
+
+class ContributionExplainer:
+    """
+    Per-row additive feature contributions for a fitted model, such that
+    `bias + contributions.sum(axis=1)` reproduces the model output for every
+    row (the class-1 probability for random forests, the log-odds otherwise).
+
+    *   XGBoost and LightGBM use their native contribution output (TreeSHAP in
+        C++, or XGBoost's faster path-based approximation with `approximate`).
+    *   Random forests use path-based (Saabas) contributions: the change in
+        node probability at every split on a row's path, credited to the
+        split feature. All trees are folded into one sparse (nodes x features)
+        matrix once, so a batch is explained with a single `decision_path`
+        call and one sparse product instead of a loop over rows.
+    *   Logistic regression contributes `coef * x`, with the intercept as bias.
+    *   A ShardedModel is explained slot by slot with the model that scored each row.
+    """
+
+    def __init__(self, model, approximate=False):
+        self.model = model
+        self.approximate = approximate
+        self.kind = type(model).__name__
+        self.feature_names = list(getattr(model, "feature_names_in_", []))
+        if self.kind in ("RandomForestClassifier", "ExtraTreesClassifier"):
+            self.unit = "probability"
+            self._path_matrix, self._path_bias = _saabas_matrix(model, len(self.feature_names))
+        elif self.kind == "ShardedModel":
+            self._slots = [ContributionExplainer(m, approximate) for m in list(model.models.values()) + [model.fallback]]
+            self.unit = self._slots[0].unit
+        elif self.kind in ("XGBClassifier", "LGBMClassifier") or hasattr(model, "coef_"):
+            self.unit = "log-odds"
+        else:
+            raise TypeError(f"Cannot explain {self.kind}; supported are random forests, XGBoost, LightGBM, "
+                            f"linear models and sharded models of those")
+
+    def contributions(self, X):
+        """
+        Returns (contributions, bias): a (rows x features) matrix and a per-row bias.
+        """
+        if self.kind == "ShardedModel":
+            return self._sharded(X)
+        if self.kind in ("RandomForestClassifier", "ExtraTreesClassifier"):
+            indicator, _ = self.model.decision_path(X)
+            contributions = (indicator @ self._path_matrix).toarray()
+            return contributions, np.full(len(X), self._path_bias)
+        if self.kind == "XGBClassifier":
+            from xgboost import DMatrix
+            booster = self.model.get_booster()
+            best_iteration = booster.attr("best_iteration")
+            iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+            output = booster.predict(DMatrix(X), pred_contribs=True, approx_contribs=self.approximate,
+                                     iteration_range=iteration_range)
+        elif self.kind == "LGBMClassifier":
+            output = self.model.predict(X, pred_contrib=True)
+        else:
+            X_values = np.asarray(X, dtype=np.float64)
+            coef = np.ravel(self.model.coef_)
+            return X_values * coef, np.full(len(X), float(np.ravel(self.model.intercept_)[0]))
+        # Native outputs put the bias in the last column
+        output = np.asarray(output, dtype=np.float64)
+        return output[:, :-1], output[:, -1]
+
+    def _sharded(self, X):
+        slots = self.model._routes(X)
+        contributions = np.zeros((len(X), X.shape[1]), dtype=np.float64)
+        bias = np.zeros(len(X), dtype=np.float64)
+        for slot in np.unique(slots):
+            rows = np.flatnonzero(slots == slot)
+            contributions[rows], bias[rows] = self._slots[slot].contributions(X.iloc[rows])
+        return contributions, bias
+
+def _saabas_matrix(model, n_features):
+    """
+    Folds every tree of a forest into one sparse (total nodes x features)
+    matrix holding, for each non-root node, the change in class-1
+    probability from its parent, in the column of the parent's split
+    feature, divided by the number of trees. A row's decision-path
+    indicator times this matrix is its contribution vector.
+    """
+    from scipy.sparse import csr_matrix
+
+    rows, cols, values = [], [], []
+    bias, offset = 0.0, 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        proba = tree.value[:, 0, 1] / tree.value[:, 0, :].sum(axis=1)
+        internal = np.flatnonzero(tree.children_left >= 0)
+        for children in (tree.children_left[internal], tree.children_right[internal]):
+            rows.append(children + offset)
+            cols.append(tree.feature[internal])
+            values.append(proba[children] - proba[internal])
+        bias += proba[0]
+        offset += tree.node_count
+    n_trees = len(model.estimators_)
+    matrix = csr_matrix((np.concatenate(values) / n_trees, (np.concatenate(rows), np.concatenate(cols))),
+                        shape=(offset, n_features))
+    return matrix, bias / n_trees
+
+def top_reasons(contributions, feature_names, predictions, top_k=DEFAULT_TOP_K):
+    """
+    The `top_k` features that pushed each row hardest towards its predicted
+    label (towards cancellation for predicted cancellations, away from it
+    otherwise), strongest first, as `Reason_<i>` / `Reason_<i>_Contribution`
+    columns. Slots with no feature pushing that way are left empty.
+    """
+    top_k = min(top_k, contributions.shape[1])
+    direction = np.where(np.asarray(predictions) == 1, 1.0, -1.0)[:, None]
+    signed = contributions * direction
+    # Partial selection, then order only the k survivors
+    top = np.argpartition(-signed, top_k - 1, axis=1)[:, :top_k]
+    top = np.take_along_axis(top, np.argsort(-np.take_along_axis(signed, top, axis=1), axis=1), axis=1)
+    supporting = np.take_along_axis(signed, top, axis=1) > 0
+    names = np.where(supporting, np.asarray(feature_names, dtype=object)[top], None)
+    values = np.where(supporting, np.take_along_axis(contributions, top, axis=1), np.nan)
+
+    reasons = {}
+    for i in range(top_k):
+        reasons[f"Reason_{i + 1}"] = names[:, i]
+        reasons[f"Reason_{i + 1}_Contribution"] = values[:, i]
+    return pd.DataFrame(reasons)
+
+def explain_frame(df, explainer, preprocessor, threshold=DEFAULT_THRESHOLD, top_k=DEFAULT_TOP_K):
+    """
+    Scores raw reservation rows like score_frame and appends the top-k
+    reasons of every prediction.
+    """
+    X = preprocessor.transform(df)
+    if preprocessor.target in X.columns:
+        X = X.drop(preprocessor.target, axis=1)
+    probs = explainer.model.predict_proba(X)[:, 1]
+    results = _results_frame(df, probs, threshold)
+    contributions, _ = explainer.contributions(X)
+    reasons = top_reasons(contributions, list(X.columns), results['Predicted_Status'].to_numpy(), top_k)
+    reasons.index = results.index
+    return pd.concat([results, reasons], axis=1)
+
+# Explainers built in this process by parallel workers, keyed by model path
+_WORKER_EXPLAINERS = {}
+
+def _explain_chunk(chunk, model_path, preprocessor_path, threshold, top_k, approximate):
+    model, preprocessor = _worker_artifacts(model_path, preprocessor_path)
+    key = (model_path, approximate)
+    if key not in _WORKER_EXPLAINERS:
+        _WORKER_EXPLAINERS[key] = ContributionExplainer(model, approximate)
+    return explain_frame(chunk, _WORKER_EXPLAINERS[key], preprocessor, threshold, top_k)
+
+def native_model_path(model_path):
+    """
+    The pickled model a compiled export was made from; compiled node arrays
+    keep only leaf values, which is not enough for path contributions.
+    """
+    if is_compiled_model(model_path):
+        return os.path.normpath(model_path)[:-len("_compiled")] + ".joblib"
+    return model_path
+
+def explain_predictions(data_path, model_path, output_path="data/predictions.csv", top_k=DEFAULT_TOP_K,
+                        n_workers=None, chunk_rows=DEFAULT_CHUNK_ROWS, threshold=DEFAULT_THRESHOLD,
+                        preprocessor_path=None, approximate=False):
+    """
+    Batch explanation mode: predictions plus the `top_k` reasons for every
+    booking. The input is split into chunks of `chunk_rows`, explained on
+    a pool of `n_workers` processes (defaults to all cores) and merged back
+    in input order. With one worker, chunks run in this process and
+    XGBoost/LightGBM keep their native threading.
+    Returns a summary with row count and throughput.
+    """
+    model_path = native_model_path(model_path)
+    if preprocessor_path is None:
+        preprocessor_path = preprocessor_path_for(model_path)
+    n_workers = n_workers or os.cpu_count() or 1
+    logger.info(f"Explaining predictions of {model_path} (top {top_k} reasons, {n_workers} worker(s))")
+
+    start = time.perf_counter()
+    with stage("explain_load"):
+        model, preprocessor = load_artifacts(model_path, preprocessor_path)
+        explainer = ContributionExplainer(model, approximate)
+        df = load_data(data_path, columns=preprocessor.required_columns())
+    load_seconds = time.perf_counter() - start
+
+    chunk_rows = max(1, min(chunk_rows, math.ceil(len(df) / n_workers)))
+    chunks = [df.iloc[i:i + chunk_rows] for i in range(0, len(df), chunk_rows)] or [df]
+    explain_start = time.perf_counter()
+    with stage("explain", rows_in=df) as s:
+        if n_workers == 1:
+            explained = [explain_frame(chunk, explainer, preprocessor, threshold, top_k) for chunk in chunks]
+        else:
+            from joblib import Parallel, delayed
+            explained = Parallel(n_jobs=n_workers, backend='loky')(
+                delayed(_explain_chunk)(chunk, model_path, preprocessor_path, threshold, top_k, approximate)
+                for chunk in chunks
+            )
+        results = s.output(pd.concat(explained))
+    explain_seconds = time.perf_counter() - explain_start
+
+    with stage("save", rows_in=results):
+        save_predictions(results, output_path)
+    summary = {
+        "rows": len(df),
+        "workers": n_workers,
+        "model": explainer.kind,
+        "unit": explainer.unit,
+        "load_seconds": round(load_seconds, 3),
+        "explain_seconds": round(explain_seconds, 3),
+        "rows_per_second": round(len(df) / explain_seconds, 1) if explain_seconds else 0.0,
+    }
+    logger.info(f"Explained {len(df)} rows in {summary['explain_seconds']}s on {n_workers} worker(s) "
+                f"({summary['rows_per_second']} rows/sec, contributions in {explainer.unit}).")
+    logger.info(f"Predictions with reasons saved to {output_path}")
+    return summary
@@ -1,65 +1,150 @@
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 from src.utils import get_logger
 
 logger = get_logger("FeatureEngineering")
 
+# Logical inputs and the column names they go by in the supported schemas
+# (this dataset's `no_of_*` names first, then the `stays_in_*` / `adr` variant)
+SCHEMA_ALIASES = {
+    'weekend_nights': ['no_of_weekend_nights', 'stays_in_weekend_nights'],
+    'week_nights': ['no_of_week_nights', 'stays_in_week_nights'],
+    'adults': ['no_of_adults', 'adults'],
+    'children': ['no_of_children', 'children'],
+    'babies': ['babies'],
+    'lead_time': ['lead_time'],
+    'price': ['avg_price_per_room', 'adr'],
+    'arrival_year': ['arrival_year', 'arrival_date_year'],
+    'arrival_month': ['arrival_month'],
+    'arrival_day': ['arrival_date', 'arrival_date_day_of_month'],
+}
+
+# Lead time bins (days): short <= 7 < medium <= 30 < long
+LEAD_TIME_BINS = [-1, 7, 30, 9999]
+
+class Feature:
+    """
+    A derived column: its logical inputs (raw columns via SCHEMA_ALIASES, or
+    features declared earlier), a vectorized expression over NumPy arrays,
+    and the compact dtype it is stored as.
+    """
+
+    def __init__(self, name, inputs, expression, dtype, optional=()):
+        self.name = name
+        self.inputs = list(inputs)
+        self.optional = list(optional)
+        self.expression = expression
+        self.dtype = dtype
+
+def _lead_time_category(c):
+    # Integer codes 0/1/2 for short/medium/long, -1 outside the bins
+    lead_time = c['lead_time']
+    codes = np.searchsorted(LEAD_TIME_BINS, lead_time, side='left') - 1
+    return np.where((lead_time > LEAD_TIME_BINS[0]) & (lead_time <= LEAD_TIME_BINS[-1]), codes, -1)
+
+def _arrival_days(c):
+    """
+    Arrival dates as days since 1970-01-01, plus a mask of valid dates
+    (the source data has a few impossible ones, such as 2018-02-29).
+    """
+    year, month, day = c['arrival_year'], c['arrival_month'], c['arrival_day']
+    valid = np.isfinite(year) & np.isfinite(month) & np.isfinite(day) & (month >= 1) & (month <= 12) & (day >= 1)
+    months = np.where(valid, (year - 1970) * 12 + month - 1, 0).astype('int64').astype('datetime64[M]')
+    month_start = months.astype('datetime64[D]')
+    days_in_month = ((months + 1).astype('datetime64[D]') - month_start).astype('int64')
+    valid &= day <= days_in_month
+    days = month_start.astype('int64') + np.where(valid, day, 1).astype('int64') - 1
+    return days, valid
+
+def _arrival_day_of_week(c):
+    # Monday = 0 ... Sunday = 6; 1970-01-01 was a Thursday
+    days, valid = _arrival_days(c)
+    return np.where(valid, (days + 3) % 7, -1)
+
+def _booking_month(c):
+    # Month (1-12) the booking was made: arrival date minus lead time
+    days, valid = _arrival_days(c)
+    valid &= np.isfinite(c['lead_time'])
+    booked = (days - np.where(valid, c['lead_time'], 0).astype('int64')).astype('datetime64[D]')
+    return np.where(valid, booked.astype('datetime64[M]').astype('int64') % 12 + 1, 0)
+
+FEATURES = [
+    Feature('total_stay_nights', ['weekend_nights', 'week_nights'],
+            lambda c: c['weekend_nights'] + c['week_nights'], 'int16'),
+    Feature('total_guests', ['adults', 'children'],
+            lambda c: c['adults'] + c['children'] + c.get('babies', 0), 'int16', optional=['babies']),
+    Feature('booking_lead_time_category', ['lead_time'], _lead_time_category, 'int8'),
+    Feature('weekend_booking_flag', ['weekend_nights'], lambda c: c['weekend_nights'] > 0, 'int8'),
+    Feature('price_per_guest', ['price', 'total_guests'],
+            lambda c: c['price'] / np.maximum(c['total_guests'], 1), 'float32'),
+    Feature('total_stay_price', ['price', 'total_stay_nights'],
+            lambda c: c['price'] * c['total_stay_nights'], 'float32'),
+    Feature('arrival_day_of_week', ['arrival_year', 'arrival_month', 'arrival_day'], _arrival_day_of_week, 'int8'),
+    Feature('booking_month', ['arrival_year', 'arrival_month', 'arrival_day', 'lead_time'], _booking_month, 'int8'),
+]
+
+@lru_cache(maxsize=32)
+def resolve_schema(columns):
+    """
+    Resolves logical inputs to column names and picks the features that can
+    be computed from `columns` (a tuple). Cached, so per-batch calls on the
+    same schema do no lookups.
+    Returns ({logical name: column}, [features]).
+    """
+    mapping = {}
+    for logical, candidates in SCHEMA_ALIASES.items():
+        for candidate in candidates:
+            if candidate in columns:
+                mapping[logical] = candidate
+                break
+
+    available = set(mapping)
+    features = []
+    for feature in FEATURES:
+        missing = [name for name in feature.inputs if name not in available]
+        if missing:
+            logger.warning(f"Inputs {missing} not found. Skipping '{feature.name}'.")
+            continue
+        features.append(feature)
+        available.add(feature.name)
+    return mapping, features
+
+def _store(values, dtype):
+    values = np.asarray(values)
+    # Integer features keep a float dtype when an input was missing
+    if np.dtype(dtype).kind in 'iu' and values.dtype.kind == 'f' and np.isnan(values).any():
+        return values.astype('float32')
+    return values.astype(dtype)
+
 def engineer_features(df):
     """
     Creates new features from existing columns.
+    Every feature in FEATURES whose inputs resolve against the schema is
+    computed from NumPy arrays, and all new columns are attached to the
+    frame in one step.
     """
     logger.info("Starting feature engineering...")
-    
-    # 1. Total stay nights
-    if 'no_of_weekend_nights' in df.columns and 'no_of_week_nights' in df.columns:
-         df['total_stay_nights'] = df['no_of_weekend_nights'] + df['no_of_week_nights']
-    elif 'stays_in_weekend_nights' in df.columns and 'stays_in_week_nights' in df.columns:
-        df['total_stay_nights'] = df['stays_in_weekend_nights'] + df['stays_in_week_nights']
-    else:
-        logger.warning("Columns for stay nights not found. Skipping 'total_stay_nights'.")
-
-    # 2. Total guests
-    # Check for column variations (adults/children/babies)
-    try:
-        # Feature 1: Total stay nights (Redundant check but ensures consistency if block above failed silently)
-        if 'stays_in_weekend_nights' in df.columns:
-            df['total_stay_nights'] = df['stays_in_weekend_nights'] + df['stays_in_week_nights']
-        elif 'no_of_weekend_nights' in df.columns:
-             df['total_stay_nights'] = df['no_of_weekend_nights'] + df['no_of_week_nights']
-        
-        # Feature 2: Total guests
-        if 'adults' in df.columns:
-            df['total_guests'] = df['adults'] + df['children'] + df['babies']
-        elif 'no_of_adults' in df.columns:
-            df['total_guests'] = df['no_of_adults'] + df['no_of_children'] 
-
-        # Feature 3: Booking lead time category
-        if 'lead_time' in df.columns:
-            df['booking_lead_time_category'] = pd.cut(df['lead_time'], 
-                                                      bins=[-1, 7, 30, 9999], 
-                                                      labels=['short', 'medium', 'long'])
-        
-        # Feature 4: Average ADR per person
-        if 'adr' in df.columns and 'total_guests' in df.columns:
-            df['avg_adr_per_person'] = df['adr'] / df['total_guests'].replace(0, 1) 
-            
-        # Feature 5: Weekend booking flag
-        if 'stays_in_weekend_nights' in df.columns:
-            df['weekend_booking_flag'] = (df['stays_in_weekend_nights'] > 0).astype(int)
-        elif 'no_of_weekend_nights' in df.columns:
-            df['weekend_booking_flag'] = (df['no_of_weekend_nights'] > 0).astype(int)
-
-        logger.info(f"Feature engineering completed. New columns: {df.columns[-5:].tolist()}")
-        return df
+    mapping, features = resolve_schema(tuple(df.columns))
 
-    except Exception as e:
-        logger.error(f"Error in feature engineering: {e}")
-        raise e
+    needed = {name for feature in features for name in feature.inputs + feature.optional if name in mapping}
+    values = {name: df[mapping[name]].to_numpy(dtype='float64', na_value=np.nan) for name in needed}
+    new_columns = {}
+    for feature in features:
+        values[feature.name] = feature.expression(values)
+        new_columns[feature.name] = _store(values[feature.name], feature.dtype)
+
+    # Recomputing replaces features already on the frame
+    df = df.drop(columns=[name for name in new_columns if name in df.columns])
+    df = pd.concat([df, pd.DataFrame(new_columns, index=df.index)], axis=1)
+
+    logger.info(f"Feature engineering completed. New columns: {list(new_columns)}")
+    return df
 
 if __name__ == "__main__":
     from src.data_loader import load_data
     from src.clean_data import clean_data
-    
+
     data_path = "data/Hotel Reservations.csv"
     try:
         df = load_data(data_path)
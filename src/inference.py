@@ -1,81 +1,460 @@
 import pandas as pd
 import joblib
+import json
+import logging
+import math
 import os
-from src.data_loader import load_data
-from src.clean_data import clean_data
-from src.feature_engineering import engineer_features
-from src.outlier_treatment import treat_outliers
-from src.encoding import encode_data
-from src.utils import get_logger
+import time
+from src.data_loader import load_data, load_data_in_chunks
+from src.preprocessing import Preprocessor, preprocessor_path_for
+from src.monitoring import load_reference_profile, write_drift_report
+from src.instrumentation import add_tracing_args, configure_tracing, flush_tracing, stage
+from src.tree_compiler import CompiledForest, compiled_path_for, is_compiled_model
+from src.utils import get_logger, get_peak_rss_mb
 
 logger = get_logger("Inference")
 
-def make_predictions(data_path, model_path):
+# Probability above which a booking is labelled as canceled, unless
+# training saved a tuned threshold next to the model
+DEFAULT_THRESHOLD = 0.5
+THRESHOLD_FILENAME = "decision_threshold.json"
+
+# Artifacts loaded in this process by parallel scoring workers, keyed by path
+_WORKER_ARTIFACTS = {}
+
+def find_best_model(model_dir="models"):
+    """
+    Returns the path of the most recently saved best model in `model_dir`, or None.
+    """
+    if not os.path.isdir(model_dir):
+        return None
+    model_files = [os.path.join(model_dir, f) for f in os.listdir(model_dir) if f.startswith('best_model_') and f.endswith('.joblib')]
+    # Newest first; ties broken by name so the choice never depends on listing order
+    return max(model_files, key=lambda path: (os.path.getmtime(path), path)) if model_files else None
+
+def find_registered_model(data_path=None, registry_dir="models/registry", name="cancellation", version=None, tag="production"):
+    """
+    Returns the model path of a registered version (by `version`, else by
+    `tag`), or None if the registry has no such model. When `data_path` is
+    given, its columns are checked against the version's schema first,
+    reading only the file header and the registry metadata.
+    """
+    from src.data_loader import read_columns
+    from src.model_registry import ModelRegistry
+
+    registry = ModelRegistry(registry_dir)
+    try:
+        resolved = registry.resolve(name, version, None if version is not None else tag)
+    except KeyError as e:
+        logger.info(f"{e}; falling back to models/.")
+        return None
+    if data_path is not None and os.path.exists(data_path):
+        registry.check_schema(read_columns(data_path), name, resolved)
+    logger.info(f"Using registered model {name} v{resolved}")
+    return registry.model_path(name, resolved)
+
+def _model_stem(model_path):
+    # A compiled export shares the threshold of the model file it was compiled from
+    stem = os.path.splitext(os.path.normpath(model_path))[0]
+    return stem[:-len("_compiled")] if stem.endswith("_compiled") else stem
+
+def threshold_path_for(model_path):
+    """
+    Returns the path of the decision threshold saved for a model file (or its
+    compiled directory). Each model has its own file, so models sharing a
+    directory never pick up each other's threshold.
+    """
+    return _model_stem(model_path) + "_" + THRESHOLD_FILENAME
+
+def save_threshold(model_path, threshold):
+    """
+    Stores the decision threshold chosen during evaluation next to the model.
+    """
+    with open(threshold_path_for(model_path), "w") as f:
+        json.dump({"model": os.path.basename(model_path), "threshold": threshold}, f, indent=2)
+
+def load_threshold(model_path):
+    """
+    Returns the decision threshold saved for the model, or DEFAULT_THRESHOLD.
+    A file written for a different model is ignored.
+    """
+    stem = _model_stem(model_path)
+    # Older runs wrote one decision_threshold.json per directory
+    candidates = [threshold_path_for(model_path), os.path.join(os.path.dirname(stem), THRESHOLD_FILENAME)]
+    for path in candidates:
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            saved = json.load(f)
+        if os.path.splitext(saved.get("model", ""))[0] != os.path.basename(stem):
+            logger.warning(f"Ignoring {path}: it was saved for {saved.get('model')}, not {os.path.basename(model_path)}")
+            continue
+        logger.info(f"Using decision threshold {saved['threshold']:.4f} from {path}")
+        return saved["threshold"]
+    return DEFAULT_THRESHOLD
+
+def resolve_model_path(model_path, compiled=False):
+    """
+    With `compiled`, returns the compiled directory of `model_path` if one was exported.
+    """
+    if compiled and not is_compiled_model(model_path):
+        compiled_path = compiled_path_for(model_path)
+        if is_compiled_model(compiled_path):
+            return compiled_path
+        logger.warning(f"No compiled model at {compiled_path}. Using {model_path}.")
+    return model_path
+
+def load_artifacts(model_path, preprocessor_path=None, mmap=False):
+    """
+    Loads a trained model together with its fitted preprocessor.
+    `model_path` may also be a compiled model directory, which is memory-mapped.
+    With `mmap`, the numpy arrays of a joblib model are memory-mapped read-only
+    too, so processes loading the same file share them in the page cache.
+    """
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model not found at {model_path}")
+    if preprocessor_path is None:
+        preprocessor_path = preprocessor_path_for(model_path)
+
+    if is_compiled_model(model_path):
+        model = CompiledForest.load(model_path)
+    else:
+        model = joblib.load(model_path, mmap_mode='r' if mmap else None)
+    preprocessor = Preprocessor.load(preprocessor_path)
+    logger.info(f"Loaded model {model_path} and preprocessor {preprocessor_path}")
+    return model, preprocessor
+
+def score_frame(df, model, preprocessor, threshold=DEFAULT_THRESHOLD, profile=None):
+    """
+    Scores raw reservation rows with a loaded model and preprocessor.
+    Runs a single predict_proba call for the whole frame; labels are
+    probabilities above `threshold`. A DataProfile passed as `profile` is
+    updated with the raw rows once they are scored, so a batch that fails
+    (and may be retried row by row) is never counted.
+    """
+    X = preprocessor.transform(df)
+    if preprocessor.target in X.columns:
+        X = X.drop(preprocessor.target, axis=1)
+
+    probs = model.predict_proba(X)[:, 1]
+    if profile is not None:
+        profile.update(df)
+    return _results_frame(df, probs, threshold)
+
+def _results_frame(df, probs, threshold):
+    predictions = (probs > threshold).astype('int64')
+    results = pd.DataFrame({
+        'Predicted_Status': predictions,
+        'Cancellation_Probability': probs
+    }, index=df.index)
+    if 'Booking_ID' in df.columns:
+        results.insert(0, 'Booking_ID', df['Booking_ID'])
+    results['Predicted_Label'] = results['Predicted_Status'].map({1: 'Canceled', 0: 'Not_Canceled'})
+    return results
+
+class PredictionWriter:
+    """
+    Writes prediction frames to CSV or Parquet (chosen by extension),
+    appending each call so results can be written chunk by chunk.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.is_parquet = output_path.lower().endswith(('.parquet', '.pq'))
+        self._parquet_writer = None
+        self._chunks_written = 0
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    def write(self, results):
+        if self.is_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._parquet_writer is None:
+                table = pa.Table.from_pandas(results, preserve_index=False)
+                self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            else:
+                table = pa.Table.from_pandas(results, schema=self._parquet_writer.schema, preserve_index=False)
+            self._parquet_writer.write_table(table)
+        else:
+            first = self._chunks_written == 0
+            results.to_csv(self.output_path, mode='w' if first else 'a', header=first, index=False)
+        self._chunks_written += 1
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def save_predictions(results, output_path):
+    """
+    Saves a predictions frame to CSV or Parquet (chosen by extension).
+    """
+    with PredictionWriter(output_path) as writer:
+        writer.write(results)
+
+def make_predictions(data_path, model_path, preprocessor_path=None, output_path="data/predictions.csv", threshold=DEFAULT_THRESHOLD,
+                     drift_path=None):
     """
     Loads model and data, runs preprocessing, and generates predictions.
+    Uses the preprocessor fitted during training (saved next to the model)
+    unless `preprocessor_path` points elsewhere. With `drift_path`, the
+    input is compared with the training reference profile and a drift
+    report is written there. Failures are logged and re-raised, so callers
+    (and the CLI's exit code) see them.
     """
     logger.info(f"Starting inference using model: {model_path}")
     
     try:
-        # 1. Load Data
-        df = load_data(data_path)
-        original_df = df.copy() # Keep for display
-        
-        # 2. Preprocessing (Must match training pipeline)
-        logger.info("Preprocessing data...")
-        df = clean_data(df)
-        df = engineer_features(df)
-        df = treat_outliers(df)
-        df = encode_data(df)
-        
-        # 3. Load Model
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Model not found at {model_path}")
-            
-        model = joblib.load(model_path)
-        logger.info("Model loaded successfully.")
-        
-        # 4. Predict
-        # Ensure columns match (drop target if present)
-        if 'booking_status' in df.columns:
-            df = df.drop('booking_status', axis=1)
-            
-        # Align columns with model (simple check)
-        # In a real prod system, we'd save the feature list. 
-        # Here we assume the pipeline produces consistent features.
-        
-        predictions = model.predict(df)
-        probs = model.predict_proba(df)[:, 1] if hasattr(model, "predict_proba") else [0]*len(predictions)
-        
-        # 5. Create Results
-        results = pd.DataFrame({
-            'Booking_ID': original_df['Booking_ID'],
-            'Predicted_Status': predictions,
-            'Cancellation_Probability': probs
-        })
-        
-        # Map back to labels if needed (1=Canceled, 0=Not_Canceled)
-        results['Predicted_Label'] = results['Predicted_Status'].map({1: 'Canceled', 0: 'Not_Canceled'})
+        reference, profile = _scoring_profile(model_path, drift_path)
+        if preprocessor_path is None:
+            preprocessor_path = preprocessor_path_for(model_path)
+        if os.path.exists(preprocessor_path):
+            with stage("load_artifacts"):
+                model, preprocessor = load_artifacts(model_path, preprocessor_path)
+
+            # 1. Load Data (only the columns the preprocessor needs)
+            with stage("load") as s:
+                df = s.output(load_data(data_path, columns=preprocessor.required_columns()))
+
+            # 2, 3 & 4. Preprocess (Must match training pipeline) and Predict
+            logger.info("Preprocessing data...")
+            with stage("score", rows_in=df) as s:
+                results = s.output(score_frame(df, model, preprocessor, threshold, profile))
+        else:
+            # Models trained before the preprocessor was persisted
+            logger.warning(f"No preprocessor found at {preprocessor_path}. Refitting preprocessing on input data.")
+            with stage("legacy_score") as s:
+                results = s.output(_legacy_predictions(load_data(data_path), model_path, threshold))
         
         print("\n--- Predictions Preview ---")
         print(results.head(10))
         
-        output_path = "data/predictions.csv"
-        results.to_csv(output_path, index=False)
+        with stage("save", rows_in=results):
+            save_predictions(results, output_path)
         logger.info(f"Predictions saved to {output_path}")
+        if profile is not None and profile.rows:
+            write_drift_report(reference, profile, drift_path)
         
     except Exception as e:
         logger.error(f"Inference failed: {e}")
+        raise
+
+def _scoring_profile(model_path, drift_path):
+    """
+    The model's training reference profile and an empty scoring profile on
+    it, or (None, None) when drift monitoring is off or no reference was saved.
+    """
+    reference = load_reference_profile(model_path) if drift_path else None
+    return reference, reference.empty_like() if reference is not None else None
+
+def _legacy_predictions(df, model_path, threshold=DEFAULT_THRESHOLD):
+    """
+    Scores with preprocessing refitted on the input, for models saved
+    without a preprocessor artifact.
+    """
+    from src.clean_data import clean_data
+    from src.feature_engineering import engineer_features
+    from src.outlier_treatment import treat_outliers
+    from src.encoding import encode_data
+
+    original_df = df.copy() # Keep for display
+    df = clean_data(df)
+    df = engineer_features(df)
+    df = treat_outliers(df)
+    df = encode_data(df)
+
+    # 3. Load Model
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model not found at {model_path}")
+
+    model = joblib.load(model_path)
+    logger.info("Model loaded successfully.")
+
+    # 4. Predict
+    # Ensure columns match (drop target if present)
+    if 'booking_status' in df.columns:
+        df = df.drop('booking_status', axis=1)
+
+    probs = model.predict_proba(df)[:, 1]
+
+    # 5. Create Results (labels derived from the same probabilities)
+    return _results_frame(original_df.loc[df.index], probs, threshold)
+
+def stream_predictions(data_path, model_path, output_path="data/predictions.csv", chunksize=100000, preprocessor_path=None,
+                       threshold=DEFAULT_THRESHOLD, drift_path=None):
+    """
+    Scores a file chunk by chunk and appends results to `output_path` as it goes,
+    so memory stays bounded by the chunk size rather than the file size.
+    Output matches make_predictions row for row. With `drift_path`, each
+    chunk also updates the drift profile, and a drift report is written
+    at the end.
+    Returns a summary with row count, throughput and peak RSS.
+    """
+    logger.info(f"Starting streaming inference using model: {model_path}")
+    model, preprocessor = load_artifacts(model_path, preprocessor_path)
+
+    reference, profile = _scoring_profile(model_path, drift_path)
+    total_rows = 0
+    start = time.perf_counter()
+    chunks = load_data_in_chunks(data_path, chunksize, columns=preprocessor.required_columns())
+    with PredictionWriter(output_path) as writer:
+        for i, chunk in enumerate(chunks):
+            with stage("score_chunk", rows_in=chunk) as s:
+                writer.write(s.output(score_frame(chunk, model, preprocessor, threshold, profile)))
+            total_rows += len(chunk)
+            logger.info(f"Chunk {i + 1}: scored {len(chunk)} rows ({total_rows} total).")
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "rows": total_rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(total_rows / elapsed, 1) if elapsed else 0.0,
+        "peak_rss_mb": get_peak_rss_mb(),
+    }
+    peak = f"{summary['peak_rss_mb']:.1f} MB" if summary['peak_rss_mb'] is not None else "n/a"
+    logger.info(f"Streaming inference completed: {total_rows} rows at {summary['rows_per_second']} rows/sec, peak RSS {peak}.")
+    logger.info(f"Predictions saved to {output_path}")
+    if profile is not None:
+        write_drift_report(reference, profile, drift_path)
+    return summary
+
+def _worker_artifacts(model_path, preprocessor_path):
+    """
+    Loads the model and preprocessor once per worker process and reuses them
+    for every shard the worker scores.
+    """
+    key = (model_path, preprocessor_path)
+    if key not in _WORKER_ARTIFACTS:
+        # Per-shard stage logging would interleave across workers
+        for name in ("FeatureEngineering", "Preprocessing", "Inference"):
+            logging.getLogger(name).setLevel(logging.WARNING)
+        # Memory-mapped, so the workers share one copy of the model's arrays
+        model, preprocessor = load_artifacts(model_path, preprocessor_path, mmap=True)
+        # Parallelism comes from the workers, so each model runs single-threaded
+        if hasattr(model, "get_params") and 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=1)
+        _WORKER_ARTIFACTS[key] = (model, preprocessor)
+    return _WORKER_ARTIFACTS[key]
+
+def _score_shard(shard, model_path, preprocessor_path, threshold, reference=None):
+    model, preprocessor = _worker_artifacts(model_path, preprocessor_path)
+    # Each shard gets its own profile; the parent merges them
+    profile = reference.empty_like() if reference is not None else None
+    return score_frame(shard, model, preprocessor, threshold, profile), profile
+
+def parallel_predictions(data_path, model_path, output_path="data/predictions.csv", n_workers=None,
+                         threshold=DEFAULT_THRESHOLD, preprocessor_path=None, shards_per_worker=4, drift_path=None,
+                         compiled=False):
+    """
+    Scores a file on a pool of `n_workers` processes (defaults to all cores).
+    The input is split into contiguous shards, several per worker to balance
+    load, and results are merged back in input order. Each worker loads the
+    artifacts once, memory-mapping the model's arrays. With `compiled`, the
+    compiled export is used if one exists: all of its node arrays are
+    memory-mapped, so the workers share one copy of the whole forest in the
+    page cache (sklearn copies tree nodes out of a mapped joblib file).
+    With `drift_path`, workers profile their shards and the merged profile
+    is compared with the training reference.
+    Returns a summary with row count, worker count, throughput and the model scored with.
+    """
+    model_path = resolve_model_path(model_path, compiled)
+    if preprocessor_path is None:
+        preprocessor_path = preprocessor_path_for(model_path)
+    preprocessor = Preprocessor.load(preprocessor_path)
+    n_workers = n_workers or os.cpu_count() or 1
+    kind = "compiled" if is_compiled_model(model_path) else "joblib"
+    logger.info(f"Starting parallel inference on {n_workers} worker(s) using {kind} model: {model_path}")
+
+    start = time.perf_counter()
+    df = load_data(data_path, columns=preprocessor.required_columns())
+    shard_rows = max(1, math.ceil(len(df) / (n_workers * shards_per_worker)))
+    shards = [df.iloc[i:i + shard_rows] for i in range(0, len(df), shard_rows)] or [df]
+
+    from joblib import Parallel, delayed
+    reference = load_reference_profile(model_path) if drift_path else None
+    scored = Parallel(n_jobs=n_workers, backend='loky')(
+        delayed(_score_shard)(shard, model_path, preprocessor_path, threshold, reference) for shard in shards
+    )
+    save_predictions(pd.concat([results for results, _ in scored]), output_path)
+    if reference is not None:
+        profile = reference.empty_like()
+        for _, shard_profile in scored:
+            profile.merge(shard_profile)
+        write_drift_report(reference, profile, drift_path)
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "rows": len(df),
+        "workers": n_workers,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(len(df) / elapsed, 1) if elapsed else 0.0,
+        "model": model_path,
+    }
+    logger.info(f"Parallel inference completed: {len(df)} rows in {summary['seconds']}s on {n_workers} worker(s) "
+                f"({summary['rows_per_second']} rows/sec).")
+    logger.info(f"Predictions saved to {output_path}")
+    return summary
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate cancellation predictions.")
     # Use sample data for demonstration
-    sample_data = "tests/sample_data.csv"
+    parser.add_argument("--data", default="tests/sample_data.csv")
+    parser.add_argument("--model", default=None, help="Model path (defaults to the registered model, then the best model in models/)")
+    parser.add_argument("--registry", default="models/registry", help="Model registry directory")
+    parser.add_argument("--name", default="cancellation", help="Registered model name")
+    parser.add_argument("--version", type=int, default=None, help="Registered version to score with")
+    parser.add_argument("--tag", default="production", help="Registered tag to score with when no --version is given")
+    parser.add_argument("--output", default="data/predictions.csv")
+    parser.add_argument("--chunksize", type=int, default=None, help="Stream the input in chunks of this many rows")
+    parser.add_argument("--compiled", action="store_true", help="Score with the compiled tree model if one was exported")
+    parser.add_argument("--workers", type=int, default=None, help="Score on a pool of this many processes")
+    parser.add_argument("--drift-report", default=None,
+                        help="Compare the input with the training data and write a drift report (CSV) here")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Probability above which a booking is labelled Canceled (defaults to the one chosen in training)")
+    parser.add_argument("--explain", type=int, default=None, metavar="K",
+                        help="Add the top K reasons per booking to the output (per-row feature contributions)")
+    parser.add_argument("--approximate", action="store_true",
+                        help="With --explain, use XGBoost's faster path-based contributions instead of exact TreeSHAP")
+    add_tracing_args(parser)
+    args = parser.parse_args()
+    configure_tracing(args.trace_dir, args.profile_stage, args.tracemalloc)
     
-    # Find the best model (take the first one found in models/)
-    model_dir = "models"
-    model_files = [f for f in os.listdir(model_dir) if f.endswith('.joblib')]
-    if model_files:
-        best_model_path = os.path.join(model_dir, model_files[0])
-        make_predictions(sample_data, best_model_path)
-    else:
+    # Registered model first, then the best model saved in models/
+    try:
+        best_model_path = (args.model
+                           or find_registered_model(args.data, args.registry, args.name, args.version, args.tag)
+                           or find_best_model("models"))
+    except ValueError as e:
+        logger.error(f"Incompatible input: {e}")
+        raise SystemExit(1)
+    if best_model_path:
+        best_model_path = resolve_model_path(best_model_path, args.compiled)
+        threshold = args.threshold if args.threshold is not None else load_threshold(best_model_path)
+    if not best_model_path:
         logger.error("No trained model found in models/ directory. Run main.py first.")
+        raise SystemExit(1)
+    # Scoring errors propagate, so a failed run exits non-zero
+    try:
+        if args.explain:
+            from src.explain import explain_predictions
+            explain_predictions(args.data, best_model_path, args.output, args.explain, args.workers, threshold=threshold,
+                                approximate=args.approximate)
+        elif args.workers:
+            # best_model_path is already resolved against --compiled
+            parallel_predictions(args.data, best_model_path, args.output, args.workers, threshold, drift_path=args.drift_report)
+        elif args.chunksize:
+            stream_predictions(args.data, best_model_path, args.output, args.chunksize, threshold=threshold,
+                               drift_path=args.drift_report)
+        else:
+            make_predictions(args.data, best_model_path, output_path=args.output, threshold=threshold,
+                             drift_path=args.drift_report)
+    finally:
+        flush_tracing()
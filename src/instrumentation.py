@@ -0,0 +1,252 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from src.utils import get_logger, MemoryMonitor
+
+logger = get_logger("Instrumentation")
+
+EVENTS_FILENAME = "events.jsonl"
+METRICS_FILENAME = "metrics.prom"
+
+# Tracer used by `stage`; None means instrumentation is off
+_TRACER = None
+
+def _rows(obj):
+    if obj is None or isinstance(obj, int):
+        return obj
+    return len(obj) if hasattr(obj, "__len__") else None
+
+class _NullStage:
+    """
+    Stand-in returned by `stage` while tracing is off: no clocks, no
+    threads, no allocation per call.
+    """
+
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+    def output(self, obj):
+        return obj
+
+_NULL_STAGE = _NullStage()
+
+class Stage:
+    """
+    One timed run of a named stage: wall and CPU time, rows in and out, and
+    the peak RSS increase. Optionally profiles the block with cProfile and
+    tracemalloc. Use `output(result)` to record the rows a stage produced.
+    """
+
+    def __init__(self, tracer, name, rows_in=None):
+        self.tracer = tracer
+        self.name = name
+        self.rows_in = _rows(rows_in)
+        self.rows_out = None
+        self.parent = None
+        self._profiler = None
+        self._tracemalloc = False
+
+    def output(self, obj):
+        self.rows_out = _rows(obj[0] if isinstance(obj, tuple) and obj else obj)
+        return obj
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        if self.name == self.tracer.profile_stage:
+            self._start_profiling()
+        self._memory = MemoryMonitor(interval=self.tracer.sample_interval).__enter__()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        self._memory.__exit__(exc_type, exc, tb)
+        if self._profiler is not None or self._tracemalloc:
+            self._stop_profiling()
+        self.tracer._stack().pop()
+        event = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "event": "stage",
+            "stage": self.name,
+            "parent": self.parent,
+            "status": "ok" if exc_type is None else "error",
+            "wall_seconds": round(wall, 6),
+            "cpu_seconds": round(cpu, 6),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rss_start_mb": round(self._memory.start_mb, 1),
+            "peak_rss_delta_mb": round(self._memory.delta_mb, 1),
+        }
+        if exc_type is not None:
+            event["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer.record(event)
+        return False
+
+    def _start_profiling(self):
+        if self.tracer.tracemalloc:
+            import tracemalloc
+            self._tracemalloc = not tracemalloc.is_tracing()
+            if self._tracemalloc:
+                tracemalloc.start(25)
+        self._profiler = cProfile.Profile()
+        try:
+            self._profiler.enable()
+        except ValueError:
+            # Another profiler is already active (e.g. a nested run of this stage)
+            self._profiler = None
+
+    def _stop_profiling(self):
+        os.makedirs(self.tracer.trace_dir, exist_ok=True)
+        base = os.path.join(self.tracer.trace_dir, f"profile_{self.name}")
+        if self._tracemalloc:
+            # Snapshot before the profiler writes anything, and leave out the profiler's own bookkeeping
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ])
+            tracemalloc.stop()
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(f"{base}.prof")
+            text = io.StringIO()
+            pstats.Stats(self._profiler, stream=text).sort_stats("cumulative").print_stats(30)
+            with open(f"{base}.txt", "w") as f:
+                f.write(text.getvalue())
+            logger.info(f"cProfile output for '{self.name}' saved to {base}.prof")
+        if self._tracemalloc:
+            with open(f"{base}_tracemalloc.txt", "w") as f:
+                f.write(f"current {current / 2**20:.1f} MB, peak {peak / 2**20:.1f} MB\n\n")
+                for statistic in snapshot.statistics("lineno")[:25]:
+                    f.write(f"{statistic}\n")
+            logger.info(f"tracemalloc output for '{self.name}' saved to {base}_tracemalloc.txt")
+
+class Tracer:
+    """
+    Collects stage events. Each event is appended to `<trace_dir>/events.jsonl`
+    as it happens, and per-stage totals are written to
+    `<trace_dir>/metrics.prom` in the Prometheus text format (for the node
+    exporter textfile collector) on `flush`.
+    """
+
+    def __init__(self, trace_dir, profile_stage=None, tracemalloc=False, sample_interval=0.01):
+        self.trace_dir = trace_dir
+        self.profile_stage = profile_stage
+        self.tracemalloc = tracemalloc
+        self.sample_interval = sample_interval
+        self.totals = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        os.makedirs(trace_dir, exist_ok=True)
+        self.events_path = os.path.join(trace_dir, EVENTS_FILENAME)
+        self.metrics_path = os.path.join(trace_dir, METRICS_FILENAME)
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def stage(self, name, rows_in=None):
+        return Stage(self, name, rows_in)
+
+    def record(self, event):
+        with self._lock:
+            with open(self.events_path, "a") as f:
+                f.write(json.dumps(event) + "\n")
+            totals = self.totals.setdefault(event["stage"], {
+                "runs": 0, "errors": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+                "rows_in": 0, "rows_out": 0, "peak_rss_delta_mb": 0.0})
+            totals["runs"] += 1
+            totals["errors"] += event["status"] != "ok"
+            totals["wall_seconds"] += event["wall_seconds"]
+            totals["cpu_seconds"] += event["cpu_seconds"]
+            totals["rows_in"] += event["rows_in"] or 0
+            totals["rows_out"] += event["rows_out"] or 0
+            totals["peak_rss_delta_mb"] = max(totals["peak_rss_delta_mb"], event["peak_rss_delta_mb"])
+
+    def prometheus_text(self, prefix="pipeline"):
+        metrics = [
+            ("stage_runs_total", "counter", "Completed runs of each stage.", "runs", 1),
+            ("stage_errors_total", "counter", "Runs of each stage that raised.", "errors", 1),
+            ("stage_wall_seconds_total", "counter", "Wall time spent in each stage.", "wall_seconds", 1),
+            ("stage_cpu_seconds_total", "counter", "CPU time (all threads) spent in each stage.", "cpu_seconds", 1),
+            ("stage_rows_in_total", "counter", "Rows passed into each stage.", "rows_in", 1),
+            ("stage_rows_out_total", "counter", "Rows produced by each stage.", "rows_out", 1),
+            ("stage_peak_rss_delta_bytes", "gauge", "Largest RSS increase seen during one run of each stage.",
+             "peak_rss_delta_mb", 2**20),
+        ]
+        lines = []
+        with self._lock:
+            for metric, kind, help_text, key, scale in metrics:
+                lines.append(f"# HELP {prefix}_{metric} {help_text}")
+                lines.append(f"# TYPE {prefix}_{metric} {kind}")
+                for name, totals in self.totals.items():
+                    lines.append(f'{prefix}_{metric}{{stage="{name}"}} {totals[key] * scale:g}')
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        """
+        Writes the Prometheus exposition file (atomically, so a scraper never reads half of it).
+        """
+        tmp_path = f"{self.metrics_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, self.metrics_path)
+        logger.info(f"Stage metrics written to {self.metrics_path} and {self.events_path}")
+
+def configure_tracing(trace_dir=None, profile_stage=None, tracemalloc=False):
+    """
+    Turns instrumentation on (writing under `trace_dir`) or off (`trace_dir=None`).
+    `profile_stage` runs cProfile, plus tracemalloc with `tracemalloc`, for
+    every run of the stage with that name. Returns the active Tracer or None.
+    """
+    global _TRACER
+    _TRACER = Tracer(trace_dir, profile_stage, tracemalloc) if trace_dir else None
+    return _TRACER
+
+def get_tracer():
+    return _TRACER
+
+def stage(name, rows_in=None):
+    """
+    Context manager timing one stage:
+
+        with stage("clean", rows_in=df) as s:
+            df = s.output(clean_data(df))
+
+    Costs one global lookup when tracing is off.
+    """
+    if _TRACER is None:
+        return _NULL_STAGE
+    return _TRACER.stage(name, rows_in)
+
+def flush_tracing():
+    if _TRACER is not None:
+        _TRACER.flush()
+
+def add_tracing_args(parser):
+    """
+    Adds the --trace-dir / --profile-stage / --tracemalloc options to a CLI.
+    """
+    parser.add_argument("--trace-dir", default=None,
+                        help="Record per-stage timings, rows and memory as JSON events and Prometheus metrics here")
+    parser.add_argument("--profile-stage", default=None, help="Run cProfile on the stage with this name (needs --trace-dir)")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also trace allocations in --profile-stage")
+    return parser
@@ -0,0 +1,313 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+import joblib
+import pandas as pd
+from src.clean_data import row_hashes
+from src.utils import get_logger
+
+logger = get_logger("ModelRegistry")
+
+DEFAULT_REGISTRY = "models/registry"
+DEFAULT_NAME = "cancellation"
+DEFAULT_TAG = "production"
+
+METADATA_FILENAME = "metadata.json"
+TAGS_FILENAME = "tags.json"
+MODEL_FILENAME = "model.joblib"
+
+# Memory budget for models held by one ModelCache
+DEFAULT_CACHE_MB = 1024
+
+def data_fingerprint(df):
+    """
+    SHA-1 over the sorted 64-bit row digests plus the column names, so the
+    same training rows give the same fingerprint whatever their order.
+    """
+    digest = hashlib.sha1(json.dumps([str(col) for col in df.columns]).encode("utf-8"))
+    digest.update(pd.Series(row_hashes(df)).sort_values().to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _directory_bytes(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def _write_json(path, payload):
+    # Write then rename, so readers never see a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+class ModelRegistry:
+    """
+    Local store of trained models under `root`:
+
+        <root>/<name>/v<N>/model.joblib           the fitted model
+        <root>/<name>/v<N>/preprocessor.joblib    its fitted preprocessor
+        <root>/<name>/v<N>/model_compiled/        compiled export, if any
+        <root>/<name>/v<N>/reference_profile.json training data profile for drift checks
+        <root>/<name>/v<N>/metadata.json          schema, metrics, data fingerprint
+        <root>/<name>/tags.json                   tag -> version, e.g. "production"
+
+    Versions are never overwritten. Each version directory holds everything
+    inference needs, so its model path works with the helpers in src.inference.
+    Metadata is plain JSON and can be read without unpickling anything.
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY):
+        self.root = root
+
+    def _name_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def version_dir(self, name, version):
+        return os.path.join(self._name_dir(name), f"v{int(version)}")
+
+    def names(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry for entry in os.listdir(self.root) if os.path.isdir(self._name_dir(entry)))
+
+    def versions(self, name):
+        """
+        Registered versions of `name`, oldest first.
+        """
+        name_dir = self._name_dir(name)
+        if not os.path.isdir(name_dir):
+            return []
+        return sorted(int(entry[1:]) for entry in os.listdir(name_dir)
+                      if entry.startswith("v") and entry[1:].isdigit()
+                      and os.path.isfile(os.path.join(name_dir, entry, METADATA_FILENAME)))
+
+    def tags(self, name):
+        path = os.path.join(self._name_dir(name), TAGS_FILENAME)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def set_tag(self, name, tag, version):
+        """
+        Points `tag` at `version` (moving it if it was set elsewhere).
+        """
+        if int(version) not in self.versions(name):
+            raise KeyError(f"No version {version} of model '{name}'")
+        tags = self.tags(name)
+        tags[tag] = int(version)
+        _write_json(os.path.join(self._name_dir(name), TAGS_FILENAME), tags)
+        logger.info(f"Tagged {name} v{version} as '{tag}'")
+
+    def resolve(self, name=DEFAULT_NAME, version=None, tag=None):
+        """
+        Returns the version number for an explicit `version`, a `tag`, or
+        (with neither) the latest registered version.
+        """
+        versions = self.versions(name)
+        if version is not None:
+            if int(version) not in versions:
+                raise KeyError(f"No version {version} of model '{name}'")
+            return int(version)
+        if tag is not None:
+            tags = self.tags(name)
+            if tag not in tags:
+                raise KeyError(f"No version of model '{name}' is tagged '{tag}'")
+            return int(tags[tag])
+        if not versions:
+            raise KeyError(f"No versions of model '{name}' in {self.root}")
+        return versions[-1]
+
+    def metadata(self, name=DEFAULT_NAME, version=None, tag=None):
+        version = self.resolve(name, version, tag)
+        with open(os.path.join(self.version_dir(name, version), METADATA_FILENAME)) as f:
+            return json.load(f)
+
+    def model_path(self, name=DEFAULT_NAME, version=None, tag=None):
+        """
+        Path of the registered model file, usable with load_artifacts,
+        load_threshold and resolve_model_path.
+        """
+        return os.path.join(self.version_dir(name, self.resolve(name, version, tag)), MODEL_FILENAME)
+
+    def register(self, model, preprocessor, name=DEFAULT_NAME, metrics=None, threshold=None,
+                 fingerprint=None, compiled=None, reference_profile=None, tags=(), extra=None):
+        """
+        Stores a model with its preprocessor (plus compiled export and drift
+        reference profile, if given) as a new version and returns the version number. Metadata records the feature
+        schema, evaluation `metrics`, the decision `threshold` and the
+        training-data `fingerprint`.
+        """
+        from src.inference import save_threshold
+        from src.monitoring import reference_profile_path_for
+        from src.tree_compiler import compiled_path_for
+
+        os.makedirs(self._name_dir(name), exist_ok=True)
+        versions = self.versions(name)
+        version = versions[-1] + 1 if versions else 1
+        version_dir = self.version_dir(name, version)
+        # A leftover directory from an interrupted registration has no metadata
+        shutil.rmtree(version_dir, ignore_errors=True)
+        os.makedirs(version_dir)
+
+        model_path = os.path.join(version_dir, MODEL_FILENAME)
+        joblib.dump(model, model_path)
+        preprocessor.save(os.path.join(version_dir, "preprocessor.joblib"))
+        if threshold is not None:
+            save_threshold(model_path, threshold)
+        if compiled is not None:
+            compiled.save(compiled_path_for(model_path))
+        if reference_profile is not None:
+            reference_profile.save(reference_profile_path_for(model_path))
+
+        metadata = {
+            "name": name,
+            "version": version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "model_class": type(model).__name__,
+            "feature_names": list(preprocessor.feature_names_),
+            "required_columns": preprocessor.required_columns(),
+            "id_columns": list(preprocessor.id_columns),
+            "target": preprocessor.target,
+            "threshold": threshold,
+            "metrics": metrics or {},
+            "data_fingerprint": fingerprint,
+            "compiled": compiled is not None,
+            "compiled_bytes": _directory_bytes(compiled_path_for(model_path)) if compiled is not None else None,
+            # Measured after every artifact of the version is written
+            "size_bytes": _directory_bytes(version_dir),
+        }
+        metadata.update(extra or {})
+        _write_json(os.path.join(version_dir, METADATA_FILENAME), metadata)
+        logger.info(f"Registered {name} v{version} ({metadata['model_class']}, {metadata['size_bytes'] / 2**20:.1f} MB)")
+
+        for tag in tags:
+            self.set_tag(name, tag, version)
+        return version
+
+    def validate(self, name=DEFAULT_NAME, version=None, tag=None):
+        """
+        Cheap startup check that a version is complete: its artifacts exist and
+        a compiled export was built for the same features. Reads only JSON.
+        Raises ValueError on problems; returns the metadata otherwise.
+        """
+        from src.tree_compiler import COMPILED_META, compiled_path_for
+
+        metadata = self.metadata(name, version, tag)
+        version_dir = self.version_dir(name, metadata["version"])
+        missing = [filename for filename in (MODEL_FILENAME, "preprocessor.joblib")
+                   if not os.path.isfile(os.path.join(version_dir, filename))]
+        if missing:
+            raise ValueError(f"{name} v{metadata['version']} is missing artifacts: {missing}")
+        if metadata.get("compiled"):
+            with open(os.path.join(compiled_path_for(os.path.join(version_dir, MODEL_FILENAME)), COMPILED_META)) as f:
+                compiled_features = json.load(f)["feature_names"]
+            if compiled_features != metadata["feature_names"]:
+                raise ValueError(f"{name} v{metadata['version']}: compiled export features differ from the preprocessor's")
+        return metadata
+
+    def check_schema(self, columns, name=DEFAULT_NAME, version=None, tag=None):
+        """
+        Verifies from metadata alone (no model is unpickled) that input with
+        `columns` can be scored by the given version. Raises ValueError listing
+        the missing columns; returns the metadata otherwise.
+        """
+        metadata = self.metadata(name, version, tag)
+        id_columns = set(metadata.get("id_columns", []))
+        missing = [col for col in metadata["required_columns"] or [] if col not in columns and col not in id_columns]
+        if missing:
+            raise ValueError(f"{name} v{metadata['version']} needs columns missing from the input: {missing}")
+        return metadata
+
+class ModelCache:
+    """
+    Thread-safe LRU cache of loaded (model, preprocessor, threshold) triples,
+    keyed by registry name and version, so one process can serve many models.
+    Models load on first use. When the artifact sizes recorded at
+    registration exceed `max_mb`, the least recently used models are dropped.
+    """
+
+    def __init__(self, registry, max_mb=DEFAULT_CACHE_MB, compiled=False):
+        self.registry = registry
+        self.max_bytes = max_mb * 2**20
+        self.compiled = compiled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def size_bytes(self):
+        return sum(size for _, size in self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, name=DEFAULT_NAME, version=None, tag=None):
+        """
+        Returns (model, preprocessor, threshold) for a version or tag,
+        loading it if needed. Tags are resolved on every call, so moving a
+        tag switches the model without a restart.
+        """
+        from src.inference import load_artifacts, load_threshold, resolve_model_path
+
+        key = (name, self.registry.resolve(name, version, tag))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+            metadata = self.registry.metadata(*key)
+            model_path = self.registry.model_path(*key)
+            model, preprocessor = load_artifacts(resolve_model_path(model_path, self.compiled))
+            threshold = metadata["threshold"] if metadata.get("threshold") is not None else load_threshold(model_path)
+            entry = (model, preprocessor, threshold)
+            # Compiled exports are memory-mapped, so only their arrays count
+            use_compiled = self.compiled and metadata.get("compiled")
+            self._entries[key] = (entry, metadata["compiled_bytes"] if use_compiled else metadata.get("size_bytes", 0))
+            # The newest entry always stays, even if it alone exceeds the cap
+            while len(self._entries) > 1 and self.size_bytes > self.max_bytes:
+                evicted, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                logger.info(f"Evicted {evicted[0]} v{evicted[1]} from the model cache")
+            return entry
+
+    def stats(self):
+        return {
+            "models_loaded": len(self._entries),
+            "cache_mb": round(self.size_bytes / 2**20, 2),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_evictions": self.evictions,
+        }
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect and tag registered models.")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY)
+    parser.add_argument("--name", default=DEFAULT_NAME)
+    parser.add_argument("--tag", default=None, help="Tag to point at --version (e.g. production)")
+    parser.add_argument("--version", type=int, default=None)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    if args.tag and args.version is not None:
+        registry.set_tag(args.name, args.tag, args.version)
+    tagged = {}
+    for tag, version in registry.tags(args.name).items():
+        tagged.setdefault(version, []).append(tag)
+    for version in registry.versions(args.name):
+        metadata = registry.metadata(args.name, version)
+        f1 = metadata["metrics"].get("F1 Score @ Best")
+        print(f"v{version:<4} {metadata['created_at']}  {metadata['model_class']:<24} "
+              f"F1@best {f1 if f1 is None else round(f1, 4)!s:<8} {','.join(tagged.get(version, []))}")
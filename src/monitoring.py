@@ -0,0 +1,231 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from src.encoding import CategoricalCodec
+from src.utils import get_logger
+
+logger = get_logger("Monitoring")
+
+REFERENCE_PROFILE_FILENAME = "reference_profile.json"
+
+# Quantile bins per numeric feature in the reference profile
+PROFILE_BINS = 20
+
+# Conventional PSI cut-offs: below 0.1 stable, 0.1-0.25 moderate shift, above 0.25 major shift
+PSI_WARNING = 0.1
+PSI_DRIFT = 0.25
+
+# Floor for empty bins, so PSI stays finite
+_PSI_EPSILON = 1e-4
+
+class DataProfile:
+    """
+    Mergeable per-feature summary of a stream of rows.
+
+    Numeric features are counted into fixed bins whose edges come from
+    reference quantiles; categorical features are counted over the training
+    vocabulary, with one extra bucket for unseen values. Nulls are counted
+    separately. Updating is one vectorized pass per batch, memory is a few
+    counters per bin whatever the number of rows, and profiles of separate
+    batches, chunks or workers merge by adding their counts.
+    """
+
+    def __init__(self, edges, vocabularies):
+        self.edges = {col: np.asarray(values, dtype=np.float64) for col, values in edges.items()}
+        self.vocabularies = {col: np.asarray(values, dtype=object) for col, values in vocabularies.items()}
+        self.rows = 0
+        self.counts = {col: np.zeros(len(values) + 1, dtype=np.int64) for col, values in self.edges.items()}
+        # The last bucket of a categorical feature counts unseen values
+        self.counts.update({col: np.zeros(len(values) + 1, dtype=np.int64) for col, values in self.vocabularies.items()})
+        self.nulls = {col: 0 for col in self.columns}
+
+    @property
+    def columns(self):
+        return list(self.edges) + list(self.vocabularies)
+
+    @staticmethod
+    def from_frame(df, columns=None, bins=PROFILE_BINS):
+        """
+        Builds a reference profile: bin edges from the quantiles of each
+        numeric column, vocabularies from each categorical column, and the
+        counts of `df` itself.
+        """
+        columns = list(df.columns if columns is None else columns)
+        edges, vocabularies = {}, {}
+        for col in columns:
+            values = df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(values):
+                vocabularies[col] = CategoricalCodec().fit(df, [col]).vocabularies_[col]
+            else:
+                numbers = values.to_numpy(dtype=np.float64, na_value=np.nan)
+                numbers = numbers[~np.isnan(numbers)]
+                quantiles = np.quantile(numbers, np.linspace(0, 1, bins + 1)[1:-1]) if len(numbers) else []
+                edges[col] = np.unique(quantiles)
+        profile = DataProfile(edges, vocabularies)
+        return profile.update(df)
+
+    def empty_like(self):
+        return DataProfile(self.edges, self.vocabularies)
+
+    def update(self, df):
+        """
+        Adds the rows of a batch. Columns missing from `df` count as null.
+        """
+        n = len(df)
+        self.rows += n
+        for col, edges in self.edges.items():
+            if col not in df.columns:
+                self.nulls[col] += n
+                continue
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            missing = np.isnan(values)
+            self.nulls[col] += int(missing.sum())
+            # A value equal to an edge falls in the bin above it
+            bins = np.searchsorted(edges, values[~missing], side='right')
+            self.counts[col] += np.bincount(bins, minlength=len(edges) + 1)
+        for col, vocabulary in self.vocabularies.items():
+            if col not in df.columns:
+                self.nulls[col] += n
+                continue
+            values = df[col]
+            codes = CategoricalCodec._codes(values, vocabulary)
+            missing = values.isna().to_numpy()
+            self.nulls[col] += int(missing.sum())
+            # Unseen (non-null) values land in the last bucket
+            codes = np.where(codes >= 0, codes, len(vocabulary))[~missing]
+            self.counts[col] += np.bincount(codes, minlength=len(vocabulary) + 1)
+        return self
+
+    def merge(self, other):
+        """
+        Adds the counts of a profile built on the same reference.
+        """
+        if other.columns != self.columns:
+            raise ValueError("Profiles describe different columns and cannot be merged")
+        self.rows += other.rows
+        for col in self.columns:
+            self.counts[col] += other.counts[col]
+            self.nulls[col] += other.nulls[col]
+        return self
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "edges": {col: values.tolist() for col, values in self.edges.items()},
+            "vocabularies": {col: [str(value) for value in values] for col, values in self.vocabularies.items()},
+            "counts": {col: values.tolist() for col, values in self.counts.items()},
+            "nulls": self.nulls,
+        }
+
+    @staticmethod
+    def from_dict(payload):
+        profile = DataProfile(payload["edges"], payload["vocabularies"])
+        profile.rows = payload["rows"]
+        profile.counts = {col: np.asarray(values, dtype=np.int64) for col, values in payload["counts"].items()}
+        profile.nulls = dict(payload["nulls"])
+        return profile
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @staticmethod
+    def load(path):
+        with open(path) as f:
+            return DataProfile.from_dict(json.load(f))
+
+def reference_profile_path_for(model_path):
+    """
+    Returns the path of the training reference profile saved alongside a
+    model file (or compiled model directory).
+    """
+    return os.path.join(os.path.dirname(os.path.normpath(model_path)), REFERENCE_PROFILE_FILENAME)
+
+def load_reference_profile(model_path):
+    """
+    Returns the reference profile saved next to the model, or None.
+    """
+    path = reference_profile_path_for(model_path)
+    if not os.path.exists(path):
+        logger.warning(f"No reference profile at {path}; drift monitoring is off.")
+        return None
+    return DataProfile.load(path)
+
+def _psi(expected, actual):
+    expected = np.maximum(expected, _PSI_EPSILON)
+    actual = np.maximum(actual, _PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def _shares(counts):
+    total = counts.sum()
+    return counts / total if total else np.zeros(len(counts))
+
+def drift_report(reference, current):
+    """
+    Compares a scoring profile with the training reference, feature by
+    feature: PSI over the bins (or categories plus an unseen bucket), the
+    Kolmogorov-Smirnov distance between the binned CDFs of numeric features
+    (a lower bound on the exact KS statistic), null rates, and the share of
+    unseen categories. Computed from the counts alone.
+    """
+    rows = []
+    for col in reference.columns:
+        ref_shares = _shares(reference.counts[col])
+        cur_shares = _shares(current.counts[col])
+        numeric = col in reference.edges
+        observed = current.counts[col].sum()
+        row = {
+            "feature": col,
+            "kind": "numeric" if numeric else "categorical",
+            "rows": current.rows,
+            "reference_null_rate": reference.nulls[col] / reference.rows if reference.rows else 0.0,
+            "null_rate": current.nulls[col] / current.rows if current.rows else 0.0,
+            "unseen_rate": float(current.counts[col][-1] / observed) if not numeric and observed else 0.0,
+            "psi": _psi(ref_shares, cur_shares) if observed else float('nan'),
+            "ks": float(np.max(np.abs(np.cumsum(ref_shares) - np.cumsum(cur_shares)))) if numeric and observed else float('nan'),
+        }
+        row["status"] = ("drift" if row["psi"] > PSI_DRIFT else "warning" if row["psi"] > PSI_WARNING else "ok") if observed else "no data"
+        rows.append(row)
+    return pd.DataFrame(rows).sort_values("psi", ascending=False, na_position='last').reset_index(drop=True)
+
+def log_drift(report, top=5):
+    """
+    Logs drifting features, or a one-line all-clear.
+    """
+    flagged = report[report["status"].isin(["drift", "warning"])]
+    if flagged.empty:
+        logger.info(f"No feature drift over {int(report['rows'].max()) if len(report) else 0} scored rows.")
+        return
+    for row in flagged.head(top).itertuples():
+        logger.warning(f"{row.status.upper()}: {row.feature} PSI {row.psi:.3f}"
+                       + (f", KS {row.ks:.3f}" if row.kind == "numeric" else f", unseen {row.unseen_rate:.2%}")
+                       + f", nulls {row.null_rate:.2%} (training {row.reference_null_rate:.2%})")
+
+def write_drift_report(reference, current, output_path):
+    """
+    Saves the drift report (CSV) and the scoring profile next to it, so
+    profiles of later runs can be merged with this one.
+    """
+    report = drift_report(reference, current)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    report.to_csv(output_path, index=False)
+    current.save(os.path.splitext(output_path)[0] + "_profile.json")
+    log_drift(report)
+    logger.info(f"Drift report saved to {output_path}")
+    return report
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Drift report from saved scoring profiles.")
+    parser.add_argument("--reference", default=os.path.join("models", REFERENCE_PROFILE_FILENAME))
+    parser.add_argument("--profiles", nargs="+", required=True, help="Scoring profiles (*_profile.json) to merge")
+    parser.add_argument("--output", default="data/drift_report.csv")
+    args = parser.parse_args()
+
+    reference = DataProfile.load(args.reference)
+    current = reference.empty_like()
+    for path in args.profiles:
+        current.merge(DataProfile.load(path))
+    print(write_drift_report(reference, current, args.output).to_string(index=False))
@@ -0,0 +1,280 @@
+import copy
+import os
+import time
+import numpy as np
+import pandas as pd
+from src.clean_data import clean_data
+from src.data_loader import load_data
+from src.evaluate import evaluate_model
+from src.inference import load_artifacts, load_threshold
+from src.instrumentation import stage
+from src.model_registry import DEFAULT_NAME, DEFAULT_REGISTRY, DEFAULT_TAG, ModelRegistry, data_fingerprint
+from src.monitoring import load_reference_profile
+from src.utils import get_logger
+
+logger = get_logger("OnlineUpdate")
+
+# Boosting rounds added per update, at a smaller learning rate than the original fit so a
+# small delta refines the model rather than overfitting it
+DEFAULT_ROUNDS = 20
+DEFAULT_UPDATE_LEARNING_RATE = 0.01
+
+# Latest share of each delta (by arrival date) kept out of the update and added to the rolling holdout
+DEFAULT_HOLDOUT_FRACTION = 0.2
+
+# Most recent held-out outcomes kept across updates for validation
+DEFAULT_WINDOW_ROWS = 50000
+
+# A candidate is promoted only if none of these metrics drops by more than the tolerance on the rolling holdout.
+# Both models are scored at the served decision threshold, so "F1 Score @ Best" is the F1 users would see.
+PROMOTION_METRICS = ("ROC AUC", "F1 Score @ Best")
+DEFAULT_TOLERANCE = 0.002
+
+ROLLING_HOLDOUT_FILENAME = "rolling_holdout.parquet"
+UPDATE_LOG_FILENAME = "update_log.csv"
+
+ARRIVAL_COLUMNS = ["arrival_year", "arrival_month", "arrival_date"]
+
+def split_by_arrival(df, holdout_fraction=DEFAULT_HOLDOUT_FRACTION):
+    """
+    Splits resolved bookings into update rows and the latest
+    `holdout_fraction` by arrival date, so validation always looks forward.
+    """
+    order = np.lexsort([df[col].to_numpy() for col in reversed(ARRIVAL_COLUMNS)])
+    n_holdout = int(round(len(df) * holdout_fraction))
+    cut = len(df) - n_holdout
+    return df.iloc[order[:cut]], df.iloc[order[cut:]]
+
+def _balanced_weights(y):
+    # The production model was trained on balanced classes (SMOTE or class weights); keep the delta balanced too
+    y = np.asarray(y)
+    n_positive = int(y.sum())
+    if n_positive in (0, len(y)):
+        return np.ones(len(y))
+    return np.where(y == 1, len(y) / (2 * n_positive), len(y) / (2 * (len(y) - n_positive)))
+
+def _sgd_from_logistic(model, X):
+    """
+    An SGD logistic regression starting from a fitted LogisticRegression's
+    coefficients, so it can take partial_fit steps. The constant step size
+    is the inverse mean squared row norm of `X`, which keeps steps stable on
+    the unscaled features the model was trained on.
+    """
+    from sklearn.linear_model import SGDClassifier
+
+    values = X.to_numpy(dtype=np.float64)
+    step = 1.0 / max(float(np.mean(np.sum(values ** 2, axis=1))), 1e-12)
+    sgd = SGDClassifier(loss="log_loss", learning_rate="constant", eta0=step,
+                        alpha=1.0 / (model.C * max(len(X), 1)), random_state=42)
+    # Seed the state partial_fit would otherwise initialize from scratch
+    sgd.coef_ = model.coef_.copy()
+    sgd.intercept_ = model.intercept_.copy()
+    sgd.classes_ = model.classes_
+    sgd.n_features_in_ = model.n_features_in_
+    sgd.feature_names_in_ = getattr(model, "feature_names_in_", np.asarray(X.columns, dtype=object))
+    sgd.t_ = 1.0
+    return sgd
+
+def update_model(model, X, y, rounds=DEFAULT_ROUNDS, learning_rate=DEFAULT_UPDATE_LEARNING_RATE):
+    """
+    Returns an updated copy of `model` trained further on the new rows only
+    (the original is left untouched) and a short description of the method:
+
+    *   XGBoost / LightGBM: `rounds` more boosting rounds at `learning_rate`
+        on top of the saved booster (`learning_rate=None` keeps the model's own).
+    *   SGDClassifier: one partial_fit pass.
+    *   LogisticRegression: converted to an equivalent SGD logistic
+        regression, then one partial_fit pass.
+
+    Other models need a full retrain and raise TypeError.
+    """
+    name = type(model).__name__
+    weights = _balanced_weights(y)
+    if name == "XGBClassifier":
+        from xgboost import XGBClassifier
+        booster = model.get_booster()
+        best_iteration = booster.attr("best_iteration")
+        if best_iteration is not None:
+            booster = booster[:int(best_iteration) + 1]
+        updated = XGBClassifier(**model.get_params()).set_params(n_estimators=rounds, early_stopping_rounds=None)
+        if learning_rate is not None:
+            updated.set_params(learning_rate=learning_rate)
+        updated.fit(X, y, sample_weight=weights, xgb_model=booster)
+        return updated, f"continued boosting (+{rounds} rounds)"
+    if name == "LGBMClassifier":
+        import lightgbm as lgb
+        from lightgbm import LGBMClassifier
+        init_model = model.booster_
+        if getattr(model, "best_iteration_", None):
+            init_model = lgb.Booster(model_str=init_model.model_to_string(num_iteration=model.best_iteration_))
+        updated = LGBMClassifier(**model.get_params()).set_params(n_estimators=rounds)
+        if learning_rate is not None:
+            updated.set_params(learning_rate=learning_rate)
+        updated.fit(X, y, sample_weight=weights, init_model=init_model)
+        return updated, f"continued boosting (+{rounds} rounds)"
+    if name == "SGDClassifier":
+        updated = copy.deepcopy(model)
+    elif name == "LogisticRegression":
+        updated = _sgd_from_logistic(model, X)
+    else:
+        raise TypeError(f"{name} cannot be updated incrementally; retrain with main.py")
+    updated.partial_fit(X, y, sample_weight=weights)
+    return updated, "SGD partial_fit"
+
+def _load_window(path):
+    return pd.read_parquet(path) if os.path.exists(path) else None
+
+def _roll_window(window, holdout, window_rows):
+    """
+    Appends the new held-out rows and keeps the latest `window_rows` by arrival date.
+    """
+    combined = holdout if window is None else pd.concat([window, holdout], ignore_index=True)
+    if len(combined) <= window_rows:
+        return combined.reset_index(drop=True)
+    _, latest = split_by_arrival(combined, window_rows / len(combined))
+    return latest.reset_index(drop=True)
+
+def _save_window(window, path):
+    # Categories differ between deltas; store plain values
+    window = window.astype({col: "object" for col in window.columns if isinstance(window[col].dtype, pd.CategoricalDtype)})
+    tmp_path = f"{path}.tmp"
+    window.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def _compile(model, X):
+    from src.tree_compiler import check_agreement, compile_model
+    try:
+        compiled = compile_model(model, feature_names=list(X.columns))
+        check_agreement(model, compiled, X)
+        return compiled
+    except (TypeError, ValueError) as e:
+        logger.info(f"No compiled export for the updated model: {e}")
+        return None
+
+def refresh_model(data_path, registry_dir=DEFAULT_REGISTRY, name=DEFAULT_NAME, tag=DEFAULT_TAG, rounds=DEFAULT_ROUNDS,
+                  learning_rate=DEFAULT_UPDATE_LEARNING_RATE, holdout_fraction=DEFAULT_HOLDOUT_FRACTION,
+                  window_rows=DEFAULT_WINDOW_ROWS, tolerance=DEFAULT_TOLERANCE, dry_run=False):
+    """
+    Updates the `tag` version of a registered model with a file of newly
+    resolved bookings, without reloading history or retraining from scratch.
+
+    The latest `holdout_fraction` of the delta (by arrival date) joins a
+    rolling holdout of the `window_rows` most recent held-out outcomes; the
+    rest updates the model (see update_model) through the frozen training
+    preprocessor. The candidate is registered and tagged `tag` only if no
+    PROMOTION_METRICS value drops by more than `tolerance` against the
+    current model on the rolling holdout, with both models thresholded at
+    the decision threshold the candidate is registered and served with. Every decision is appended to
+    `<registry>/<name>/update_log.csv`; `dry_run` evaluates without writing anything.
+    Returns the decision record.
+    """
+    start = time.perf_counter()
+    registry = ModelRegistry(registry_dir)
+    metadata = registry.metadata(name, tag=tag)
+    version = metadata["version"]
+    model_path = registry.model_path(name, version)
+    with stage("load_artifacts"):
+        model, preprocessor = load_artifacts(model_path)
+        threshold = load_threshold(model_path)
+
+    with stage("load") as s:
+        delta = s.output(clean_data(load_data(data_path)))
+    if preprocessor.target not in delta.columns:
+        raise ValueError(f"Updates need resolved outcomes; '{preprocessor.target}' is missing from {data_path}")
+    update_rows, holdout_rows = split_by_arrival(delta, holdout_fraction)
+
+    name_dir = os.path.join(registry.root, name)
+    window_path = os.path.join(name_dir, ROLLING_HOLDOUT_FILENAME)
+    window = _roll_window(_load_window(window_path), holdout_rows, window_rows)
+
+    X = preprocessor.transform(update_rows)
+    y = X.pop(preprocessor.target)
+    X_holdout = preprocessor.transform(window)
+    y_holdout = X_holdout.pop(preprocessor.target)
+
+    with stage("update", rows_in=X):
+        update_start = time.perf_counter()
+        candidate, method = update_model(model, X, y, rounds, learning_rate)
+        update_seconds = time.perf_counter() - update_start
+    logger.info(f"{name} v{version}: {method} on {len(X)} rows in {update_seconds:.2f}s")
+
+    with stage("validate", rows_in=X_holdout):
+        if len(X_holdout) == 0 or y_holdout.nunique() < 2:
+            current, updated = {}, {}
+            checks = {"holdout": False}
+            logger.warning("The rolling holdout needs both outcomes to validate an update; not promoting.")
+        else:
+            current, _, _ = evaluate_model(f"{name} v{version}", model, X_holdout, y_holdout, threshold)
+            updated, _, _ = evaluate_model(f"{name} v{version} updated", candidate, X_holdout, y_holdout, threshold)
+            checks = {metric: updated[metric] >= current[metric] - tolerance for metric in PROMOTION_METRICS}
+    promote = all(checks.values())
+
+    record = {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "data": data_path,
+        "base_version": version,
+        "method": method,
+        "update_rows": len(X),
+        "holdout_rows": len(X_holdout),
+        "update_seconds": round(update_seconds, 3),
+        **{f"current {metric}": current.get(metric) for metric in PROMOTION_METRICS},
+        **{f"candidate {metric}": updated.get(metric) for metric in PROMOTION_METRICS},
+        "promoted": promote and not dry_run,
+        "new_version": None,
+    }
+    for metric in PROMOTION_METRICS:
+        if metric in current:
+            logger.info(f"{metric} on {len(X_holdout)} holdout rows: {current[metric]:.4f} -> {updated[metric]:.4f}")
+
+    if dry_run:
+        logger.info(f"Dry run: candidate would {'be promoted' if promote else 'be rejected'}; nothing written.")
+    else:
+        if promote:
+            with stage("register"):
+                record["new_version"] = registry.register(
+                    candidate, preprocessor, name=name, threshold=threshold, fingerprint=data_fingerprint(update_rows),
+                    metrics={key: value for key, value in updated.items() if key != "Model"},
+                    compiled=_compile(candidate, X_holdout), reference_profile=load_reference_profile(model_path),
+                    tags=(tag,), extra={"trained_as": metadata.get("trained_as"), "updated_from": version,
+                                        "update_method": method, "update_rows": len(X)})
+        else:
+            failed = [metric for metric, ok in checks.items() if not ok]
+            logger.warning(f"Update rejected ({', '.join(failed)} dropped); {name} stays at v{version}.")
+        # Held-out outcomes are real whatever the decision, so the window rolls forward either way
+        _save_window(window, window_path)
+        log_path = os.path.join(name_dir, UPDATE_LOG_FILENAME)
+        pd.DataFrame([record]).to_csv(log_path, mode="a", header=not os.path.exists(log_path), index=False)
+
+    record["total_seconds"] = round(time.perf_counter() - start, 3)
+    logger.info(f"Refresh finished in {record['total_seconds']}s"
+                + (f"; {name} v{record['new_version']} tagged '{tag}'." if record["new_version"] else "."))
+    return record
+
+if __name__ == "__main__":
+    import argparse
+    from src.instrumentation import add_tracing_args, configure_tracing, flush_tracing
+    parser = argparse.ArgumentParser(description="Update the production model with newly resolved bookings.")
+    parser.add_argument("--data", required=True, help="Resolved bookings (with booking_status) since the last update")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY)
+    parser.add_argument("--name", default=DEFAULT_NAME)
+    parser.add_argument("--tag", default=DEFAULT_TAG, help="Version to update, and the tag the update is promoted to")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Boosting rounds to add (XGBoost/LightGBM)")
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_UPDATE_LEARNING_RATE,
+                        help="Learning rate of the added rounds (XGBoost/LightGBM)")
+    parser.add_argument("--holdout-fraction", type=float, default=DEFAULT_HOLDOUT_FRACTION,
+                        help="Latest share of the delta added to the rolling holdout instead of the update")
+    parser.add_argument("--window-rows", type=int, default=DEFAULT_WINDOW_ROWS, help="Size of the rolling holdout")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Largest allowed drop in ROC AUC or F1 at the served threshold on the rolling holdout")
+    parser.add_argument("--dry-run", action="store_true", help="Validate the update without registering or saving anything")
+    add_tracing_args(parser)
+    args = parser.parse_args()
+    configure_tracing(args.trace_dir, args.profile_stage, args.tracemalloc)
+    try:
+        refresh_model(args.data, args.registry, args.name, args.tag, args.rounds, args.learning_rate, args.holdout_fraction,
+                      args.window_rows, args.tolerance, args.dry_run)
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Update failed: {e}")
+        raise SystemExit(1)
+    finally:
+        flush_tracing()
@@ -1,35 +1,179 @@
+import json
+import os
 import pandas as pd
 import numpy as np
 from src.utils import get_logger
 
 logger = get_logger("OutlierTreatment")
 
-def treat_outliers(df, columns=['lead_time', 'adr']):
+# `adr` is the price column in other hotel datasets; this one calls it avg_price_per_room
+OUTLIER_COLUMNS = ['lead_time', 'avg_price_per_room']
+
+class QuantileSketch:
     """
-    Detects and treats outliers using the IQR method (Capping).
+    Mergeable streaming quantile sketch (a simplified KLL sketch).
+
+    Values are kept in levels of sorted buffers, where an item on level h
+    stands for 2**h original values. When a level outgrows its capacity it
+    is sorted and every other item (from a random offset) is promoted to
+    the next level. Memory stays O(k) however many values are added, and
+    the rank error is on the order of 1/k. Sketches built on separate
+    chunks or workers can be merged into one.
+    """
+
+    def __init__(self, k=2048, seed=42):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        # Lower levels get geometrically smaller buffers, as in KLL
+        depth = len(self.levels) - 1 - level
+        return max(8, int(self.k * (2 / 3) ** depth))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                items = np.sort(items)
+                # An odd item out stays on this level
+                n_pairs = len(items) // 2
+                promoted = items[self._rng.integers(2):2 * n_pairs:2]
+                self.levels[level] = items[2 * n_pairs:]
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """
+        Adds a batch of values (NaNs are ignored).
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Folds another sketch into this one.
+        """
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """
+        Returns the approximate q-quantile(s); NaN if the sketch is empty.
+        """
+        values = np.concatenate(self.levels)
+        if not len(values):
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values)
+        cumulative = np.cumsum(weights[order])
+        ranks = np.asarray(q) * (cumulative[-1] - 1)
+        return values[order][np.minimum(np.searchsorted(cumulative, ranks, side='right'), len(values) - 1)]
+
+def _iqr_bounds(q1, q3):
+    iqr = q3 - q1
+    return (float(q1 - 1.5 * iqr), float(q3 + 1.5 * iqr))
+
+def compute_outlier_bounds(df, columns=OUTLIER_COLUMNS):
+    """
+    Learns IQR capping bounds for the given columns.
+    Quartiles of all columns are computed in one vectorized pass.
+    Returns a dict mapping column -> (lower_bound, upper_bound).
     """
-    logger.info("Starting outlier treatment...")
-    
     for col in columns:
-        if col in df.columns:
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            outliers_count = ((df[col] < lower_bound) | (df[col] > upper_bound)).sum()
-            logger.info(f"Column '{col}': Found {outliers_count} outliers.")
-            
-            # Capping
-            df[col] = np.where(df[col] < lower_bound, lower_bound, df[col])
-            df[col] = np.where(df[col] > upper_bound, upper_bound, df[col])
-            
-            logger.info(f"Column '{col}': Outliers capped at {lower_bound:.2f} and {upper_bound:.2f}.")
-        else:
+        if col not in df.columns:
             logger.warning(f"Column '{col}' not found for outlier treatment.")
-            
+    present = [col for col in columns if col in df.columns]
+    if not present:
+        return {}
+    values = df[present].to_numpy(dtype='float64', na_value=np.nan)
+    q1, q3 = np.nanquantile(values, [0.25, 0.75], axis=0)
+    return {col: _iqr_bounds(lo, hi) for col, lo, hi in zip(present, q1, q3)}
+
+def compute_outlier_bounds_in_chunks(chunks, columns=OUTLIER_COLUMNS, k=2048, sketches=None):
+    """
+    Learns IQR capping bounds from an iterable of frames without holding
+    them all in memory, using one QuantileSketch per column. Also returns
+    the sketches, so results from separate runs can be merged, or passed
+    back as `sketches` to extend them with new chunks.
+    """
+    sketches = sketches if sketches is not None else {col: QuantileSketch(k) for col in columns}
+    for chunk in chunks:
+        for col, sketch in sketches.items():
+            if col in chunk.columns:
+                sketch.update(chunk[col].to_numpy(dtype='float64', na_value=np.nan))
+    bounds = bounds_from_sketches(sketches)
+    for col in sketches:
+        if col not in bounds:
+            logger.warning(f"Column '{col}' not found for outlier treatment.")
+    return bounds, sketches
+
+def bounds_from_sketches(sketches):
+    """
+    IQR bounds from (possibly merged) per-column sketches.
+    """
+    return {col: _iqr_bounds(*sketch.quantile([0.25, 0.75]))
+            for col, sketch in sketches.items() if sketch.count}
+
+def cap_outliers(df, bounds):
+    """
+    Caps columns at previously learned bounds, one column at a time, so only
+    a column that has values outside its bounds gets a new (clipped) array.
+    """
+    for col, (lower, upper) in bounds.items():
+        if col not in df.columns:
+            continue
+        values = df[col].to_numpy()
+        # NaNs compare False, so they are left as they are
+        if (values < lower).any() or (values > upper).any():
+            df[col] = np.clip(values, lower, upper)
+    return df
+
+def save_outlier_bounds(bounds, path):
+    """
+    Persists fitted bounds as JSON, so scoring only needs to clip.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({col: list(bound) for col, bound in bounds.items()}, f, indent=2)
+    logger.info(f"Outlier bounds saved to {path}")
+
+def load_outlier_bounds(path):
+    with open(path) as f:
+        return {col: tuple(bound) for col, bound in json.load(f).items()}
+
+def treat_outliers(df, columns=OUTLIER_COLUMNS, bounds=None):
+    """
+    Detects and treats outliers using the IQR method (Capping).
+    With previously fitted `bounds`, nothing is learned and the columns are only clipped.
+    """
+    logger.info("Starting outlier treatment...")
+
+    if bounds is None:
+        bounds = compute_outlier_bounds(df, columns)
+    for col, (lower_bound, upper_bound) in bounds.items():
+        if col not in df.columns:
+            continue
+        outliers_count = ((df[col] < lower_bound) | (df[col] > upper_bound)).sum()
+        logger.info(f"Column '{col}': Found {outliers_count} outliers.")
+        logger.info(f"Column '{col}': Outliers capped at {lower_bound:.2f} and {upper_bound:.2f}.")
+
+    # Capping
+    df = cap_outliers(df, bounds)
+
     logger.info("Outlier treatment completed.")
     return df
 
@@ -40,10 +184,15 @@ if __name__ == "__main__":
     
     data_path = "data/Hotel Reservations.csv"
     try:
+        # Bounds over the whole file, read chunk by chunk
+        from src.data_loader import load_data_in_chunks
+        bounds, _ = compute_outlier_bounds_in_chunks(load_data_in_chunks(data_path, columns=OUTLIER_COLUMNS))
+        save_outlier_bounds(bounds, "models/outlier_bounds.json")
+
         df = load_data(data_path)
         df = clean_data(df)
         df = engineer_features(df)
-        df = treat_outliers(df)
+        df = treat_outliers(df, bounds=bounds)
         print(df.describe())
     except Exception as e:
         logger.error(f"Outlier treatment failed: {e}")
@@ -0,0 +1,115 @@
+import os
+import joblib
+from src.clean_data import compute_fill_values, fill_missing
+from src.feature_engineering import engineer_features
+from src.outlier_treatment import OUTLIER_COLUMNS, compute_outlier_bounds, cap_outliers
+from src.encoding import CategoricalCodec, encode_target
+from src.utils import get_logger
+
+logger = get_logger("Preprocessing")
+
+PREPROCESSOR_FILENAME = "preprocessor.joblib"
+
+class Preprocessor:
+    """
+    Fit/transform wrapper around the preprocessing stages.
+    Everything data-dependent (imputation values, capping bounds, categorical
+    vocabularies and the feature order) is learned once in `fit`, so `transform`
+    never recomputes statistics on the data it is scoring.
+    """
+
+    def __init__(self, outlier_columns=OUTLIER_COLUMNS, id_columns=['Booking_ID'], target='booking_status', encoding='ordinal'):
+        self.outlier_columns = list(outlier_columns)
+        self.encoding = encoding
+        self.id_columns = list(id_columns)
+        self.target = target
+
+    def _input_columns(self, df):
+        return [col for col in df.columns if col not in self.id_columns and col != self.target]
+
+    def fit(self, df, outlier_bounds=None):
+        """
+        Learns preprocessing state from the (cleaned) training data.
+        `outlier_bounds` reuses capping bounds learned elsewhere, e.g. with
+        compute_outlier_bounds_in_chunks over data larger than memory.
+        """
+        logger.info("Fitting preprocessor...")
+        work = df.drop(columns=[col for col in self.id_columns if col in df.columns])
+        self.input_columns_ = self._input_columns(work)
+
+        self.fill_values_ = compute_fill_values(work, columns=self._input_columns(work))
+        work = fill_missing(work, self.fill_values_)
+
+        work = engineer_features(work)
+
+        if outlier_bounds is None:
+            outlier_bounds = compute_outlier_bounds(work, self.outlier_columns)
+        self.outlier_bounds_ = dict(outlier_bounds)
+        work = cap_outliers(work, self.outlier_bounds_)
+
+        cat_cols = work[self._input_columns(work)].select_dtypes(include=['object', 'category']).columns
+        y = encode_target(work[[self.target]].copy(), self.target)[self.target] if self.target in work.columns else None
+        self.codec_ = CategoricalCodec(mode=self.encoding).fit(work, cat_cols, y=y)
+        work = self.codec_.transform(work)
+
+        self.feature_names_ = self._input_columns(work)
+        logger.info(f"Preprocessor fitted with {len(self.feature_names_)} features.")
+        return self
+
+    def transform(self, df):
+        """
+        Applies the learned preprocessing. Returns the features in training
+        order, followed by the encoded target if it is present.
+        """
+        if not hasattr(self, 'feature_names_'):
+            raise ValueError("Preprocessor is not fitted. Call fit() first.")
+
+        missing = [col for col in getattr(self, 'input_columns_', []) if col not in df.columns]
+        if missing:
+            raise ValueError(f"Input is missing required columns: {missing}")
+
+        work = df.drop(columns=[col for col in self.id_columns if col in df.columns])
+        work = fill_missing(work, self.fill_values_)
+        work = engineer_features(work)
+        work = cap_outliers(work, self.outlier_bounds_)
+        work = self.codec_.transform(work)
+
+        missing = [col for col in self.feature_names_ if col not in work.columns]
+        if missing:
+            raise ValueError(f"Input is missing required features: {missing}")
+
+        columns = list(self.feature_names_)
+        if self.target in work.columns:
+            work = encode_target(work, self.target)
+            columns.append(self.target)
+        return work[columns]
+
+    def required_columns(self):
+        """
+        Raw input columns needed by transform (plus identifiers), used to
+        project reads onto just what the model needs.
+        """
+        if not hasattr(self, 'input_columns_'):
+            return None
+        return self.id_columns + self.input_columns_
+
+    def fit_transform(self, df, outlier_bounds=None):
+        return self.fit(df, outlier_bounds).transform(df)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        joblib.dump(self, path)
+        logger.info(f"Preprocessor saved to {path}")
+
+    @staticmethod
+    def load(path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Preprocessor not found at {path}")
+        return joblib.load(path)
+
+def preprocessor_path_for(model_path):
+    """
+    Returns the path of the preprocessor saved alongside a model file
+    (or compiled model directory).
+    """
+    return os.path.join(os.path.dirname(os.path.normpath(model_path)), PREPROCESSOR_FILENAME)
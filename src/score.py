@@ -0,0 +1,68 @@
+"""
+Slim scoring entry point for cold-started workers.
+
+    python -m src.score --data new_bookings.csv --output data/predictions.csv
+
+Scores with the registered production model (or the newest best model in
+models/), using its compiled export when one exists, so a cold start loads
+pandas, numpy and the preprocessor only. Plotting (matplotlib, seaborn) and
+training (imblearn, xgboost, lightgbm) libraries are never imported, and
+sklearn only when the model is a pickled estimator with no compiled export.
+For streaming, worker pools, drift reports and tracing use `src.inference`.
+"""
+import argparse
+import sys
+from src.inference import (find_best_model, find_registered_model, load_threshold, make_predictions,
+                           resolve_model_path, stream_predictions)
+from src.utils import get_logger
+
+logger = get_logger("Score")
+
+# Libraries a scoring process must not need; the startup benchmark reports any of them that load
+PLOTTING_MODULES = ("matplotlib", "seaborn")
+TRAINING_MODULES = ("imblearn", "xgboost", "lightgbm")
+HEAVY_MODULES = PLOTTING_MODULES + TRAINING_MODULES + ("sklearn", "scipy")
+
+def heavy_modules_loaded(modules=HEAVY_MODULES):
+    """
+    Returns the heavy top-level packages already imported in this process.
+    """
+    return [name for name in modules if name in sys.modules]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score reservations with the production model.")
+    parser.add_argument("--data", required=True)
+    parser.add_argument("--output", default="data/predictions.csv")
+    parser.add_argument("--model", default=None, help="Model path (defaults to the registered model, then the best model in models/)")
+    parser.add_argument("--registry", default="models/registry", help="Model registry directory")
+    parser.add_argument("--name", default="cancellation", help="Registered model name")
+    parser.add_argument("--tag", default="production", help="Registered tag to score with")
+    parser.add_argument("--chunksize", type=int, default=None, help="Stream the input in chunks of this many rows")
+    parser.add_argument("--no-compiled", action="store_true", help="Score with the pickled model even if a compiled export exists")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Probability above which a booking is labelled Canceled (defaults to the one chosen in training)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        model_path = (args.model
+                      or find_registered_model(args.data, args.registry, args.name, tag=args.tag)
+                      or find_best_model("models"))
+    except ValueError as e:
+        logger.error(f"Incompatible input: {e}")
+        return 1
+    if not model_path:
+        logger.error("No trained model found in the registry or models/. Run main.py first.")
+        return 1
+
+    model_path = resolve_model_path(model_path, compiled=not args.no_compiled)
+    threshold = args.threshold if args.threshold is not None else load_threshold(model_path)
+    if args.chunksize:
+        stream_predictions(args.data, model_path, args.output, args.chunksize, threshold=threshold)
+    else:
+        make_predictions(args.data, model_path, output_path=args.output, threshold=threshold)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
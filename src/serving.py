@@ -0,0 +1,416 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+from src.inference import DEFAULT_THRESHOLD, find_best_model, load_artifacts, load_threshold, resolve_model_path, score_frame
+from src.monitoring import drift_report, load_reference_profile
+from src.model_registry import DEFAULT_CACHE_MB, DEFAULT_NAME, DEFAULT_TAG, ModelCache, ModelRegistry
+from src.utils import get_logger
+
+logger = get_logger("Serving")
+
+class ServingMetrics:
+    """
+    Latency and throughput counters for the scoring server.
+    Keeps a bounded window of recent request latencies for percentiles.
+    """
+
+    def __init__(self, window=10000):
+        self.started_at = time.perf_counter()
+        self.requests_total = 0
+        self.rows_total = 0
+        self.batches_total = 0
+        self.errors_total = 0
+        self.latencies_ms = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+
+    def record_batch(self, n_requests, n_rows):
+        self.batches_total += 1
+        self.rows_total += n_rows
+        self.batch_sizes.append(n_requests)
+
+    def record_request(self, latency_ms, ok=True):
+        self.requests_total += 1
+        if not ok:
+            self.errors_total += 1
+        self.latencies_ms.append(latency_ms)
+
+    def snapshot(self):
+        uptime = time.perf_counter() - self.started_at
+        latencies = np.fromiter(self.latencies_ms, dtype=float)
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        else:
+            p50 = p95 = p99 = 0.0
+        return {
+            "uptime_seconds": round(uptime, 3),
+            "requests_total": self.requests_total,
+            "rows_total": self.rows_total,
+            "batches_total": self.batches_total,
+            "errors_total": self.errors_total,
+            "requests_per_second": round(self.requests_total / uptime, 2) if uptime else 0.0,
+            "rows_per_second": round(self.rows_total / uptime, 2) if uptime else 0.0,
+            "avg_batch_size": round(float(np.mean(self.batch_sizes)), 2) if self.batch_sizes else 0.0,
+            "latency_ms_p50": round(float(p50), 3),
+            "latency_ms_p95": round(float(p95), 3),
+            "latency_ms_p99": round(float(p99), 3),
+        }
+
+class MicroBatcher:
+    """
+    Groups concurrent scoring requests so the model runs once per batch.
+    A batch is flushed when it reaches `max_batch_size` requests or when the
+    oldest request has waited `max_wait_ms`. With a `loader`, the model,
+    preprocessor and threshold are fetched from it for every batch instead
+    (e.g. from a ModelCache, which may have evicted them in between).
+    A DataProfile `profile` is updated with every scored batch.
+    """
+
+    def __init__(self, model, preprocessor, metrics, max_batch_size=64, max_wait_ms=2.0, threshold=DEFAULT_THRESHOLD,
+                 loader=None, profile=None):
+        self.model = model
+        self.preprocessor = preprocessor
+        self.threshold = threshold
+        self.loader = loader
+        self.profile = profile
+        self.metrics = metrics
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = None
+        self._worker = None
+
+    def start(self):
+        """
+        Starts the batching task. Must be called from the running event loop,
+        which the queue is bound to on older Pythons.
+        """
+        self.queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, records):
+        """
+        Queues a list of reservation records and waits for their results.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((records, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Drain anything already queued without waiting further
+        while len(batch) < self.max_batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    def _score(self, records):
+        model, preprocessor, threshold = self.loader() if self.loader else (self.model, self.preprocessor, self.threshold)
+        results = score_frame(pd.DataFrame.from_records(records), model, preprocessor, threshold, self.profile)
+        return results.to_dict(orient="records")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            records = [record for request_records, _ in batch for record in request_records]
+            try:
+                # Model work runs off the event loop so new requests keep queueing
+                scored = await loop.run_in_executor(None, self._score, records)
+            except Exception:
+                # One malformed request must not fail the whole batch
+                await self._score_individually(loop, batch)
+                continue
+
+            self.metrics.record_batch(len(batch), len(records))
+            offset = 0
+            for request_records, future in batch:
+                if not future.done():
+                    future.set_result(scored[offset:offset + len(request_records)])
+                offset += len(request_records)
+
+    async def _score_individually(self, loop, batch):
+        for request_records, future in batch:
+            try:
+                scored = await loop.run_in_executor(None, self._score, request_records)
+                self.metrics.record_batch(1, len(request_records))
+                if not future.done():
+                    future.set_result(scored)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+
+def _parse_head(head):
+    """
+    Parses an HTTP request head into (method, path, headers), raising
+    ValueError on a malformed request line or Content-Length.
+    """
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ")
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise ValueError(f"Malformed request line: {lines[0]!r}")
+    method, path, _ = parts
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+    length = headers.get("content-length", "0")
+    if not (length.isascii() and length.isdigit()):
+        raise ValueError(f"Invalid Content-Length: {length!r}")
+    headers["content-length"] = int(length)
+    return method, path, headers
+
+class ScoringServer:
+    """
+    Minimal asyncio HTTP/1.1 server exposing the micro-batched model.
+
+    Endpoints:
+        POST /predict         - a reservation object or a list of them
+        POST /predict/<name>  - the same, scored by registered model <name>
+        GET  /metrics         - latency and throughput counters
+        GET  /drift[/<name>]  - drift of the traffic so far against the training data
+        GET  /health          - liveness check
+
+    With a ModelCache, models come from the registry (by `tag`) and are
+    loaded on their first request; /predict uses `default_name`. Each model
+    uses its registered threshold unless `threshold` is given. With `drift`,
+    traffic to each model is profiled against that model's reference profile
+    (`reference` in single-model mode).
+    """
+
+    def __init__(self, model, preprocessor, host="127.0.0.1", port=8080, max_batch_size=64, max_wait_ms=2.0,
+                 threshold=DEFAULT_THRESHOLD, cache=None, default_name=DEFAULT_NAME, tag=DEFAULT_TAG,
+                 drift=False, reference=None):
+        self.host = host
+        self.port = port
+        self.metrics = ServingMetrics()
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.cache = cache
+        self.default_name = default_name
+        self.tag = tag
+        self.threshold = threshold
+        self.drift = drift
+        self.references = {}
+        self.batchers = {}
+        if cache is None:
+            profile = None
+            if drift and reference is not None:
+                self.references[default_name] = reference
+                profile = reference.empty_like()
+            self.batchers[default_name] = MicroBatcher(model, preprocessor, self.metrics, max_batch_size, max_wait_ms,
+                                                       threshold, profile=profile)
+        self._server = None
+
+    def _batcher(self, name):
+        """
+        Batcher for registered model `name`, created (and started) on first use.
+        """
+        if name not in self.batchers:
+            if self.cache is None or name not in self.cache.registry.names():
+                raise KeyError(f"Unknown model '{name}'")
+            def loader():
+                model, preprocessor, threshold = self.cache.get(name, tag=self.tag)
+                return model, preprocessor, threshold if self.threshold is None else self.threshold
+            profile = None
+            if self.drift:
+                reference = load_reference_profile(self.cache.registry.model_path(name, tag=self.tag))
+                if reference is not None:
+                    self.references[name] = reference
+                    profile = reference.empty_like()
+            self.batchers[name] = MicroBatcher(None, None, self.metrics, self.max_batch_size, self.max_wait_ms,
+                                               loader=loader, profile=profile)
+            self.batchers[name].start()
+        return self.batchers[name]
+
+    async def start(self):
+        for batcher in self.batchers.values():
+            batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Port 0 binds an ephemeral port; report the one actually chosen
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Scoring server listening on http://{self.host}:{self.port}")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        for batcher in self.batchers.values():
+            await batcher.stop()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionResetError):
+                    break
+
+                try:
+                    method, path, headers = _parse_head(head)
+                except ValueError as e:
+                    # The rest of the stream cannot be framed, so answer and hang up
+                    status, payload, keep_alive = "400 Bad Request", {"error": str(e)}, False
+                else:
+                    body = b""
+                    length = headers["content-length"]
+                    if length:
+                        try:
+                            body = await reader.readexactly(length)
+                        except (asyncio.IncompleteReadError, ConnectionResetError):
+                            break
+                    status, payload = await self._route(method, path, body)
+                    keep_alive = headers.get("connection", "").lower() != "close"
+
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return "200 OK", {"status": "ok"}
+        if method == "GET" and path == "/metrics":
+            snapshot = self.metrics.snapshot()
+            if self.cache is not None:
+                snapshot.update(self.cache.stats())
+            return "200 OK", snapshot
+        if method == "GET" and (path == "/drift" or path.startswith("/drift/")):
+            return self._drift(path[len("/drift/"):] if path.startswith("/drift/") else self.default_name)
+        if method == "POST" and path == "/predict":
+            return await self._predict(body, self.default_name)
+        if method == "POST" and path.startswith("/predict/"):
+            return await self._predict(body, path[len("/predict/"):])
+        return "404 Not Found", {"error": f"No route for {method} {path}"}
+
+    def _drift(self, name):
+        batcher = self.batchers.get(name)
+        if batcher is None or batcher.profile is None:
+            return "404 Not Found", {"error": f"No drift monitoring for model '{name}' (start with --drift)"}
+        report = drift_report(self.references[name], batcher.profile)
+        return "200 OK", {"model": name, "rows": batcher.profile.rows,
+                          "features": json.loads(report.to_json(orient="records"))}
+
+    async def _predict(self, body, name):
+        start = time.perf_counter()
+        try:
+            batcher = self._batcher(name)
+        except KeyError as e:
+            return "404 Not Found", {"error": str(e.args[0])}
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            return "400 Bad Request", {"error": f"Invalid JSON: {e}"}
+
+        records = payload if isinstance(payload, list) else [payload]
+        if not records or not all(isinstance(record, dict) for record in records):
+            return "400 Bad Request", {"error": "Expected a reservation object or a non-empty list of them"}
+
+        try:
+            predictions = await batcher.submit(records)
+        except Exception as e:
+            self.metrics.record_request((time.perf_counter() - start) * 1000, ok=False)
+            return "422 Unprocessable Entity", {"error": str(e)}
+
+        self.metrics.record_request((time.perf_counter() - start) * 1000)
+        return "200 OK", {"predictions": predictions}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve cancellation predictions over HTTP.")
+    parser.add_argument("--model", default=None, help="Serve this model file instead of the registry")
+    parser.add_argument("--registry", default="models/registry", help="Model registry to serve from")
+    parser.add_argument("--name", default=DEFAULT_NAME, help="Registered model served at /predict")
+    parser.add_argument("--tag", default=DEFAULT_TAG, help="Registered tag served for every model name")
+    parser.add_argument("--drift", action="store_true",
+                        help="Profile scoring traffic against the training data; report at GET /drift")
+    parser.add_argument("--cache-mb", type=float, default=DEFAULT_CACHE_MB,
+                        help="Memory budget for registered models kept loaded")
+    parser.add_argument("--preprocessor", default=None, help="Preprocessor path (defaults to the one next to the model)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--compiled", action="store_true", help="Serve the compiled tree model if one was exported")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Probability above which a booking is labelled Canceled (defaults to the one chosen in training)")
+    return parser.parse_args(argv)
+
+def _registry_server(args):
+    """
+    Builds a server backed by the registry, or returns None if the registry
+    has no `args.name` model under `args.tag`. Every tagged model is checked
+    at startup from its metadata; models are loaded on first request.
+    """
+    registry = ModelRegistry(args.registry)
+    try:
+        registry.resolve(args.name, tag=args.tag)
+    except KeyError:
+        return None
+    for name in registry.names():
+        if args.tag in registry.tags(name):
+            metadata = registry.validate(name, tag=args.tag)
+            logger.info(f"Serving {name} v{metadata['version']} ({metadata['model_class']}, "
+                        f"{len(metadata['feature_names'])} features)")
+    cache = ModelCache(registry, args.cache_mb, compiled=args.compiled)
+    # Load the default model now so the first request does not pay for it
+    cache.get(args.name, tag=args.tag)
+    return ScoringServer(None, None, args.host, args.port, args.max_batch_size, args.max_wait_ms,
+                         threshold=args.threshold, cache=cache, default_name=args.name, tag=args.tag, drift=args.drift)
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = None if args.model or args.preprocessor else _registry_server(args)
+    if server is None:
+        model_path = args.model or find_best_model("models")
+        if model_path is None:
+            logger.error("No trained model found in models/ directory. Run main.py first.")
+            return
+        model, preprocessor = load_artifacts(resolve_model_path(model_path, args.compiled), args.preprocessor)
+        threshold = args.threshold if args.threshold is not None else load_threshold(model_path)
+        reference = load_reference_profile(model_path) if args.drift else None
+        server = ScoringServer(model, preprocessor, args.host, args.port, args.max_batch_size, args.max_wait_ms, threshold,
+                               drift=args.drift, reference=reference)
+
+    # Per-batch stage logging would dominate request latency
+    for name in ("FeatureEngineering", "Preprocessing"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        logger.info("Scoring server stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import os
+import tempfile
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from src.evaluate import threshold_sweep
+from src.utils import get_logger, MemoryMonitor
+
+logger = get_logger("Sharding")
+
+# Shards with fewer training rows than this are scored by the global model
+MIN_SHARD_ROWS = 500
+
+SHARD_REPORT = "shard_report.csv"
+
+class ShardedModel:
+    """
+    One model per value of a shard column, plus a global fallback model for
+    shards that had no model of their own (too small, or not better than the
+    global model) and for values never seen in training.
+
+    The shard column must be one of the model's features, so the routed
+    model is a drop-in replacement wherever predict_proba is called on the
+    preprocessed frame. Rows are grouped by the model that scores them, and
+    each model runs once per batch on its rows.
+    """
+
+    def __init__(self, shard_column, models, fallback, feature_names, labels=None):
+        self.shard_column = shard_column
+        self.models = dict(models)
+        self.fallback = fallback
+        self.feature_names_in_ = list(feature_names)
+        self.labels = dict(labels or {})
+        self.classes_ = np.array([0, 1])
+
+    @property
+    def n_shards(self):
+        return len(self.models)
+
+    def _routes(self, X):
+        """
+        Model slot for every row: 0..n_shards-1 for shard models, n_shards for the fallback.
+        """
+        keys = pd.Index(list(self.models), dtype='float64')
+        slots = keys.get_indexer(X[self.shard_column].to_numpy(dtype='float64', na_value=np.nan))
+        return np.where(slots >= 0, slots, len(keys))
+
+    def predict_proba(self, X):
+        if not isinstance(X, pd.DataFrame):
+            X = pd.DataFrame(X, columns=self.feature_names_in_)
+        slots = self._routes(X)
+        models = list(self.models.values()) + [self.fallback]
+
+        positive = np.empty(len(X), dtype=np.float64)
+        order = np.argsort(slots, kind='stable')
+        groups = np.split(order, np.flatnonzero(np.diff(slots[order])) + 1) if len(order) else []
+        for rows in groups:
+            positive[rows] = models[slots[rows[0]]].predict_proba(X.iloc[rows])[:, 1]
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype('int64')
+
+def _shard_labels(preprocessor, column, keys):
+    """
+    Original category names of ordinal-encoded shard keys, for reporting.
+    """
+    codec = getattr(preprocessor, 'codec_', None)
+    vocabulary = getattr(codec, 'vocabularies_', {}).get(column) if codec is not None and codec.mode == 'ordinal' else None
+    if vocabulary is None:
+        return {key: str(key) for key in keys}
+    return {key: str(vocabulary[int(key)]) if 0 <= key < len(vocabulary) else str(key) for key in keys}
+
+def _auc(y, probs):
+    if len(y) == 0 or np.all(y == y[0]):
+        return float('nan')
+    return threshold_sweep(y, probs)[1]
+
+def _fit_shard(key, estimator, X_path, y_path, rows, columns):
+    """
+    Fits one shard model in a worker process on its rows of the
+    memory-mapped training matrix. Returns the model and its resource use.
+    """
+    from src.train import apply_class_weights
+
+    X = joblib.load(X_path, mmap_mode='r')
+    y = joblib.load(y_path, mmap_mode='r')
+    X_shard = pd.DataFrame(X[rows], columns=columns, copy=False)
+    y_shard = np.asarray(y[rows])
+
+    apply_class_weights({key: estimator}, y_shard)
+    start = time.perf_counter()
+    with MemoryMonitor() as memory:
+        estimator.fit(X_shard, y_shard)
+    stats = {"seconds": round(time.perf_counter() - start, 3), "peak_rss_delta_mb": round(memory.delta_mb, 1)}
+    return key, estimator, stats
+
+def train_sharded(df, X_val, y_val, base_model, shard_column, min_rows=MIN_SHARD_ROWS, n_jobs=None,
+                  preprocessor=None, report_dir="models", exclude=None):
+    """
+    Trains one copy of `base_model` (same hyperparameters, class-weighted)
+    per value of `shard_column` on the training rows of the preprocessed
+    frame `df`, i.e. the rows neither in the validation set `X_val` nor in
+    the `exclude` index (the test rows, kept for reporting only).
+
+    Shard fits run on a process pool, largest shards first, each worker
+    reading its rows from one memory-mapped training matrix. A shard keeps
+    its own model only if it has at least `min_rows` rows of both classes
+    and beats the global `base_model` on its validation rows (ROC AUC);
+    otherwise, or if either AUC is undefined there, it routes to the global model. Rows, fit time, peak memory and the
+    decision for every shard are written to `<report_dir>/shard_report.csv`.
+    Returns a ShardedModel.
+    """
+    # Training dependencies load only here; scoring a ShardedModel does not need them
+    from sklearn.base import clone
+    from src.train import _set_threads
+
+    columns = list(X_val.columns)
+    if shard_column not in columns:
+        raise ValueError(f"Shard column '{shard_column}' must be a model feature; got one of {columns}")
+
+    held_out = X_val.index if exclude is None else X_val.index.append(pd.Index(exclude))
+    train = df.drop(index=held_out)
+    X = np.ascontiguousarray(train[columns].to_numpy(dtype=np.float32))
+    y = train['booking_status'].to_numpy(dtype=np.int8)
+    keys = train[shard_column].to_numpy(dtype='float64')
+    del train
+
+    # Row indices of each shard from one sort, instead of a mask per shard
+    order = np.argsort(keys, kind='stable')
+    starts = np.r_[0, np.flatnonzero(np.diff(keys[order])) + 1]
+    shards = {float(keys[order[start]]): rows for start, rows in zip(starts, np.split(order, starts[1:]))}
+    labels = _shard_labels(preprocessor, shard_column, shards)
+
+    report = {key: {"shard": labels[key], "train_rows": len(rows), "positives": int(y[rows].sum())}
+              for key, rows in shards.items()}
+    eligible = []
+    for key, rows in shards.items():
+        if len(rows) < min_rows:
+            report[key]["model"] = "global (too few rows)"
+        elif report[key]["positives"] in (0, len(rows)):
+            report[key]["model"] = "global (single class)"
+        else:
+            eligible.append(key)
+    # Largest shards first so the long fits start immediately
+    eligible.sort(key=lambda key: len(shards[key]), reverse=True)
+
+    total_cores = n_jobs or os.cpu_count() or 1
+    logger.info(f"Training {len(eligible)} of {len(shards)} '{shard_column}' shard(s) on {total_cores} core(s); "
+                f"the rest use the global model.")
+    fitted = {}
+    if eligible:
+        # Parallelism comes from running shards side by side
+        template = _set_threads(clone(base_model), 1)
+        with tempfile.TemporaryDirectory() as shared_dir:
+            X_path = os.path.join(shared_dir, "X_train.joblib")
+            y_path = os.path.join(shared_dir, "y_train.joblib")
+            joblib.dump(X, X_path)
+            joblib.dump(y, y_path)
+            results = Parallel(n_jobs=min(len(eligible), total_cores), backend='loky')(
+                delayed(_fit_shard)(key, clone(template), X_path, y_path, shards[key], columns) for key in eligible
+            )
+        for key, model, stats in results:
+            fitted[key] = model
+            report[key].update(stats)
+    del X
+
+    # Keep a shard model only where it beats the global model on that shard's validation rows
+    val_keys = X_val[shard_column].to_numpy(dtype='float64')
+    y_val = np.asarray(y_val)
+    global_probs = base_model.predict_proba(X_val)[:, 1]
+    models = {}
+    for key, model in fitted.items():
+        mask = val_keys == key
+        global_auc = _auc(y_val[mask], global_probs[mask])
+        shard_auc = _auc(y_val[mask], model.predict_proba(X_val[mask])[:, 1]) if mask.any() else float('nan')
+        report[key].update({"validation_rows": int(mask.sum()), "global_auc": global_auc, "shard_auc": shard_auc})
+        if np.isnan(shard_auc) or np.isnan(global_auc):
+            report[key]["model"] = "global (no validation AUC)"
+        elif shard_auc < global_auc:
+            report[key]["model"] = "global (not better)"
+        else:
+            report[key]["model"] = "shard"
+            models[key] = model
+
+    report_df = pd.DataFrame(list(report.values()))
+    report_df = report_df[[col for col in ("shard", "train_rows", "positives", "validation_rows", "seconds", "peak_rss_delta_mb",
+                                           "global_auc", "shard_auc", "model") if col in report_df.columns]]
+    os.makedirs(report_dir, exist_ok=True)
+    report_df.to_csv(os.path.join(report_dir, SHARD_REPORT), index=False)
+    fit_seconds = report_df["seconds"].sum() if "seconds" in report_df else 0.0
+    logger.info(f"{len(models)} of {len(shards)} shard(s) kept their own model "
+                f"({fit_seconds:.1f}s of fitting). Report saved to {report_dir}/{SHARD_REPORT}")
+    return ShardedModel(shard_column, models, base_model, columns, {key: labels[key] for key in models})
@@ -0,0 +1,121 @@
+import os
+import numpy as np
+import pandas as pd
+from src.utils import get_logger
+
+logger = get_logger("SyntheticData")
+
+# Marginal distributions approximated from the Hotel Reservations dataset
+_DISCRETE = {
+    'no_of_adults': ([0, 1, 2, 3, 4], [0.004, 0.212, 0.719, 0.064, 0.001]),
+    'no_of_children': ([0, 1, 2, 3], [0.926, 0.045, 0.0285, 0.0005]),
+    'no_of_weekend_nights': ([0, 1, 2, 3, 4, 5, 6], [0.465, 0.276, 0.25, 0.004, 0.0036, 0.0009, 0.0005]),
+    'type_of_meal_plan': (['Meal Plan 1', 'Not Selected', 'Meal Plan 2', 'Meal Plan 3'], [0.767, 0.1415, 0.091, 0.0005]),
+    'room_type_reserved': (['Room_Type 1', 'Room_Type 4', 'Room_Type 6', 'Room_Type 2', 'Room_Type 5', 'Room_Type 7', 'Room_Type 3'],
+                           [0.7755, 0.167, 0.0266, 0.0191, 0.0073, 0.0043, 0.0002]),
+    'arrival_year': ([2017, 2018], [0.18, 0.82]),
+    'market_segment_type': (['Online', 'Offline', 'Corporate', 'Complementary', 'Aviation'], [0.64, 0.29, 0.0556, 0.0108, 0.0036]),
+    'no_of_special_requests': ([0, 1, 2, 3, 4, 5], [0.545, 0.3137, 0.1204, 0.0186, 0.0021, 0.0002]),
+    'arrival_month': (list(range(1, 13)), [0.028, 0.047, 0.065, 0.075, 0.072, 0.088, 0.080, 0.105, 0.127, 0.147, 0.082, 0.083]),
+}
+
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+# Mean nightly price per room type; peak months are pricier
+_ROOM_PRICE = {'Room_Type 1': 95.9, 'Room_Type 2': 87.8, 'Room_Type 3': 73.7, 'Room_Type 4': 125.3,
+               'Room_Type 5': 123.7, 'Room_Type 6': 182.2, 'Room_Type 7': 155.2}
+_MONTH_PRICE_FACTOR = np.array([0.73, 0.78, 0.86, 0.95, 1.08, 1.10, 1.12, 1.22, 1.09, 0.96, 0.85, 0.88])
+
+def _choice(rng, name, n):
+    values, probs = _DISCRETE[name]
+    probs = np.asarray(probs) / np.sum(probs)
+    return np.asarray(values)[rng.choice(len(values), size=n, p=probs)]
+
+def generate_reservations(n_rows, seed=42, start_id=1):
+    """
+    Generates synthetic reservations matching the Hotel Reservations schema
+    and its marginal distributions (valid, seasonal arrival dates; prices by
+    room type and season). Cancellations depend on lead time, price, special
+    requests and segment, so models trained on the data have signal to learn.
+    """
+    rng = np.random.default_rng(seed)
+    room_type = _choice(rng, 'room_type_reserved', n_rows)
+    segment = _choice(rng, 'market_segment_type', n_rows)
+
+    # The source data spans July 2017 to December 2018
+    year = _choice(rng, 'arrival_year', n_rows)
+    month = _choice(rng, 'arrival_month', n_rows)
+    year = np.where((year == 2017) & (month < 7), 2018, year)
+    day = 1 + (rng.random(n_rows) * _DAYS_IN_MONTH[month - 1]).astype('int64')
+
+    repeated = rng.random(n_rows) < 0.026
+    price = pd.Series(room_type).map(_ROOM_PRICE).to_numpy() * _MONTH_PRICE_FACTOR[month - 1] + rng.normal(0, 25.0, n_rows)
+    price = np.where(segment == 'Complementary', 0.0, np.round(np.clip(price, 0, 540), 2))
+
+    # Lead times are a mix of last-minute and far-ahead bookings
+    lead_time = np.where(rng.random(n_rows) < 0.3, rng.exponential(10.0, n_rows), rng.exponential(120.0, n_rows))
+
+    df = pd.DataFrame({
+        'Booking_ID': 'INN' + pd.Series(np.arange(start_id, start_id + n_rows)).astype(str).str.zfill(5),
+        'no_of_adults': _choice(rng, 'no_of_adults', n_rows),
+        'no_of_children': _choice(rng, 'no_of_children', n_rows),
+        'no_of_weekend_nights': _choice(rng, 'no_of_weekend_nights', n_rows),
+        'no_of_week_nights': np.minimum(rng.poisson(2.2, n_rows), 17),
+        'type_of_meal_plan': _choice(rng, 'type_of_meal_plan', n_rows),
+        'required_car_parking_space': (rng.random(n_rows) < 0.031).astype('int64'),
+        'room_type_reserved': room_type,
+        'lead_time': np.minimum(lead_time.astype('int64'), 443),
+        'arrival_year': year,
+        'arrival_month': month,
+        'arrival_date': day,
+        'market_segment_type': segment,
+        'repeated_guest': repeated.astype('int64'),
+        'no_of_previous_cancellations': np.where(repeated & (rng.random(n_rows) < 0.3), rng.integers(1, 14, n_rows), 0),
+        'no_of_previous_bookings_not_canceled': np.where(repeated, rng.integers(1, 59, n_rows), 0),
+        'avg_price_per_room': price,
+        'no_of_special_requests': _choice(rng, 'no_of_special_requests', n_rows),
+    })
+
+    logit = (-1.6 + 0.012 * df['lead_time'] + 0.008 * (df['avg_price_per_room'] - 100)
+             - 0.9 * df['no_of_special_requests'] + 0.6 * (df['market_segment_type'] == 'Online')
+             - 1.5 * df['repeated_guest'])
+    canceled = rng.random(n_rows) < 1 / (1 + np.exp(-logit.to_numpy()))
+    df['booking_status'] = np.where(canceled, 'Canceled', 'Not_Canceled')
+    return df
+
+def write_reservations(output_path, n_rows, seed=42, chunk_rows=1000000):
+    """
+    Writes `n_rows` synthetic reservations to CSV or Parquet (by extension),
+    generating them in chunks so memory stays bounded.
+    """
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    is_parquet = output_path.endswith(('.parquet', '.pq'))
+    writer = None
+    written = 0
+    try:
+        for i, start in enumerate(range(0, n_rows, chunk_rows)):
+            chunk = generate_reservations(min(chunk_rows, n_rows - start), seed=seed + i, start_id=start + 1)
+            if is_parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(output_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    logger.info(f"Wrote {written} synthetic reservations to {output_path}")
+    return output_path
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate synthetic hotel reservations.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--output", default="data/synthetic_reservations.csv")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    write_reservations(args.output, args.rows, args.seed)
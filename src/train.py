@@ -1,69 +1,252 @@
+import os
+import tempfile
+import time
+import joblib
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from xgboost import XGBClassifier
-from imblearn.over_sampling import SMOTE
-from src.utils import get_logger
+from joblib import Parallel, delayed
+from src.utils import get_logger, MemoryMonitor
 
 logger = get_logger("ModelTraining")
 
-def train_models(df):
+# Relative share of the core budget each model gets. Logistic Regression is
+# single-threaded, so it always gets exactly one core.
+CORE_WEIGHTS = {
+    "Random Forest": 1,
+    "XGBoost": 1,
+    "Random Forest Tuned": 2,
+    "XGBoost Tuned": 2,
+    "LightGBM Tuned": 2,
+}
+
+def build_models(tuning_budget=300):
+    """
+    Returns the models to train, keyed by display name.
+    Tuned models are successive-halving searches with `tuning_budget` seconds each.
+    """
+    # Model libraries are imported here, so importing this module stays cheap
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.ensemble import RandomForestClassifier
+    from xgboost import XGBClassifier
+    from lightgbm import LGBMClassifier
+    from src.tuning import build_search
+
+    # Hyperparameter Tuning (Task 8): candidates are trained single-threaded,
+    # the search runs them side by side within its core budget
+    return {
+        "Logistic Regression": LogisticRegression(max_iter=1000, random_state=42),
+        "Random Forest": RandomForestClassifier(random_state=42),
+        "XGBoost": XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42),
+        "Random Forest Tuned": build_search("Random Forest", RandomForestClassifier(random_state=42, n_jobs=1), tuning_budget),
+        "XGBoost Tuned": build_search("XGBoost", XGBClassifier(n_estimators=1000, eval_metric='logloss', random_state=42, n_jobs=1), tuning_budget),
+        "LightGBM Tuned": build_search("LightGBM", LGBMClassifier(n_estimators=1000, subsample_freq=1, random_state=42, n_jobs=1, verbose=-1), tuning_budget),
+    }
+
+def allocate_cores(names, total_cores):
+    """
+    Splits `total_cores` between models so concurrent fits do not oversubscribe the machine.
+    """
+    budget = {name: 1 for name in names if name not in CORE_WEIGHTS}
+    weighted = [name for name in names if name in CORE_WEIGHTS]
+    remaining = max(total_cores - len(budget), len(weighted))
+    total_weight = sum(CORE_WEIGHTS[name] for name in weighted)
+    for name in weighted:
+        budget[name] = max(1, remaining * CORE_WEIGHTS[name] // total_weight)
+    return budget
+
+IMBALANCE_MODES = ("smote", "weights")
+
+def apply_class_weights(models, y):
+    """
+    Reweights the minority class instead of resampling: `scale_pos_weight`
+    for XGBoost, `class_weight='balanced'` for everything that supports it.
+    Searches are reweighted through the estimator they tune.
+    """
+    from src.tuning import SuccessiveHalvingSearch
+    n_positive = int(np.sum(y))
+    scale_pos_weight = (len(y) - n_positive) / max(n_positive, 1)
+    for model in models.values():
+        estimator = model.estimator if isinstance(model, SuccessiveHalvingSearch) else model
+        if type(estimator).__name__ == "XGBClassifier":
+            estimator.set_params(scale_pos_weight=scale_pos_weight)
+        elif 'class_weight' in estimator.get_params():
+            estimator.set_params(class_weight='balanced')
+    return models
+
+# Estimators that run on one core whatever n_jobs says (lbfgs LogisticRegression also warns when it is set)
+SINGLE_THREADED = ("LogisticRegression",)
+
+def _set_threads(estimator, n_threads):
+    # For searches this parallelises over candidates; the wrapped estimator stays single-threaded
+    if type(estimator).__name__ not in SINGLE_THREADED and 'n_jobs' in estimator.get_params(deep=False):
+        estimator.set_params(n_jobs=n_threads)
+    return estimator
+
+def _cache_key(name, estimator, data_fingerprint):
+    # Thread counts do not change the fitted model, so they are left out of the key
+    params = {k: v for k, v in estimator.get_params().items() if not k.endswith('n_jobs')}
+    return joblib.hash((name, type(estimator).__name__, repr(sorted(params.items(), key=lambda kv: kv[0])), data_fingerprint))
+
+def _cache_path(cache_dir, name, key):
+    return os.path.join(cache_dir, f"{name.replace(' ', '_')}_{key}.joblib")
+
+def _prune_cache(cache_path):
+    """
+    Deletes the other cached artifacts of the model `cache_path` belongs to,
+    fitted on older data or hyperparameters, so the cache holds one per model.
+    """
+    cache_dir, filename = os.path.split(cache_path)
+    prefix = filename.rsplit('_', 1)[0] + '_'
+    for other in os.listdir(cache_dir):
+        # Keys have no underscore, so "Random_Forest_" never matches "Random_Forest_Tuned_<key>"
+        key = other[len(prefix):-len('.joblib')]
+        if other != filename and other.startswith(prefix) and other.endswith('.joblib') and '_' not in key:
+            os.remove(os.path.join(cache_dir, other))
+
+def _fit_model(name, estimator, X_path, y_path, columns, cache_path):
+    """
+    Fits one model in a worker process. The training matrix is memory-mapped
+    from disk rather than pickled to every worker.
+    Returns the fitted model with its fit time and peak RSS increase.
+    """
+    X = pd.DataFrame(joblib.load(X_path, mmap_mode='r'), columns=columns, copy=False)
+    y = joblib.load(y_path, mmap_mode='r')
+
+    start = time.perf_counter()
+    with MemoryMonitor() as memory:
+        estimator.fit(X, y)
+    stats = {"model": name, "seconds": round(time.perf_counter() - start, 2), "peak_rss_delta_mb": round(memory.delta_mb, 1)}
+    if cache_path:
+        joblib.dump(estimator, cache_path)
+    return name, estimator, stats
+
+def train_models(df, n_jobs=None, cache_dir="models/cache", tuning_budget=300, imbalance="smote", report_dir="models",
+                 validation_size=0.2):
     """
     Splits data, handles imbalance, trains models, and performs tuning.
-    Returns a dictionary of trained models and the test sets.
+    The design matrix is converted once to a contiguous float32 array, and
+    splits are taken by row index rather than by copying frames. With
+    `imbalance="weights"`, the minority class is reweighted instead of
+    SMOTE materializing synthetic rows. With SMOTE, searches get the
+    original rows and resample inside their own split, so their
+    validation folds hold no synthetic rows.
+    Independent model fits run concurrently on a process pool, each with an
+    explicit share of `n_jobs` cores (defaults to all cores). Models whose data
+    fingerprint and hyperparameters match an artifact in `cache_dir` are
+    loaded instead of retrained; pass `cache_dir=None` to disable caching.
+    The tuning trace and per-model fit time and memory are written to `report_dir`.
+    A `validation_size` share of the training rows is held out before
+    resampling, for choosing decision thresholds without touching the test set.
+    Returns (trained models, X_val, y_val, X_test, y_test).
     """
+    from sklearn.model_selection import train_test_split
+    from src.cross_validation import resample
+    from src.tuning import SuccessiveHalvingSearch, write_trace
+
     logger.info("Starting model training pipeline...")
-    
+    if imbalance not in IMBALANCE_MODES:
+        raise ValueError(f"Unknown imbalance handling '{imbalance}'. Expected one of {IMBALANCE_MODES}")
+
     # 1. Split Data
     if 'booking_status' not in df.columns:
         raise ValueError("Target column 'booking_status' not found!")
-        
-    X = df.drop('booking_status', axis=1)
-    y = df['booking_status']
-    
+
+    columns = [col for col in df.columns if col != 'booking_status']
+    X = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float32))
+    y = df['booking_status'].to_numpy(dtype=np.int8)
+
     # Stratified split to maintain class ratio in test set
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-    logger.info(f"Data split. Train shape: {X_train.shape}, Test shape: {X_test.shape}")
+    train_idx, test_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42, stratify=y)
+    # Validation rows for threshold selection, carved from the training rows before any resampling
+    train_idx, val_idx = train_test_split(train_idx, test_size=validation_size, random_state=42, stratify=y[train_idx])
+    X_train, y_train = X[train_idx], y[train_idx]
+    X_val = pd.DataFrame(X[val_idx], columns=columns, index=df.index[val_idx])
+    y_val = pd.Series(y[val_idx], index=X_val.index, name='booking_status')
+    X_test = pd.DataFrame(X[test_idx], columns=columns, index=df.index[test_idx])
+    y_test = pd.Series(y[test_idx], index=X_test.index, name='booking_status')
+    del X
+    logger.info(f"Data split. Train shape: {X_train.shape}, Validation shape: {X_val.shape}, Test shape: {X_test.shape} "
+                f"({X_train.nbytes / 2**20:.1f} MB float32 train matrix)")
 
-    # 2. Handle Class Imbalance (SMOTE) - ONLY on Training Data
-    logger.info("Applying SMOTE to training data...")
-    smote = SMOTE(random_state=42)
-    X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
-    logger.info(f"SMOTE applied. New Train shape: {X_train_resampled.shape}")
+    # 2. Handle Class Imbalance - ONLY on Training Data
+    if imbalance == "smote":
+        logger.info("Applying SMOTE to training data...")
+        X_matrix, y_vector = resample(X_train, y_train, "smote")
+        logger.info(f"SMOTE applied. New Train shape: {X_matrix.shape}")
+    else:
+        X_matrix, y_vector = X_train, y_train
+        logger.info(f"Reweighting classes instead of resampling ({int(y_vector.sum())} positive of {len(y_vector)} rows).")
 
     # 3. Model Initialization
-    models = {
-        "Logistic Regression": LogisticRegression(max_iter=1000, random_state=42),
-        "Random Forest": RandomForestClassifier(random_state=42),
-        "XGBoost": XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42)
-    }
-    
-    trained_models = {}
+    models = build_models(tuning_budget)
+    if imbalance == "weights":
+        apply_class_weights(models, y_vector)
+    else:
+        for model in models.values():
+            if isinstance(model, SuccessiveHalvingSearch):
+                model.set_params(resample=imbalance)
+    total_cores = n_jobs or os.cpu_count() or 1
+    budget = allocate_cores(list(models), total_cores)
+
+    data_fingerprint = joblib.hash((X_matrix, y_vector, columns))
 
-    # 4. Train Models
+    trained_models = {}
+    fit_stats = []
+    pending = []
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
     for name, model in models.items():
-        logger.info(f"Training {name}...")
-        model.fit(X_train_resampled, y_train_resampled)
-        trained_models[name] = model
-        logger.info(f"{name} trained.")
-
-    # 5. Hyperparameter Tuning (Task 8)
-    # We'll tune Random Forest as requested
-    logger.info("Starting Hyperparameter Tuning for Random Forest...")
-    param_grid = {
-        'n_estimators': [50, 100],
-        'max_depth': [10, 20, None],
-        'min_samples_split': [2, 5]
-    }
-    
-    rf_grid = GridSearchCV(RandomForestClassifier(random_state=42), param_grid, cv=3, scoring='f1', n_jobs=-1)
-    rf_grid.fit(X_train_resampled, y_train_resampled)
-    
-    logger.info(f"Best RF Params: {rf_grid.best_params_}")
-    trained_models["Random Forest Tuned"] = rf_grid.best_estimator_
-    
-    return trained_models, X_test, y_test
+        cache_path = _cache_path(cache_dir, name, _cache_key(name, model, data_fingerprint)) if cache_dir else None
+        if cache_path and os.path.exists(cache_path):
+            trained_models[name] = joblib.load(cache_path)
+            logger.info(f"{name}: data and hyperparameters unchanged, loaded from {cache_path}")
+        else:
+            pending.append((name, _set_threads(model, budget[name]), cache_path))
+
+    # 4. Train Models (and 5. Hyperparameter Tuning) concurrently
+    if pending:
+        logger.info(f"Training {len(pending)} model(s) with core budget {({name: budget[name] for name, _, _ in pending})}...")
+        with tempfile.TemporaryDirectory() as shared_dir:
+            X_path = os.path.join(shared_dir, "X_train.joblib")
+            y_path = os.path.join(shared_dir, "y_train.joblib")
+            joblib.dump(X_matrix, X_path)
+            joblib.dump(y_vector, y_path)
+            # Searches that resample inside their own split get the original rows
+            original = (os.path.join(shared_dir, "X_original.joblib"), os.path.join(shared_dir, "y_original.joblib"))
+            if any(getattr(model, "resample", None) for _, model, _ in pending):
+                joblib.dump(X_train, original[0])
+                joblib.dump(y_train, original[1])
+
+            # Largest budgets first so the long fits start immediately
+            pending.sort(key=lambda task: budget[task[0]], reverse=True)
+            results = Parallel(n_jobs=min(len(pending), total_cores), backend='loky')(
+                delayed(_fit_model)(name, model, *(original if getattr(model, "resample", None) else (X_path, y_path)),
+                                    columns, cache_path)
+                for name, model, cache_path in pending
+            )
+        for (name, model, stats), (_, _, cache_path) in zip(results, pending):
+            trained_models[name] = model
+            fit_stats.append(stats)
+            if cache_path:
+                _prune_cache(cache_path)
+            logger.info(f"{name} trained in {stats['seconds']}s, peak memory +{stats['peak_rss_delta_mb']} MB.")
+        del results
+    del X_train, y_train
+
+    # Keep the models in their declared order for evaluation and reporting
+    trained_models = {name: trained_models[name] for name in models}
+
+    # 5. Hyperparameter Tuning results
+    searches = {name: model for name, model in trained_models.items() if isinstance(model, SuccessiveHalvingSearch)}
+    write_trace(searches, os.path.join(report_dir, "tuning_trace.csv"))
+    if fit_stats:
+        os.makedirs(report_dir, exist_ok=True)
+        pd.DataFrame(fit_stats).to_csv(os.path.join(report_dir, "training_memory.csv"), index=False)
+    for name, search in searches.items():
+        logger.info(f"Best {name} Params: {search.best_params_}")
+        trained_models[name] = search.best_estimator_
+
+    return trained_models, X_val, y_val, X_test, y_test
 
 if __name__ == "__main__":
     # Test run logic would go here
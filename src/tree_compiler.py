@@ -0,0 +1,281 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from src.utils import get_logger
+
+logger = get_logger("TreeCompiler")
+
+COMPILED_META = "meta.json"
+_ARRAYS = ("feature", "threshold", "left", "default_left", "value", "roots")
+
+# Rows scored per block, so the (rows x trees) node matrix stays cache-sized
+BLOCK_CELLS = 1 << 20
+
+# Descent steps between dropping (row, tree) cells that already reached a leaf
+COMPACT_EVERY = 4
+
+def _round_down_float32(values):
+    """
+    Largest float32 not above each value. For float32 inputs x,
+    `x <= t` holds exactly when `x <= _round_down_float32(t)`.
+    """
+    rounded = np.asarray(values, dtype=np.float64).astype(np.float32)
+    too_big = rounded.astype(np.float64) > values
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+def _sklearn_trees(model):
+    """
+    Yields (feature, threshold, left, right, default_left, value) per fitted
+    tree, with leaves marked by left == -1 and `value` the class-1 probability.
+    """
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        proba = tree.value[:, 0, :] / tree.value[:, 0, :].sum(axis=1, keepdims=True)
+        missing_left = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8))
+        yield (tree.feature, _round_down_float32(tree.threshold), tree.children_left, tree.children_right,
+               np.asarray(missing_left, dtype=bool), proba[:, 1])
+
+def _xgboost_trees(model):
+    """
+    Yields the trees of a binary:logistic booster in the same layout, with
+    `value` the leaf margin. XGBoost splits on `x < t`, stored here as `x <= t'`.
+    """
+    booster = model.get_booster()
+    gbtree = json.loads(booster.save_raw("json"))["learner"]["gradient_booster"]["model"]
+    trees = gbtree["trees"]
+    best_iteration = booster.attr("best_iteration")
+    if best_iteration is not None:
+        trees = trees[:gbtree["iteration_indptr"][int(best_iteration) + 1]]
+    for tree in trees:
+        condition = np.asarray(tree["split_conditions"], dtype=np.float32)
+        yield (np.asarray(tree["split_indices"]), np.nextafter(condition, np.float32(-np.inf)),
+               np.asarray(tree["left_children"]), np.asarray(tree["right_children"]),
+               np.asarray(tree["default_left"], dtype=bool), condition)
+
+def _flatten_tree(feature, threshold, left, right, default_left, value):
+    """
+    Renumbers one tree breadth-first so every node's right child directly
+    follows its left child. Leaves point to themselves with an infinite
+    threshold, so extra descent steps leave them in place.
+    Returns the arrays in the new order plus the tree depth.
+    """
+    is_leaf = left == -1
+    new_id = np.empty(len(left), dtype=np.int64)
+    new_id[0] = 0
+    frontier, position, depth = np.array([0]), 1, 0
+    while True:
+        internal = frontier[~is_leaf[frontier]]
+        if not len(internal):
+            break
+        children = np.empty(2 * len(internal), dtype=np.int64)
+        children[0::2] = left[internal]
+        children[1::2] = right[internal]
+        new_id[children] = position + np.arange(len(children))
+        position += len(children)
+        frontier = children
+        depth += 1
+
+    order = np.argsort(new_id)
+    leaf = is_leaf[order]
+    return {
+        "feature": np.where(leaf, 0, feature[order]),
+        "threshold": np.where(leaf, np.float32(np.inf), threshold[order]).astype(np.float32),
+        "left": np.where(leaf, np.arange(len(order)), new_id[np.where(leaf, 0, left[order])]),
+        "default_left": leaf | default_left[order],
+        "value": np.where(leaf, value[order], 0.0).astype(np.float32),
+    }, depth
+
+def _xgboost_base_margin(model):
+    learner = json.loads(model.get_booster().save_raw("json"))["learner"]
+    objective = learner["objective"]["name"]
+    if objective != "binary:logistic":
+        raise TypeError(f"Only binary:logistic boosters can be compiled, got {objective}")
+    base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+    return float(np.log(base_score / (1 - base_score)))
+
+class CompiledForest:
+    """
+    Array-backed tree ensemble for fast, low-memory scoring.
+
+    All trees are flattened into shared node arrays (int16 feature, float32
+    threshold, int32 left child with the right child next to it, float32
+    leaf values). Leaves point to themselves, so a batch descends every
+    tree at once in vectorized steps, dropping finished paths as it goes. Thresholds are rounded down to float32, which
+    keeps decisions identical to the original model on float32 inputs.
+
+    `kind` is "average" (random forest: mean leaf probability) or "logistic"
+    (boosting: sigmoid of summed leaf margins plus `base_margin`).
+    """
+
+    def __init__(self, arrays, kind, feature_names, max_depth, base_margin=0.0, source=None):
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+        self.kind = kind
+        self.feature_names_in_ = list(feature_names)
+        self.max_depth = int(max_depth)
+        self.base_margin = float(base_margin)
+        self.source = source
+        self.classes_ = np.array([0, 1])
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in _ARRAYS)
+
+    def _as_matrix(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_names_in_]
+            return X.to_numpy(dtype=np.float32, na_value=np.nan)
+        return np.asarray(X, dtype=np.float32)
+
+    def _leaf_values(self, X):
+        """
+        Returns the (rows x trees) matrix of leaf values reached by each row.
+        """
+        X_flat = X.ravel()
+        check_missing = bool(np.isnan(X_flat).any())
+        # One cell per (row, tree); offsets let one gather read x[row, feature]
+        node = np.broadcast_to(np.asarray(self.roots, dtype=np.intp), (len(X), self.n_trees)).ravel()
+        offsets = np.repeat(np.arange(len(X)) * X.shape[1], self.n_trees)
+        cells = np.arange(node.size)
+        leaves = np.empty(node.size, dtype=np.intp)
+        for step in range(1, self.max_depth + 1):
+            x = X_flat.take(offsets + self.feature.take(node))
+            go_left = x <= self.threshold.take(node)
+            if check_missing:
+                go_left |= np.isnan(x) & self.default_left.take(node)
+            # Right children sit next to left ones: step by 0 (left) or 1 (right)
+            node = self.left.take(node) + ~go_left
+            if step % COMPACT_EVERY == 0 and step < self.max_depth:
+                # Drop cells that reached a leaf, so deep trees only pay for deep paths
+                done = self.left.take(node) == node
+                leaves[cells[done]] = node[done]
+                active = ~done
+                node, offsets, cells = node[active], offsets[active], cells[active]
+        leaves[cells] = node
+        return self.value.take(leaves).reshape(len(X), self.n_trees)
+
+    def predict_proba(self, X):
+        X = self._as_matrix(X)
+        positive = np.empty(len(X), dtype=np.float64)
+        block = max(1, BLOCK_CELLS // max(1, self.n_trees))
+        for start in range(0, len(X), block):
+            leaves = self._leaf_values(X[start:start + block])
+            if self.kind == "average":
+                positive[start:start + block] = leaves.mean(axis=1, dtype=np.float64)
+            else:
+                margin = leaves.sum(axis=1, dtype=np.float64) + self.base_margin
+                positive[start:start + block] = 1 / (1 + np.exp(-margin))
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype('int64')
+
+    def save(self, path):
+        """
+        Writes one .npy file per node array plus meta.json into directory `path`.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        meta = {
+            "kind": self.kind,
+            "feature_names": self.feature_names_in_,
+            "max_depth": self.max_depth,
+            "base_margin": self.base_margin,
+            "source": self.source,
+            "n_trees": self.n_trees,
+            "n_nodes": int(len(self.feature)),
+        }
+        with open(os.path.join(path, COMPILED_META), "w") as f:
+            json.dump(meta, f, indent=2)
+        logger.info(f"Compiled model saved to {path} ({self.nbytes / 2**20:.1f} MB, {self.n_trees} trees)")
+
+    @staticmethod
+    def load(path, mmap=True):
+        """
+        Loads a compiled model. With `mmap`, node arrays are memory-mapped,
+        so startup is near-instant and worker processes share the pages.
+        """
+        with open(os.path.join(path, COMPILED_META)) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None)
+                  for name in _ARRAYS}
+        return CompiledForest(arrays, meta["kind"], meta["feature_names"], meta["max_depth"],
+                              meta["base_margin"], meta["source"])
+
+def compiled_path_for(model_path):
+    """
+    Returns the directory the compiled form of a saved model is written to.
+    """
+    return os.path.splitext(os.path.normpath(model_path))[0] + "_compiled"
+
+def is_compiled_model(path):
+    """
+    True if `path` is a directory written by CompiledForest.save.
+    """
+    return os.path.isfile(os.path.join(path, COMPILED_META))
+
+def compile_model(model, feature_names=None):
+    """
+    Converts a fitted RandomForestClassifier / ExtraTreesClassifier or a
+    binary XGBClassifier into a CompiledForest.
+    """
+    name = type(model).__name__
+    if name in ("RandomForestClassifier", "ExtraTreesClassifier"):
+        kind, base_margin, trees = "average", 0.0, list(_sklearn_trees(model))
+    elif name == "XGBClassifier":
+        kind, base_margin, trees = "logistic", _xgboost_base_margin(model), list(_xgboost_trees(model))
+    else:
+        raise TypeError(f"Cannot compile {name}; only random forests and XGBoost are supported")
+    if feature_names is None:
+        feature_names = getattr(model, "feature_names_in_", None)
+        if feature_names is None:
+            raise ValueError("feature_names is required for models fitted without column names")
+
+    # Offset each tree's child pointers into the shared node arrays
+    flat, depths = zip(*(_flatten_tree(*tree) for tree in trees))
+    sizes = np.array([len(tree["feature"]) for tree in flat])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    arrays = {
+        "feature": np.concatenate([t["feature"] for t in flat]).astype(np.int16),
+        "threshold": np.concatenate([t["threshold"] for t in flat]),
+        "left": np.concatenate([t["left"] + o for t, o in zip(flat, offsets)]).astype(np.int32),
+        "default_left": np.concatenate([t["default_left"] for t in flat]),
+        "value": np.concatenate([t["value"] for t in flat]),
+        "roots": offsets.astype(np.int32),
+    }
+    compiled = CompiledForest(arrays, kind, feature_names, max(depths), base_margin, source=name)
+    logger.info(f"Compiled {name}: {compiled.n_trees} trees, {len(arrays['feature'])} nodes, depth {compiled.max_depth}")
+    return compiled
+
+def check_agreement(model, compiled, X, tolerance=1e-4):
+    """
+    Compares compiled probabilities with the original model on `X`.
+    Raises ValueError if they differ by more than `tolerance`; returns the
+    largest absolute difference and the share of matching 0.5-threshold labels.
+    """
+    expected = model.predict_proba(X)[:, 1]
+    actual = compiled.predict_proba(X)[:, 1]
+    max_diff = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+    label_match = float(np.mean((expected > 0.5) == (actual > 0.5))) if len(X) else 1.0
+    logger.info(f"Compiled vs original on {len(X)} rows: max |diff| {max_diff:.2e}, label agreement {label_match:.4%}")
+    if max_diff > tolerance:
+        raise ValueError(f"Compiled model disagrees with the original (max |diff| {max_diff:.2e} > {tolerance})")
+    return max_diff, label_match
+
+if __name__ == "__main__":
+    import argparse
+    import joblib
+    parser = argparse.ArgumentParser(description="Compile a saved tree model into the array format.")
+    parser.add_argument("--model", required=True, help="Path to a saved RF/XGBoost .joblib model")
+    parser.add_argument("--output", default=None, help="Output directory (defaults to <model>_compiled)")
+    args = parser.parse_args()
+    model = joblib.load(args.model)
+    compiled = compile_model(model)
+    compiled.save(args.output or compiled_path_for(args.model))
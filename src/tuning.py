@@ -0,0 +1,235 @@
+import math
+import os
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, clone
+from sklearn.metrics import f1_score
+from sklearn.model_selection import ParameterSampler, train_test_split
+from src.utils import get_logger
+
+logger = get_logger("Tuning")
+
+# Search spaces per model family. Boosters get a generous n_estimators cap
+# and rely on early stopping against the validation fold instead.
+SEARCH_SPACES = {
+    "Random Forest": {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [10, 20, None],
+        'min_samples_split': [2, 5, 10],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 0.5],
+    },
+    "XGBoost": {
+        'learning_rate': [0.03, 0.1, 0.3],
+        'max_depth': [3, 5, 7, 9],
+        'min_child_weight': [1, 3, 5],
+        'subsample': [0.7, 0.85, 1.0],
+        'colsample_bytree': [0.7, 1.0],
+    },
+    "LightGBM": {
+        'learning_rate': [0.03, 0.1, 0.3],
+        'num_leaves': [15, 31, 63, 127],
+        'min_child_samples': [10, 20, 50],
+        'subsample': [0.7, 0.85, 1.0],
+        'colsample_bytree': [0.7, 1.0],
+    },
+}
+
+def _is_booster(estimator):
+    return type(estimator).__name__ in ("XGBClassifier", "LGBMClassifier")
+
+def _fit_with_early_stopping(estimator, X, y, X_val, y_val, early_stopping_rounds):
+    """
+    Fits a candidate. Boosters stop adding trees once the validation loss
+    has not improved for `early_stopping_rounds` rounds.
+    """
+    name = type(estimator).__name__
+    if early_stopping_rounds and name == "XGBClassifier":
+        estimator.set_params(early_stopping_rounds=early_stopping_rounds)
+        estimator.fit(X, y, eval_set=[(X_val, y_val)], verbose=False)
+        return estimator, estimator.best_iteration + 1
+    if early_stopping_rounds and name == "LGBMClassifier":
+        import lightgbm as lgb
+        estimator.fit(X, y, eval_set=[(X_val, y_val)], callbacks=[lgb.early_stopping(early_stopping_rounds, verbose=False)])
+        return estimator, (estimator.best_iteration_ or estimator.n_estimators)
+    estimator.fit(X, y)
+    return estimator, None
+
+class SuccessiveHalvingSearch(BaseEstimator):
+    """
+    Successive-halving hyperparameter search.
+
+    Samples `n_candidates` configurations and evaluates them on a small
+    resource budget (training rows, or estimators). Only the best 1/`eta`
+    advance to the next round, where the budget grows by a factor of `eta`.
+    Boosters also early-stop on the validation fold. The search stops
+    starting new trials once `time_budget` seconds have elapsed: the
+    deadline is checked before every trial, and a round cut short by it
+    is the last one, its completed trials ranked as usual. The
+    winning configuration is refitted on all rows. `best_score_` is the
+    winner's validation F1 in its last trial, at `best_resource_`, which
+    can be less than the resource of the refit. With `resample="smote"`,
+    the search is given the original rows and oversamples only the
+    training part of its split (and the rows of the final refit), so the
+    validation fold holds no synthetic rows.
+
+    After fitting, `trace_` holds one record per trial (round, params,
+    resource, seconds, score) for profiling where search time goes.
+    Trials skipped for the time budget are not in it.
+    """
+
+    def __init__(self, estimator, param_distributions, n_candidates=27, eta=3, resource='n_samples',
+                 min_resource=None, max_resource=None, time_budget=None, early_stopping_rounds=None,
+                 validation_fraction=0.2, random_state=42, n_jobs=1, resample=None):
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.resource = resource
+        self.min_resource = min_resource
+        self.max_resource = max_resource
+        self.time_budget = time_budget
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_fraction = validation_fraction
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.resample = resample
+
+    def _resource_schedule(self, n_train):
+        n_rounds = int(math.log(self.n_candidates, self.eta)) + 1
+        if self.resource == 'n_samples':
+            max_resource = min(self.max_resource or n_train, n_train)
+            floor = self.min_resource or 50
+        else:
+            max_resource = self.max_resource or self.estimator.get_params()[self.resource]
+            floor = self.min_resource or 10
+        min_resource = max(int(max_resource // self.eta ** (n_rounds - 1)), min(floor, max_resource))
+        return [min(int(min_resource * self.eta ** i), max_resource) for i in range(n_rounds)]
+
+    def _evaluate(self, params, resource, X_train, y_train, X_val, y_val, order, round_index, deadline=None, scored=None):
+        # Once the budget is spent, trials still queued are skipped (after at least one trial has a score)
+        if deadline is not None and time.perf_counter() > deadline and scored:
+            return None
+        start = time.perf_counter()
+        estimator = clone(self.estimator).set_params(**params)
+        if self.resource == 'n_samples':
+            rows = order[:resource]
+            X_fit, y_fit = X_train.iloc[rows], y_train.iloc[rows]
+        else:
+            estimator.set_params(**{self.resource: resource})
+            X_fit, y_fit = X_train, y_train
+
+        estimator, best_iteration = _fit_with_early_stopping(estimator, X_fit, y_fit, X_val, y_val, self.early_stopping_rounds)
+        score = f1_score(y_val, estimator.predict(X_val), zero_division=0)
+        if scored is not None:
+            scored.append(round_index)
+        return {
+            "round": round_index,
+            "params": params,
+            "resource": resource,
+            "best_iteration": best_iteration,
+            "score": score,
+            "seconds": time.perf_counter() - start,
+        }
+
+    def fit(self, X, y):
+        X = X if isinstance(X, pd.DataFrame) else pd.DataFrame(X)
+        y = pd.Series(np.asarray(y), index=X.index)
+        X_train, X_val, y_train, y_val = train_test_split(
+            X, y, test_size=self.validation_fraction, random_state=self.random_state, stratify=y)
+
+        rng = np.random.default_rng(self.random_state)
+        if self.resample:
+            from src.cross_validation import resample
+            X_train, y_train = resample(X_train, y_train, self.resample, self.random_state)
+        order = rng.permutation(len(X_train))
+        schedule = self._resource_schedule(len(X_train))
+        candidates = list(ParameterSampler(self.param_distributions, n_iter=self.n_candidates, random_state=self.random_state))
+
+        self.trace_ = []
+        start = time.perf_counter()
+        deadline = start + self.time_budget if self.time_budget else None
+        scored = []
+        last_round = []
+        for round_index, resource in enumerate(schedule):
+            if deadline is not None and time.perf_counter() > deadline and last_round:
+                logger.info(f"Time budget of {self.time_budget}s reached before round {round_index}.")
+                break
+            results = Parallel(n_jobs=self.n_jobs, prefer='threads')(
+                delayed(self._evaluate)(params, resource, X_train, y_train, X_val, y_val, order, round_index, deadline, scored)
+                for params in candidates
+            )
+            completed = [r for r in results if r is not None]
+            self.trace_.extend(completed)
+            if len(completed) < len(results):
+                logger.info(f"Time budget of {self.time_budget}s reached in round {round_index}; "
+                            f"skipped {len(results) - len(completed)} of {len(results)} trials.")
+            if not completed:
+                break
+            last_round = sorted(completed, key=lambda r: r["score"], reverse=True)
+            n_keep = max(1, len(candidates) // self.eta)
+            candidates = [r["params"] for r in last_round[:n_keep]]
+            if len(last_round) == 1 or len(completed) < len(results):
+                break
+
+        best = last_round[0]
+        self.best_params_ = best["params"]
+        self.best_score_ = best["score"]
+        # best_score_ comes from the winner's last trial, which may have used fewer rows than the refit below
+        self.best_resource_ = best["resource"]
+        logger.info(f"Best validation F1 {self.best_score_:.4f} at {self.resource}={self.best_resource_} "
+                    f"(round {best['round']}); refitting on all {len(X)} rows.")
+
+        # Refit the winner on all rows with its full budget and core share
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+        if 'n_jobs' in self.best_estimator_.get_params():
+            self.best_estimator_.set_params(n_jobs=self.n_jobs)
+        if best["best_iteration"]:
+            self.best_estimator_.set_params(n_estimators=best["best_iteration"])
+        if self.resample:
+            X, y = resample(X, y, self.resample, self.random_state)
+        self.best_estimator_.fit(X, y)
+        self.search_seconds_ = time.perf_counter() - start
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def predict_proba(self, X):
+        return self.best_estimator_.predict_proba(X)
+
+def build_search(family, estimator, time_budget=300, n_candidates=27, n_jobs=1):
+    """
+    Builds the search for a model family: boosters early-stop on the
+    validation fold, forests are halved over training rows.
+    """
+    return SuccessiveHalvingSearch(
+        estimator,
+        SEARCH_SPACES[family],
+        n_candidates=n_candidates,
+        resource='n_samples',
+        time_budget=time_budget,
+        early_stopping_rounds=50 if _is_booster(estimator) else None,
+        n_jobs=n_jobs,
+    )
+
+def write_trace(searches, output_path="models/tuning_trace.csv"):
+    """
+    Writes the per-trial timing trace of fitted searches to CSV and logs
+    where the search time went per model.
+    """
+    rows = []
+    for name, search in searches.items():
+        for trial in search.trace_:
+            rows.append({"model": name, **{k: v for k, v in trial.items() if k != "params"}, "params": str(trial["params"])})
+        total = sum(trial["seconds"] for trial in search.trace_)
+        logger.info(f"{name}: {len(search.trace_)} trials, {total:.2f}s in trials, best F1 {search.best_score_:.4f} "
+                    f"at {search.resource}={search.best_resource_} with {search.best_params_}")
+
+    if rows:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        pd.DataFrame(rows).to_csv(output_path, index=False)
+        logger.info(f"Tuning trace saved to {output_path}")
+    return rows
@@ -1,6 +1,11 @@
 import logging
 import os
 import sys
+import threading
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 def get_logger(name):
     """
@@ -22,3 +27,59 @@ def get_logger(name):
         logger.addHandler(ch)
 
     return logger
+
+def get_peak_rss_mb():
+    """
+    Returns the peak resident set size of the current process in MB,
+    or None where the platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def get_rss_mb():
+    """
+    Returns the current resident set size of the process in MB.
+    Falls back to the peak RSS where the current value is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return get_peak_rss_mb()
+
+class MemoryMonitor:
+    """
+    Context manager that samples RSS in a background thread and reports
+    the peak (and the peak increase over the starting RSS) for the block.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start_mb = None
+        self.peak_mb = None
+        self._stop = None
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, get_rss_mb() or 0.0)
+
+    def __enter__(self):
+        self.start_mb = get_rss_mb() or 0.0
+        self.peak_mb = self.start_mb
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, get_rss_mb() or 0.0)
+
+    @property
+    def delta_mb(self):
+        return self.peak_mb - self.start_mb
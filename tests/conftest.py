@@ -0,0 +1,54 @@
+import os
+import joblib
+import pytest
+from src.clean_data import clean_data
+from src.preprocessing import PREPROCESSOR_FILENAME, Preprocessor
+from src.synthetic_data import generate_reservations
+
+@pytest.fixture(scope="session")
+def sample_data():
+    """
+    Path of the small sample of the real dataset shipped with the tests.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_data.csv")
+
+@pytest.fixture(scope="session")
+def reservations():
+    """
+    Raw synthetic reservations, large enough for every class and category to appear.
+    """
+    return generate_reservations(3000, seed=7)
+
+@pytest.fixture(scope="session")
+def training_frame(reservations):
+    """
+    (fitted Preprocessor, preprocessed frame) for the synthetic reservations.
+    """
+    preprocessor = Preprocessor()
+    return preprocessor, preprocessor.fit_transform(clean_data(reservations.copy()))
+
+@pytest.fixture(scope="session")
+def model_dir(tmp_path_factory, training_frame, reservations):
+    """
+    A directory laid out like models/ after a training run: a small random
+    forest, its preprocessor, and a file of new bookings to score.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    preprocessor, df = training_frame
+    X = df.drop(columns=preprocessor.target)
+    model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X, df[preprocessor.target])
+
+    directory = tmp_path_factory.mktemp("models")
+    joblib.dump(model, directory / "best_model_Random_Forest.joblib")
+    preprocessor.save(str(directory / PREPROCESSOR_FILENAME))
+    generate_reservations(1000, seed=11, start_id=10 ** 6).to_csv(directory / "new.csv", index=False)
+    return directory
+
+@pytest.fixture
+def model_path(model_dir):
+    return str(model_dir / "best_model_Random_Forest.joblib")
+
+@pytest.fixture
+def new_bookings(model_dir):
+    return str(model_dir / "new.csv")
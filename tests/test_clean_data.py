@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from src.clean_data import DigestSet, clean_data, duplicate_mask, fill_missing, row_hashes
+from src.data_loader import load_data
+
+def test_categorical_and_string_columns_hash_alike():
+    values = ["Online", "Offline", None, "Online"]
+    as_strings = pd.DataFrame({"segment": pd.Series(values, dtype=object), "n": [1, 2, 3, 4]})
+    as_category = as_strings.assign(segment=as_strings["segment"].astype("category"))
+    np.testing.assert_array_equal(row_hashes(as_strings), row_hashes(as_category))
+
+def test_numeric_dtypes_hash_alike():
+    # A chunk with a missing value parses the column as float64 instead of int64
+    as_int = pd.DataFrame({"lead_time": [10, 200, 3]})
+    as_float = pd.DataFrame({"lead_time": [10.0, 200.0, np.nan]})
+    as_int16 = as_int.astype({"lead_time": "int16"})
+    np.testing.assert_array_equal(row_hashes(as_int)[:2], row_hashes(as_float)[:2])
+    np.testing.assert_array_equal(row_hashes(as_int), row_hashes(as_int16))
+    seen = DigestSet()
+    duplicate_mask(as_int, seen=seen)
+    assert duplicate_mask(as_float, seen=seen).tolist() == [True, True, False]
+
+def test_duplicates_are_dropped_across_chunks(tmp_path, reservations):
+    chunk = reservations.head(200)
+    seen = DigestSet()
+    assert not duplicate_mask(chunk, seen=seen).any()
+    path = str(tmp_path / "digests.npy")
+    seen.save(path)
+    # The same rows in a later chunk, plus a repeat within the chunk
+    later = pd.concat([chunk.head(50), reservations.iloc[200:210], reservations.iloc[[200]]])
+    mask = duplicate_mask(later, seen=DigestSet.load(path))
+    assert mask.tolist() == [True] * 50 + [False] * 10 + [True]
+
+def test_ignore_columns_catch_reimported_rows(reservations):
+    rows = reservations.head(20)
+    reimported = pd.concat([rows, rows.assign(Booking_ID=rows["Booking_ID"] + "X")])
+    assert not duplicate_mask(reimported).any()
+    assert duplicate_mask(reimported, ignore_columns=["Booking_ID"]).sum() == 20
+
+def test_clean_data_fills_missing_values(sample_data):
+    df = load_data(sample_data)
+    df.loc[df.index[:5], "lead_time"] = np.nan
+    cleaned = clean_data(df)
+    assert not cleaned.isna().any().any()
+
+def test_fill_missing_adds_the_fill_value_to_categoricals():
+    df = pd.DataFrame({"meal": pd.Categorical(["Meal Plan 2", None, "Meal Plan 2"])})
+    filled = fill_missing(df, {"meal": "Meal Plan 1"})
+    assert filled["meal"].tolist() == ["Meal Plan 2", "Meal Plan 1", "Meal Plan 2"]
+    # The caller's frame keeps its nulls and categories
+    assert df["meal"].isna().sum() == 1 and list(df["meal"].cat.categories) == ["Meal Plan 2"]
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.cross_validation import CV_FOLDS, CV_RESULTS, cross_validate, resample, stratified_folds, time_folds
+
+def _period(df):
+    return df["arrival_year"].to_numpy() * 12 + df["arrival_month"].to_numpy()
+
+def test_time_folds_only_look_forward(training_frame):
+    _, df = training_frame
+    folds = time_folds(df, n_splits=4)
+    assert len(folds) == 4
+    period = _period(df)
+    for k, (_, train, test) in enumerate(folds):
+        assert len(test) and period[train].max() < period[test].min()
+        if k:
+            # Expanding window: each fold trains on everything the previous one saw
+            assert set(folds[k - 1][1]) < set(train)
+
+def test_time_folds_need_enough_months(training_frame):
+    _, df = training_frame
+    with pytest.raises(ValueError):
+        time_folds(df.assign(arrival_month=1, arrival_year=2018), n_splits=3)
+
+def test_stratified_folds_cover_every_row_once_per_repeat(training_frame):
+    _, df = training_frame
+    y = df["booking_status"].to_numpy()
+    folds = stratified_folds(y, n_splits=3, n_repeats=2)
+    assert [repeat for repeat, _, _ in folds] == [0, 0, 0, 1, 1, 1]
+    for repeat in (0, 1):
+        tested = np.concatenate([test for r, _, test in folds if r == repeat])
+        assert sorted(tested) == list(range(len(y)))
+
+def test_resample_balances_classes_and_keeps_frames():
+    X = pd.DataFrame({"a": np.arange(40, dtype=float), "b": np.arange(40, dtype=float) % 7})
+    y = pd.Series([1] * 8 + [0] * 32)
+    X_res, y_res = resample(X, y, "smote")
+    assert isinstance(X_res, pd.DataFrame) and list(X_res.columns) == ["a", "b"]
+    assert int(y_res.sum()) == 32 and len(y_res) == 64
+
+def test_resample_skips_a_lone_minority_row():
+    X, y = np.zeros((10, 2), dtype=np.float32), np.array([1] + [0] * 9)
+    X_res, y_res = resample(X, y, "smote")
+    assert len(y_res) == 10
+
+def test_cross_validate_writes_fold_and_summary_reports(tmp_path, training_frame):
+    from sklearn.linear_model import LogisticRegression
+    _, df = training_frame
+    summary = cross_validate(df, {"Logistic Regression": LogisticRegression(max_iter=500)}, n_splits=3,
+                             n_jobs=1, report_dir=str(tmp_path))
+    assert summary["Model"].tolist() == ["Logistic Regression"]
+    assert 0.5 < summary["ROC AUC"].iloc[0] <= 1.0
+    folds = pd.read_csv(os.path.join(tmp_path, CV_FOLDS))
+    assert len(folds) == 3 and (folds["test_rows"].sum() == len(df))
+    assert os.path.exists(os.path.join(tmp_path, CV_RESULTS))
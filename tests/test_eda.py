@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import eda
+
+matplotlib = pytest.importorskip("matplotlib")
+matplotlib.use("Agg")
+
+@pytest.fixture
+def bookings():
+    rng = np.random.default_rng(0)
+    n = 300
+    return pd.DataFrame({
+        "Booking_ID": [f"INN{i:05d}" for i in range(n)],
+        "lead_time": rng.integers(0, 400, n),
+        "avg_price_per_room": rng.normal(100, 20, n),
+        "market_segment_type": rng.choice(["Online", "Offline", "Corporate"], n),
+    })
+
+def test_eda_samples_skips_identifiers_and_writes_report(tmp_path, monkeypatch, bookings):
+    rendered = {}
+    render = eda._render_plot
+
+    def record(task):
+        kind, col, data, _ = task
+        rendered[kind, col] = len(data)
+        return render(task)
+
+    monkeypatch.setattr(eda, "_render_plot", record)
+    eda.perform_eda(bookings, output_dir=str(tmp_path), sample_size=100, max_cardinality=10, n_jobs=1)
+
+    # Plots are drawn from the 100-row sample; identifier-like columns get no count plot
+    assert rendered["hist", "lead_time"] == rendered["hist", "avg_price_per_room"] == 100
+    assert rendered["count", "market_segment_type"] == 100
+    assert ("count", "Booking_ID") not in rendered
+    assert {path.name for path in tmp_path.glob("*.png")} == {
+        "dist_lead_time.png", "dist_avg_price_per_room.png", "correlation_matrix.png", "count_market_segment_type.png"}
+
+    report = (tmp_path / "eda_report.html").read_text(encoding="utf-8")
+    assert "Rows: 300" in report and "random sample of 100 rows" in report
+    assert "Skipped high-cardinality columns: Booking_ID" in report
+    assert report.count("data:image/png;base64,") == 4
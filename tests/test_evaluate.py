@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from sklearn.metrics import f1_score, precision_score, recall_score, roc_auc_score
+import pandas as pd
+from src.evaluate import best_threshold, evaluate_model, evaluate_models, threshold_sweep
+
+@pytest.fixture
+def scores():
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, 2, 500)
+    # Rounded so that many probabilities tie
+    prob = np.round(np.clip(0.3 * y + rng.random(500) * 0.7, 0, 1), 2)
+    return y, prob
+
+class _FixedModel:
+    def __init__(self, prob):
+        self.prob = prob
+
+    def predict_proba(self, X):
+        return np.column_stack([1 - self.prob, self.prob])
+
+def test_sweep_auc_matches_sklearn(scores):
+    y, prob = scores
+    _, auc, _ = threshold_sweep(y, prob)
+    assert auc == pytest.approx(roc_auc_score(y, prob))
+
+def test_sweep_metrics_match_sklearn_at_every_cutoff(scores):
+    y, prob = scores
+    sweep, _, _ = threshold_sweep(y, prob)
+    for row in sweep.iloc[::7].itertuples():
+        labels = prob >= row.cutoff
+        assert row.precision == pytest.approx(precision_score(y, labels, zero_division=0))
+        assert row.recall == pytest.approx(recall_score(y, labels))
+        assert row.f1 == pytest.approx(f1_score(y, labels))
+
+def test_best_threshold_reproduces_best_cutoff(scores):
+    y, prob = scores
+    sweep, _, _ = threshold_sweep(y, prob)
+    assert f1_score(y, prob > best_threshold(sweep)) == pytest.approx(sweep["f1"].max())
+
+def test_evaluate_model_metrics(scores):
+    y, prob = scores
+    result, counts, _ = evaluate_model("fixed", _FixedModel(prob), np.zeros((len(y), 1)), y)
+    assert result["F1 Score"] == pytest.approx(f1_score(y, prob > 0.5))
+    assert result["F1 Score @ Best"] == pytest.approx(f1_score(y, prob > result["Best Threshold"]))
+    assert counts["tp"] + counts["fn"] == y.sum()
+
+def test_single_class_auc_is_nan():
+    _, auc, _ = threshold_sweep(np.ones(10), np.linspace(0, 1, 10))
+    assert np.isnan(auc)
+
+def test_fixed_threshold_is_used_for_best_metrics(scores):
+    y, prob = scores
+    result, _, _ = evaluate_model("fixed", _FixedModel(prob), np.zeros((len(y), 1)), y, threshold=0.8)
+    assert result["Best Threshold"] == 0.8
+    assert result["F1 Score @ Best"] == pytest.approx(f1_score(y, prob > 0.8))
+
+def test_threshold_is_chosen_on_validation_rows(tmp_path, scores):
+    y, prob = scores
+    X = pd.DataFrame({"row": np.arange(len(y))})
+    class _Lookup:
+        def predict_proba(self, X):
+            p = prob[X["row"].to_numpy()]
+            return np.column_stack([1 - p, p])
+    val, test = X.iloc[:250], X.iloc[250:]
+    _, _, threshold = evaluate_models({"lookup": _Lookup()}, test, y[250:], val, y[:250], plots=False,
+                                      output_dir=str(tmp_path))
+    validation_sweep, _, _ = threshold_sweep(y[:250], prob[:250])
+    assert threshold == best_threshold(validation_sweep)
+    result = pd.read_csv(tmp_path / "evaluation_results.csv").iloc[0]
+    assert result["F1 Score @ Best"] == pytest.approx(f1_score(y[250:], prob[250:] > threshold))
+    assert result["Validation F1 @ Best"] == pytest.approx(validation_sweep["f1"].max())
@@ -0,0 +1,50 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from src.explain import ContributionExplainer, explain_predictions, top_reasons
+
+@pytest.fixture
+def features(training_frame):
+    _, frame = training_frame
+    return frame.drop(columns="booking_status"), frame["booking_status"]
+
+def _additive(model, X):
+    contributions, bias = ContributionExplainer(model).contributions(X)
+    assert contributions.shape == X.shape
+    return bias + contributions.sum(axis=1)
+
+def test_random_forest_contributions_add_up_to_the_probability(model_path, features):
+    X, _ = features
+    model = joblib.load(model_path)
+    np.testing.assert_allclose(_additive(model, X), model.predict_proba(X)[:, 1], atol=1e-9)
+
+def test_xgboost_contributions_add_up_to_the_log_odds(features):
+    from xgboost import XGBClassifier
+    X, y = features
+    model = XGBClassifier(n_estimators=20, max_depth=4, n_jobs=1).fit(X, y)
+    np.testing.assert_allclose(_additive(model, X), model.predict(X, output_margin=True), atol=1e-4)
+
+def test_logistic_contributions_add_up_to_the_log_odds(features):
+    from sklearn.linear_model import LogisticRegression
+    X, y = features
+    model = LogisticRegression(max_iter=500).fit(X, y)
+    np.testing.assert_allclose(_additive(model, X), model.decision_function(X), atol=1e-9)
+
+def test_reasons_only_name_features_supporting_the_prediction():
+    contributions = np.array([[0.3, -0.1, 0.2],
+                              [-0.2, -0.4, -0.1],
+                              [-0.2, -0.4, -0.1]])
+    reasons = top_reasons(contributions, ["a", "b", "c"], np.array([1, 1, 0]), top_k=2)
+    assert list(reasons.loc[[0, 2], "Reason_1"]) == ["a", "b"]
+    assert list(reasons.loc[[0, 2], "Reason_2"]) == ["c", "a"]
+    # Nothing pushes row 1 towards its predicted cancellation
+    assert reasons.loc[1].isna().all()
+    np.testing.assert_allclose(reasons.loc[2, ["Reason_1_Contribution", "Reason_2_Contribution"]], [-0.4, -0.2])
+
+def test_parallel_explanations_keep_row_order(tmp_path, model_path, new_bookings):
+    explain_predictions(new_bookings, model_path, str(tmp_path / "serial.csv"), n_workers=1, chunk_rows=150)
+    explain_predictions(new_bookings, model_path, str(tmp_path / "parallel.csv"), n_workers=2, chunk_rows=150)
+    serial, parallel = pd.read_csv(tmp_path / "serial.csv"), pd.read_csv(tmp_path / "parallel.csv")
+    assert list(parallel["Booking_ID"]) == list(pd.read_csv(new_bookings)["Booking_ID"])
+    pd.testing.assert_frame_equal(parallel, serial)
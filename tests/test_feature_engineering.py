@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.feature_engineering import SCHEMA_ALIASES, engineer_features, resolve_schema
+
+@pytest.fixture
+def bookings():
+    return pd.DataFrame({
+        'no_of_weekend_nights': [2, 0, 1, 1],
+        'no_of_week_nights': [3, 1, 0, 1],
+        'no_of_adults': [2, 1, 0, 2],
+        'no_of_children': [1, 0, 0, 0],
+        'lead_time': [5, 45, 10, 20],
+        'avg_price_per_room': [100.0, 80.0, 50.0, 60.0],
+        # 2018-02-29 does not exist; 2016-02-29 does
+        'arrival_year': [2018, 2018, 2016, 2018],
+        'arrival_month': [10, 2, 2, 1],
+        'arrival_date': [15, 29, 29, 5],
+    })
+
+def test_feature_values(bookings):
+    df = engineer_features(bookings)
+    assert list(df['total_stay_nights']) == [5, 1, 1, 2]
+    assert list(df['total_guests']) == [3, 1, 0, 2]
+    assert list(df['booking_lead_time_category']) == [0, 2, 1, 1]
+    assert list(df['weekend_booking_flag']) == [1, 0, 1, 1]
+    # Guests are floored at one, so a zero-guest booking is priced per room
+    np.testing.assert_allclose(df['price_per_guest'], [100 / 3, 80, 50, 30], rtol=1e-6)
+    np.testing.assert_allclose(df['total_stay_price'], [500, 80, 50, 120])
+    # Monday, invalid, Monday, Friday
+    assert list(df['arrival_day_of_week']) == [0, -1, 0, 4]
+    # Booked 2018-10-10, invalid, 2016-02-19, 2017-12-16
+    assert list(df['booking_month']) == [10, 0, 2, 12]
+    assert df['booking_month'].dtype == 'int8'
+
+def test_invalid_arrival_dates_are_flagged(bookings):
+    bookings['arrival_month'] = [13, 4, 0, 2]
+    bookings['arrival_date'] = [1, 31, 10, 28]
+    df = engineer_features(bookings)
+    # Month 13, April 31 and month 0 are impossible; 2018-02-28 was a Wednesday
+    assert list(df['arrival_day_of_week']) == [-1, -1, -1, 2]
+    assert list(df['booking_month']) == [0, 0, 0, 2]
+
+def test_alternate_schema_resolves_through_aliases(bookings):
+    renamed = bookings.rename(columns={
+        'no_of_weekend_nights': 'stays_in_weekend_nights', 'no_of_week_nights': 'stays_in_week_nights',
+        'no_of_adults': 'adults', 'no_of_children': 'children', 'avg_price_per_room': 'adr',
+        'arrival_year': 'arrival_date_year', 'arrival_date': 'arrival_date_day_of_month',
+    }).assign(babies=[0, 1, 0, 0])
+    mapping, features = resolve_schema(tuple(renamed.columns))
+    assert mapping == {
+        'weekend_nights': 'stays_in_weekend_nights', 'week_nights': 'stays_in_week_nights', 'adults': 'adults',
+        'children': 'children', 'babies': 'babies', 'lead_time': 'lead_time', 'price': 'adr',
+        'arrival_year': 'arrival_date_year', 'arrival_month': 'arrival_month', 'arrival_day': 'arrival_date_day_of_month',
+    }
+    assert set(mapping) == set(SCHEMA_ALIASES)
+    assert len(features) == 8
+
+    expected = engineer_features(bookings)
+    df = engineer_features(renamed)
+    # Babies count as guests when the schema has them
+    assert list(df['total_guests']) == [3, 2, 0, 2]
+    for column in ('total_stay_nights', 'arrival_day_of_week', 'booking_month', 'total_stay_price'):
+        np.testing.assert_array_equal(df[column], expected[column])
+
+def test_features_with_missing_inputs_are_skipped(bookings):
+    df = engineer_features(bookings.drop(columns='avg_price_per_room'))
+    assert 'price_per_guest' not in df.columns and 'total_stay_price' not in df.columns
+    assert 'total_guests' in df.columns
@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from src.inference import (DEFAULT_THRESHOLD, THRESHOLD_FILENAME, load_threshold, make_predictions, parallel_predictions,
+                           save_threshold, stream_predictions)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _read(path):
+    return pd.read_csv(path) if str(path).endswith(".csv") else pd.read_parquet(path)
+
+def test_streaming_matches_in_memory(tmp_path, model_path, new_bookings):
+    make_predictions(new_bookings, model_path, output_path=str(tmp_path / "full.csv"))
+    summary = stream_predictions(new_bookings, model_path, str(tmp_path / "streamed.csv"), chunksize=300)
+    assert summary["rows"] == 1000
+    pd.testing.assert_frame_equal(_read(tmp_path / "streamed.csv"), _read(tmp_path / "full.csv"))
+
+def test_parallel_matches_in_memory(tmp_path, model_path, new_bookings):
+    make_predictions(new_bookings, model_path, output_path=str(tmp_path / "full.csv"))
+    parallel_predictions(new_bookings, model_path, str(tmp_path / "parallel.csv"), n_workers=2)
+    pd.testing.assert_frame_equal(_read(tmp_path / "parallel.csv"), _read(tmp_path / "full.csv"))
+
+def test_parquet_output_matches_csv(tmp_path, model_path, new_bookings):
+    make_predictions(new_bookings, model_path, output_path=str(tmp_path / "full.csv"))
+    stream_predictions(new_bookings, model_path, str(tmp_path / "streamed.parquet"), chunksize=400)
+    pd.testing.assert_frame_equal(_read(tmp_path / "streamed.parquet"), _read(tmp_path / "full.csv"), check_dtype=False)
+
+def test_threshold_sets_labels(tmp_path, model_path, new_bookings):
+    make_predictions(new_bookings, model_path, output_path=str(tmp_path / "out.csv"), threshold=0.3)
+    results = _read(tmp_path / "out.csv")
+    np.testing.assert_array_equal(results["Predicted_Status"], (results["Cancellation_Probability"] > 0.3).astype(int))
+    assert set(results["Predicted_Label"]) <= {"Canceled", "Not_Canceled"}
+
+def test_batch_with_null_categoricals_is_scored(tmp_path, model_path, reservations):
+    # The training mode of each column is absent from this batch's own categories
+    batch = reservations.head(40).drop(columns="booking_status")
+    batch["type_of_meal_plan"] = ["Meal Plan 2"] * 30 + [None] * 10
+    batch["market_segment_type"] = [None] * 5 + ["Aviation"] * 35
+    data_path = str(tmp_path / "nulls.csv")
+    batch.to_csv(data_path, index=False)
+
+    make_predictions(data_path, model_path, output_path=str(tmp_path / "out.csv"))
+    results = _read(tmp_path / "out.csv")
+    assert len(results) == 40
+    assert results["Cancellation_Probability"].notna().all()
+
+def test_failed_inference_raises_and_writes_nothing(tmp_path, model_path, reservations):
+    data_path = str(tmp_path / "bad.csv")
+    reservations.head(10).drop(columns=["lead_time"]).to_csv(data_path, index=False)
+    with pytest.raises(ValueError, match="lead_time"):
+        make_predictions(data_path, model_path, output_path=str(tmp_path / "out.csv"))
+    assert not (tmp_path / "out.csv").exists()
+
+def test_cli_exits_non_zero_on_failure(tmp_path, model_path, reservations):
+    data_path = str(tmp_path / "bad.csv")
+    reservations.head(10).drop(columns=["lead_time"]).to_csv(data_path, index=False)
+    for module in ("src.inference", "src.score"):
+        completed = subprocess.run([sys.executable, "-m", module, "--data", data_path, "--model", model_path,
+                                    "--output", str(tmp_path / "out.csv")], cwd=ROOT, capture_output=True)
+        assert completed.returncode != 0, module
+
+def test_thresholds_are_kept_per_model(tmp_path):
+    xgb, rf = str(tmp_path / "best_model_XGBoost.joblib"), str(tmp_path / "best_model_Random_Forest.joblib")
+    save_threshold(xgb, 0.3)
+    save_threshold(rf, 0.6)
+    assert load_threshold(xgb) == 0.3 and load_threshold(rf) == 0.6
+    assert load_threshold(str(tmp_path / "best_model_XGBoost_compiled")) == 0.3
+    assert load_threshold(str(tmp_path / "best_model_LightGBM.joblib")) == DEFAULT_THRESHOLD
+
+def test_legacy_threshold_for_another_model_is_ignored(tmp_path):
+    with open(tmp_path / THRESHOLD_FILENAME, "w") as f:
+        f.write('{"model": "best_model_XGBoost.joblib", "threshold": 0.3}')
+    assert load_threshold(str(tmp_path / "best_model_XGBoost.joblib")) == 0.3
+    assert load_threshold(str(tmp_path / "best_model_Random_Forest.joblib")) == DEFAULT_THRESHOLD
+
+def test_parallel_uses_compiled_model_only_when_asked(tmp_path, model_path, new_bookings):
+    import shutil
+    import joblib
+    from src.tree_compiler import compile_model, compiled_path_for
+    for path in (model_path, os.path.join(os.path.dirname(model_path), "preprocessor.joblib")):
+        shutil.copy(path, tmp_path)
+    local_model = str(tmp_path / os.path.basename(model_path))
+    compile_model(joblib.load(local_model)).save(compiled_path_for(local_model))
+    plain = parallel_predictions(new_bookings, local_model, str(tmp_path / "plain.csv"), n_workers=1)
+    compiled = parallel_predictions(new_bookings, local_model, str(tmp_path / "compiled.csv"), n_workers=1, compiled=True)
+    assert plain["model"] == local_model
+    assert compiled["model"] == compiled_path_for(local_model)
+    pd.testing.assert_frame_equal(_read(tmp_path / "compiled.csv"), _read(tmp_path / "plain.csv"), atol=1e-6)
+
+def test_parallel_workers_memory_map_the_model(tmp_path, model_dir, training_frame, new_bookings):
+    import shutil
+    import joblib
+    from joblib import Parallel, delayed
+    from sklearn.linear_model import LogisticRegression
+    from src.inference import _worker_artifacts
+    _, frame = training_frame
+    X, y = frame.drop(columns="booking_status"), frame["booking_status"]
+    model_path = str(tmp_path / "best_model_Logistic_Regression.joblib")
+    joblib.dump(LogisticRegression(max_iter=500).fit(X, y), model_path)
+    shutil.copy(model_dir / "preprocessor.joblib", tmp_path)
+
+    def mapped(path):
+        model, _ = _worker_artifacts(path, str(tmp_path / "preprocessor.joblib"))
+        return isinstance(model.coef_, np.memmap), isinstance(model.intercept_, np.memmap)
+
+    assert Parallel(n_jobs=2, backend='loky')(delayed(mapped)(model_path) for _ in range(2)) == [(True, True)] * 2
+    summary = parallel_predictions(new_bookings, model_path, str(tmp_path / "out.csv"), n_workers=2)
+    assert summary["rows"] == 1000
@@ -0,0 +1,62 @@
+import json
+import re
+import pytest
+from src import instrumentation
+from src.instrumentation import configure_tracing, flush_tracing, stage
+
+# One sample line of the Prometheus text exposition format
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\{stage="([^"\\]*)"\} (\S+)$')
+
+@pytest.fixture(autouse=True)
+def tracing_off():
+    configure_tracing(None)
+    yield
+    configure_tracing(None)
+
+def test_disabled_stage_is_a_no_op(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with stage("clean", rows_in=[1, 2, 3]) as s:
+        assert s.output([1, 2]) == [1, 2]
+        s.rows_out = 5
+    flush_tracing()
+    assert isinstance(s, instrumentation._NullStage)
+    assert s.rows_out is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_enabled_stage_writes_one_event(tmp_path):
+    configure_tracing(str(tmp_path))
+    with stage("clean", rows_in=list(range(10))) as s:
+        s.output(list(range(7)))
+    lines = (tmp_path / instrumentation.EVENTS_FILENAME).read_text().splitlines()
+    assert len(lines) == 1
+    event = json.loads(lines[0])
+    assert (event["stage"], event["status"], event["rows_in"], event["rows_out"]) == ("clean", "ok", 10, 7)
+    assert event["wall_seconds"] >= 0 and event["cpu_seconds"] >= 0
+    assert event["rss_start_mb"] > 0 and event["peak_rss_delta_mb"] >= 0
+
+def test_metrics_file_is_prometheus_text(tmp_path):
+    configure_tracing(str(tmp_path))
+    for name in ("load", "clean", "clean"):
+        with stage(name, rows_in=[0] * 4) as s:
+            s.output([0] * 3)
+    with pytest.raises(ValueError):
+        with stage("train"):
+            raise ValueError("boom")
+    flush_tracing()
+
+    types, samples = {}, {}
+    for line in (tmp_path / instrumentation.METRICS_FILENAME).read_text().splitlines():
+        if line.startswith("# TYPE "):
+            _, _, metric, kind = line.split(" ")
+            assert kind in ("counter", "gauge")
+            types[metric] = kind
+        elif not line.startswith("# HELP "):
+            match = SAMPLE.match(line)
+            assert match, line
+            metric, name, value = match.groups()
+            assert metric in types, f"{metric} has no TYPE line before its samples"
+            samples[metric, name] = float(value)
+    assert samples["pipeline_stage_runs_total", "clean"] == 2
+    assert samples["pipeline_stage_rows_out_total", "clean"] == 6
+    assert samples["pipeline_stage_errors_total", "train"] == 1
+    assert samples["pipeline_stage_errors_total", "load"] == 0
@@ -0,0 +1,14 @@
+import pytest
+from main import fit_outlier_bounds, parse_args
+from src.pipeline_cache import IncrementalPipeline
+
+def test_exact_bounds_unless_sketches_are_requested(tmp_path, sample_data):
+    pipeline = IncrementalPipeline(str(tmp_path / "cache"))
+    pipeline.run(sample_data)
+    # None lets the preprocessor take exact quartiles, as with --no-cache
+    assert fit_outlier_bounds(parse_args(["--data", sample_data]), pipeline) is None
+    assert fit_outlier_bounds(parse_args(["--data", sample_data, "--sketch-bounds"]), pipeline) == pipeline.outlier_bounds()
+
+def test_sketch_bounds_need_the_cache():
+    with pytest.raises(SystemExit):
+        parse_args(["--sketch-bounds", "--no-cache"])
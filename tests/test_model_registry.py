@@ -0,0 +1,47 @@
+import pytest
+from src.model_registry import ModelCache, ModelRegistry, data_fingerprint
+
+@pytest.fixture
+def registry(tmp_path, training_frame):
+    from sklearn.linear_model import LogisticRegression
+    preprocessor, df = training_frame
+    X, y = df.drop(columns=preprocessor.target), df[preprocessor.target]
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    for C in (1.0, 0.1):
+        registry.register(LogisticRegression(C=C, max_iter=500).fit(X, y), preprocessor, threshold=0.4 + C / 10,
+                          fingerprint=data_fingerprint(df), metrics={"F1 Score @ Best": C})
+    return registry
+
+def test_versions_and_tags(registry):
+    assert registry.versions("cancellation") == [1, 2]
+    assert registry.resolve("cancellation") == 2
+    registry.set_tag("cancellation", "production", 1)
+    assert registry.resolve("cancellation", tag="production") == 1
+    assert registry.metadata(tag="production")["metrics"] == {"F1 Score @ Best": 1.0}
+    with pytest.raises(KeyError):
+        registry.set_tag("cancellation", "production", 7)
+
+def test_metadata_schema_check(registry, reservations):
+    registry.check_schema(list(reservations.columns))
+    with pytest.raises(ValueError, match="lead_time"):
+        registry.check_schema([col for col in reservations.columns if col != "lead_time"])
+    assert registry.validate()["model_class"] == "LogisticRegression"
+
+def test_model_cache_serves_registered_threshold(registry):
+    cache = ModelCache(registry)
+    _, _, threshold = cache.get(version=1)
+    assert threshold == pytest.approx(0.5)
+    cache.get(version=1)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_model_cache_evicts_least_recently_used(registry):
+    cache = ModelCache(registry, max_mb=0)
+    cache.get(version=1)
+    cache.get(version=2)
+    assert ("cancellation", 1) not in cache and ("cancellation", 2) in cache
+    assert cache.evictions == 1
+
+def test_fingerprint_ignores_row_order(training_frame):
+    _, df = training_frame
+    assert data_fingerprint(df) == data_fingerprint(df.iloc[::-1])
+    assert data_fingerprint(df) != data_fingerprint(df.iloc[1:])
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from src.monitoring import PSI_DRIFT, DataProfile, drift_report
+
+COLUMNS = ["lead_time", "avg_price_per_room", "market_segment_type", "type_of_meal_plan"]
+
+@pytest.fixture
+def reference(reservations):
+    return DataProfile.from_frame(reservations, COLUMNS)
+
+def _report(reference, df):
+    return drift_report(reference, reference.empty_like().update(df)).set_index("feature")
+
+def test_same_distribution_is_stable(reference, reservations):
+    report = _report(reference, reservations)
+    assert (report["psi"] < 1e-9).all()
+    assert (report.loc[["lead_time", "avg_price_per_room"], "ks"] < 1e-9).all()
+    assert set(report["status"]) == {"ok"}
+
+def test_shifted_feature_is_flagged(reference, reservations):
+    shifted = reservations.assign(lead_time=reservations["lead_time"] + 200)
+    report = _report(reference, shifted)
+    assert report.loc["lead_time", "psi"] > PSI_DRIFT
+    assert report.loc["lead_time", "ks"] > 0.5
+    assert report.loc["lead_time", "status"] == "drift"
+    assert report.loc["avg_price_per_room", "status"] == "ok"
+
+def test_unseen_categories_and_nulls_are_counted(reference, reservations):
+    batch = reservations.head(100).copy()
+    batch["market_segment_type"] = "Space Travel"
+    batch.loc[batch.index[:10], "lead_time"] = np.nan
+    report = _report(reference, batch)
+    assert report.loc["market_segment_type", "unseen_rate"] == 1.0
+    assert report.loc["lead_time", "null_rate"] == pytest.approx(0.1)
+
+def test_merged_profiles_equal_one_pass(reference, reservations):
+    whole = reference.empty_like().update(reservations)
+    merged = reference.empty_like().update(reservations.iloc[:1000]).merge(
+        reference.empty_like().update(reservations.iloc[1000:]))
+    assert merged.rows == whole.rows
+    for col in whole.columns:
+        np.testing.assert_array_equal(merged.counts[col], whole.counts[col])
+
+def test_profile_save_load_round_trip(tmp_path, reference):
+    path = str(tmp_path / "profile.json")
+    reference.save(path)
+    loaded = DataProfile.load(path)
+    assert loaded.rows == reference.rows
+    for col in reference.columns:
+        np.testing.assert_array_equal(loaded.counts[col], reference.counts[col])
@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.model_registry import ModelRegistry
+from src.online_update import UPDATE_LOG_FILENAME, refresh_model, split_by_arrival, update_model
+from src.synthetic_data import generate_reservations
+
+@pytest.fixture
+def features(training_frame):
+    preprocessor, df = training_frame
+    return df.drop(columns=preprocessor.target), df[preprocessor.target]
+
+@pytest.fixture
+def registry_dir(tmp_path, training_frame, features):
+    from xgboost import XGBClassifier
+    preprocessor, _ = training_frame
+    X, y = features
+    model = XGBClassifier(n_estimators=50, max_depth=4, random_state=0).fit(X, y)
+    registry_dir = str(tmp_path / "registry")
+    ModelRegistry(registry_dir).register(model, preprocessor, threshold=0.35, tags=("production",))
+    return registry_dir
+
+@pytest.fixture
+def delta(tmp_path):
+    path = str(tmp_path / "delta.csv")
+    generate_reservations(1500, seed=21, start_id=10 ** 7).to_csv(path, index=False)
+    return path
+
+def test_split_by_arrival_holds_out_the_latest_rows(reservations):
+    update, holdout = split_by_arrival(reservations, 0.25)
+    assert len(holdout) == 750 and len(update) + len(holdout) == len(reservations)
+    period = lambda df: df["arrival_year"] * 10000 + df["arrival_month"] * 100 + df["arrival_date"]
+    assert period(update).max() <= period(holdout).min()
+
+def test_update_model_leaves_the_original_untouched(features):
+    from xgboost import XGBClassifier
+    X, y = features
+    model = XGBClassifier(n_estimators=20, random_state=0).fit(X, y)
+    before = model.predict_proba(X)
+    updated, method = update_model(model, X.iloc[:500], y.iloc[:500], rounds=5)
+    assert "boosting" in method
+    assert updated.get_booster().num_boosted_rounds() == 25
+    np.testing.assert_array_equal(model.predict_proba(X), before)
+
+def test_logistic_regression_updates_through_sgd(features):
+    from sklearn.linear_model import LogisticRegression
+    X, y = features
+    model = LogisticRegression(max_iter=500).fit(X, y)
+    updated, method = update_model(model, X.iloc[:500], y.iloc[:500])
+    assert type(updated).__name__ == "SGDClassifier" and method == "SGD partial_fit"
+    assert updated.predict_proba(X).shape == (len(X), 2)
+
+def test_forests_need_a_full_retrain(features):
+    from sklearn.ensemble import RandomForestClassifier
+    X, y = features
+    with pytest.raises(TypeError):
+        update_model(RandomForestClassifier(n_estimators=2).fit(X, y), X, y)
+
+def test_refresh_logs_every_decision(registry_dir, delta):
+    record = refresh_model(delta, registry_dir, tolerance=1.0)
+    assert record["promoted"] and record["new_version"] == 2
+    registry = ModelRegistry(registry_dir)
+    assert registry.resolve(tag="production") == 2
+    assert registry.metadata(version=2)["updated_from"] == 1
+    log = pd.read_csv(os.path.join(registry_dir, "cancellation", UPDATE_LOG_FILENAME))
+    assert len(log) == 1 and log["update_rows"].iloc[0] == record["update_rows"]
+
+def test_dry_run_writes_nothing(registry_dir, delta):
+    before = sorted(os.listdir(os.path.join(registry_dir, "cancellation")))
+    record = refresh_model(delta, registry_dir, dry_run=True)
+    assert not record["promoted"] and record["new_version"] is None
+    assert sorted(os.listdir(os.path.join(registry_dir, "cancellation"))) == before
+
+def test_promotion_is_judged_at_the_served_threshold(registry_dir, delta):
+    record = refresh_model(delta, registry_dir, tolerance=1.0)
+    metadata = ModelRegistry(registry_dir).metadata(version=record["new_version"])
+    assert metadata["threshold"] == 0.35
+    assert metadata["metrics"]["Best Threshold"] == 0.35
+    log = pd.read_csv(os.path.join(registry_dir, "cancellation", UPDATE_LOG_FILENAME))
+    assert log["candidate F1 Score @ Best"].iloc[0] == pytest.approx(metadata["metrics"]["F1 Score @ Best"])
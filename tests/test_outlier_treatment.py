@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.outlier_treatment import cap_outliers, compute_outlier_bounds, compute_outlier_bounds_in_chunks
+
+def test_only_columns_with_outliers_are_rewritten():
+    df = pd.DataFrame({"lead_time": [1.0, 500.0, np.nan], "avg_price_per_room": [80.0, 90.0, 100.0]})
+    price = df["avg_price_per_room"].to_numpy()
+    capped = cap_outliers(df, {"lead_time": (0.0, 300.0), "avg_price_per_room": (10.0, 200.0), "adr": (0.0, 1.0)})
+    assert capped["lead_time"].tolist()[:2] == [1.0, 300.0] and np.isnan(capped["lead_time"].iloc[2])
+    assert np.shares_memory(capped["avg_price_per_room"].to_numpy(), price)
+
+def test_sketches_extended_by_chunk_track_exact_bounds(reservations):
+    chunks = [reservations.iloc[start:start + 750] for start in range(0, len(reservations), 750)]
+    _, sketches = compute_outlier_bounds_in_chunks(chunks[:2])
+    bounds, _ = compute_outlier_bounds_in_chunks(chunks[2:], sketches=sketches)
+    for col, exact in compute_outlier_bounds(reservations).items():
+        assert bounds[col] == pytest.approx(exact, rel=0.05)
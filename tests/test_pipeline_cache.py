@@ -0,0 +1,45 @@
+import pytest
+import src.clean_data
+import src.pipeline_cache as pipeline_cache
+from src.outlier_treatment import compute_outlier_bounds
+from src.pipeline_cache import IncrementalPipeline
+
+def test_rerun_reuses_and_appends(tmp_path, reservations):
+    path = str(tmp_path / "bookings.csv")
+    reservations.iloc[:2000].to_csv(path, index=False)
+    pipeline = IncrementalPipeline(str(tmp_path / "cache"))
+    first = pipeline.run(path)
+    reservations.iloc[2000:].to_csv(path, mode="a", header=False, index=False)
+    pipeline = IncrementalPipeline(str(tmp_path / "cache"))
+    extended = pipeline.run(path)
+    assert len(extended) > len(first)
+    assert extended["Booking_ID"].iloc[:len(first)].tolist() == first["Booking_ID"].tolist()
+    # Bounds from the sketches extended with the delta track the exact bounds of all rows
+    for col, (lower, upper) in compute_outlier_bounds(extended).items():
+        assert pipeline.outlier_bounds()[col] == pytest.approx((lower, upper), rel=0.05)
+
+def test_editing_a_helper_invalidates_the_stage(monkeypatch):
+    before = IncrementalPipeline().code_keys
+    # fill_missing is only called by clean_data, not hashed directly
+    source = pipeline_cache.inspect.getsource
+    monkeypatch.setattr(pipeline_cache.inspect, "getsource",
+                        lambda obj: source(obj) + ("# edited" if obj is src.clean_data else ""))
+    after = IncrementalPipeline().code_keys
+    assert after["load"] == before["load"] and after["clean"] != before["clean"]
+
+def test_parquet_source_is_cached(tmp_path, reservations):
+    path = str(tmp_path / "bookings.parquet")
+    reservations.to_parquet(path, index=False)
+    first = IncrementalPipeline(str(tmp_path / "cache")).run(path)
+    again = IncrementalPipeline(str(tmp_path / "cache")).run(path)
+    assert len(first) == len(again) == len(reservations)
+
+def test_same_size_edit_early_in_the_file_rebuilds(tmp_path, reservations):
+    path = str(tmp_path / "bookings.csv")
+    rows = reservations.head(2000).assign(no_of_adults=3)
+    rows.to_csv(path, index=False)
+    IncrementalPipeline(str(tmp_path / "cache")).run(path)
+    # Far more than 64 KB before the end of the file, and the same number of bytes
+    rows.assign(no_of_adults=[3] * 9 + [2] + [3] * 1990).to_csv(path, index=False)
+    cleaned = IncrementalPipeline(str(tmp_path / "cache")).run(path)
+    assert cleaned.loc[cleaned["Booking_ID"] == rows["Booking_ID"].iloc[9], "no_of_adults"].item() == 2
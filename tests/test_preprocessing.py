@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from src.clean_data import clean_data
+from src.encoding import CategoricalCodec
+from src.preprocessing import Preprocessor
+
+def test_transform_reproduces_fit_transform(training_frame, reservations):
+    preprocessor, expected = training_frame
+    pd.testing.assert_frame_equal(preprocessor.transform(clean_data(reservations.copy())), expected)
+
+def test_saved_preprocessor_round_trip(tmp_path, training_frame, reservations):
+    preprocessor, expected = training_frame
+    path = str(tmp_path / "preprocessor.joblib")
+    preprocessor.save(path)
+    loaded = Preprocessor.load(path)
+    pd.testing.assert_frame_equal(loaded.transform(clean_data(reservations.copy())), expected)
+
+def test_transform_without_target_returns_features_in_training_order(training_frame, reservations):
+    preprocessor, _ = training_frame
+    X = preprocessor.transform(reservations.drop(columns=preprocessor.target).head(50))
+    assert list(X.columns) == preprocessor.feature_names_
+
+def test_transform_rejects_missing_columns(training_frame, reservations):
+    preprocessor, _ = training_frame
+    try:
+        preprocessor.transform(reservations.drop(columns=["lead_time"]))
+    except ValueError as e:
+        assert "lead_time" in str(e)
+    else:
+        raise AssertionError("missing input column was not reported")
+
+def test_codec_maps_unseen_and_missing_values_to_unknown_code():
+    train = pd.DataFrame({"meal": ["Meal Plan 1", "Meal Plan 2", "Not Selected"]})
+    codec = CategoricalCodec().fit(train, ["meal"])
+    scored = codec.transform(pd.DataFrame({"meal": ["Meal Plan 2", "Meal Plan 9", None]}))
+    assert scored["meal"].tolist() == [1, -1, -1]
+
+def test_codec_codes_match_for_categorical_and_string_input():
+    values = ["b", "a", "c", "a"]
+    codec = CategoricalCodec().fit(pd.DataFrame({"x": values}), ["x"])
+    as_strings = codec.transform(pd.DataFrame({"x": values}))
+    as_category = codec.transform(pd.DataFrame({"x": pd.Categorical(values, categories=["c", "b", "a"])}))
+    np.testing.assert_array_equal(as_strings["x"], as_category["x"])
+
+def test_codec_dict_round_trip():
+    df = pd.DataFrame({"x": ["a", "b", "b", "c"], "y": [0, 1, 1, 0]})
+    for mode in ("ordinal", "onehot", "target"):
+        codec = CategoricalCodec(mode=mode).fit(df, ["x"], y=df["y"])
+        restored = CategoricalCodec.from_dict(codec.to_dict())
+        pd.testing.assert_frame_equal(restored.transform(df), codec.transform(df))
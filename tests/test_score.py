@@ -0,0 +1,30 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import joblib
+from src.tree_compiler import compile_model, compiled_path_for
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _heavy_modules_after(code):
+    """
+    Runs `code` in a fresh interpreter and returns heavy_modules_loaded() from there.
+    """
+    script = f"{code}\nfrom src.score import heavy_modules_loaded\nprint(json.dumps(heavy_modules_loaded()))"
+    completed = subprocess.run([sys.executable, "-c", "import json\n" + script], cwd=ROOT, capture_output=True,
+                               text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def test_importing_score_loads_no_heavy_modules():
+    assert _heavy_modules_after("import src.score") == []
+
+def test_scoring_a_compiled_model_loads_no_heavy_modules(tmp_path, model_path, model_dir, new_bookings):
+    shutil.copy(model_dir / "preprocessor.joblib", tmp_path)
+    local_model = str(tmp_path / os.path.basename(model_path))
+    compile_model(joblib.load(model_path)).save(compiled_path_for(local_model))
+    output = str(tmp_path / "out.csv")
+    code = f"from src.score import main\nassert main({['--data', new_bookings, '--model', local_model, '--output', output]!r}) == 0"
+    assert _heavy_modules_after(code) == []
+    assert os.path.exists(output)
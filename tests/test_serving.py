@@ -0,0 +1,88 @@
+import asyncio
+import json
+import joblib
+import pytest
+from src.inference import score_frame
+from src.monitoring import DataProfile
+from src.preprocessing import Preprocessor
+from src.serving import MicroBatcher, ScoringServer, ServingMetrics
+
+@pytest.fixture
+def artifacts(model_path, model_dir):
+    return joblib.load(model_path), Preprocessor.load(str(model_dir / "preprocessor.joblib"))
+
+@pytest.fixture
+def profile(reservations, training_frame):
+    preprocessor, _ = training_frame
+    return DataProfile.from_frame(reservations, preprocessor.input_columns_).empty_like()
+
+def _records(reservations, start, n):
+    return reservations.drop(columns="booking_status").iloc[start:start + n].to_dict(orient="records")
+
+def test_failed_batch_is_not_profiled(artifacts, profile, reservations):
+    model, preprocessor = artifacts
+    batch = reservations.head(20).drop(columns=["lead_time"])
+    with pytest.raises(ValueError):
+        score_frame(batch, model, preprocessor, profile=profile)
+    assert profile.rows == 0
+
+def test_retried_batch_profiles_each_scored_row_once(artifacts, profile, reservations):
+    model, preprocessor = artifacts
+    good = [_records(reservations, 0, 3), _records(reservations, 3, 2)]
+    bad = [{**record, "lead_time": "soon"} for record in _records(reservations, 5, 4)]
+
+    async def run():
+        batcher = MicroBatcher(model, preprocessor, ServingMetrics(), max_batch_size=8, max_wait_ms=50, profile=profile)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(records) for records in good + [bad]), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(run())
+    assert [len(result) for result in results[:2]] == [3, 2]
+    assert isinstance(results[2], Exception)
+    # The mixed batch failed as a whole and was rescored request by request
+    assert profile.rows == 5
+
+async def _request(port, raw):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    length = int(head.split("Content-Length: ")[1].split("\r\n")[0])
+    body = json.loads(await reader.readexactly(length))
+    writer.close()
+    return head.split(" ", 2)[1], body
+
+def _post(path, body):
+    return (f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body
+
+def test_server_answers_valid_and_malformed_requests(artifacts, reservations):
+    model, preprocessor = artifacts
+    records = json.dumps(_records(reservations, 0, 3)).encode()
+    requests = {
+        "valid": _post("/predict", records),
+        "health": b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n",
+        "bad json": _post("/predict", b"{not json"),
+        "bad request line": b"GARBAGE\r\n\r\n",
+        "text length": b"POST /predict HTTP/1.1\r\nContent-Length: ten\r\n\r\n",
+        "negative length": b"POST /predict HTTP/1.1\r\nContent-Length: -5\r\n\r\n",
+    }
+
+    async def run():
+        # Built outside the loop, as main() does before asyncio.run
+        server = ScoringServer(model, preprocessor, port=0, max_wait_ms=1)
+        await server.start()
+        try:
+            return {name: await _request(server.port, raw) for name, raw in requests.items()}
+        finally:
+            await server.stop()
+
+    responses = asyncio.run(run())
+    status, body = responses["valid"]
+    assert status == "200"
+    assert len(body["predictions"]) == 3
+    assert responses["health"] == ("200", {"status": "ok"})
+    for name in ("bad json", "bad request line", "text length", "negative length"):
+        assert responses[name][0] == "400", name
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from src.sharding import SHARD_REPORT, train_sharded
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame({"segment": rng.integers(0, 3, n).astype(float), "x": rng.normal(size=n)})
+    # Segment 2 reverses the relation, so only its own model can rank it
+    df["booking_status"] = ((df["x"] * np.where(df["segment"] == 2, -1, 1) + rng.normal(scale=0.5, size=n)) > 0).astype(int)
+    return df
+
+def _split(df):
+    test, val = df.iloc[:600], df.iloc[600:1200]
+    return val.drop(columns="booking_status"), val["booking_status"], test
+
+def test_shards_are_selected_on_validation_rows(tmp_path, frame):
+    X_val, y_val, test = _split(frame)
+    base = LogisticRegression().fit(frame.iloc[1200:][["segment", "x"]], frame.iloc[1200:]["booking_status"])
+    sharded = train_sharded(frame, X_val, y_val, base, "segment", min_rows=100, n_jobs=1,
+                            report_dir=str(tmp_path), exclude=test.index)
+    report = pd.read_csv(tmp_path / SHARD_REPORT)
+    assert report["train_rows"].sum() == 1800
+    assert report["validation_rows"].sum() == len(X_val)
+    assert 2.0 in sharded.models
+
+def test_undefined_global_auc_keeps_the_global_model(tmp_path, frame):
+    X_val, y_val, test = _split(frame)
+    # Every validation row of segment 2 is negative, so neither AUC is defined there
+    y_val = y_val.where(X_val["segment"] != 2, 0)
+    base = LogisticRegression().fit(frame.iloc[1200:][["segment", "x"]], frame.iloc[1200:]["booking_status"])
+    sharded = train_sharded(frame, X_val, y_val, base, "segment", min_rows=100, n_jobs=1,
+                            report_dir=str(tmp_path), exclude=test.index)
+    report = pd.read_csv(tmp_path / SHARD_REPORT).set_index("shard")
+    assert 2.0 not in sharded.models
+    assert report.loc[2.0, "model"] == "global (no validation AUC)"
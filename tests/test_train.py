@@ -0,0 +1,50 @@
+import os
+import pytest
+import src.train as train
+
+def _small_models(tuning_budget=300):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    return {
+        "Logistic Regression": LogisticRegression(max_iter=500, random_state=42),
+        "Random Forest": RandomForestClassifier(n_estimators=10, random_state=42),
+    }
+
+@pytest.fixture
+def small_models(monkeypatch):
+    monkeypatch.setattr(train, "build_models", _small_models)
+
+def test_bare_cache_dir_writes_reports_to_report_dir(tmp_path, monkeypatch, small_models, training_frame):
+    _, df = training_frame
+    monkeypatch.chdir(tmp_path)
+    trained, X_val, y_val, X_test, y_test = train.train_models(df, n_jobs=1, cache_dir="cache", imbalance="weights")
+    assert list(trained) == ["Logistic Regression", "Random Forest"]
+    assert len(X_test) == len(y_test) == round(len(df) * 0.2)
+    assert len(X_val) == len(y_val) == round((len(df) - len(X_test)) * 0.2)
+    assert not X_val.index.intersection(X_test.index).size
+    assert os.path.exists(os.path.join("models", "training_memory.csv"))
+    assert len(os.listdir("cache")) == 2
+
+def test_single_threaded_estimators_keep_their_n_jobs():
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    assert train._set_threads(LogisticRegression(), 4).n_jobs is None
+    assert train._set_threads(RandomForestClassifier(), 4).n_jobs == 4
+
+def test_cache_keeps_one_artifact_per_model(tmp_path, monkeypatch, small_models, training_frame):
+    _, df = training_frame
+    cache_dir = str(tmp_path / "cache")
+    kwargs = dict(n_jobs=1, cache_dir=cache_dir, imbalance="weights", report_dir=str(tmp_path))
+    train.train_models(df, **kwargs)
+    first = sorted(os.listdir(cache_dir))
+    # New data: every model is refitted and replaces its stale artifact
+    train.train_models(df.iloc[:-50], **kwargs)
+    second = sorted(os.listdir(cache_dir))
+    assert len(second) == 2 and not set(first) & set(second)
+    assert [f.rsplit("_", 1)[0] for f in second] == ["Logistic_Regression", "Random_Forest"]
+
+def test_pruning_leaves_models_with_a_longer_name(tmp_path):
+    for filename in ("Random_Forest_aaa.joblib", "Random_Forest_bbb.joblib", "Random_Forest_Tuned_ccc.joblib"):
+        (tmp_path / filename).write_bytes(b"")
+    train._prune_cache(str(tmp_path / "Random_Forest_bbb.joblib"))
+    assert sorted(os.listdir(tmp_path)) == ["Random_Forest_Tuned_ccc.joblib", "Random_Forest_bbb.joblib"]
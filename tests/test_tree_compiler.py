@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from src.tree_compiler import CompiledForest, check_agreement, compile_model, compiled_path_for, is_compiled_model
+
+@pytest.fixture(scope="module")
+def features(training_frame):
+    preprocessor, df = training_frame
+    return df.drop(columns=preprocessor.target), df[preprocessor.target]
+
+def test_compiled_forest_agrees_with_random_forest(features):
+    from sklearn.ensemble import RandomForestClassifier
+    X, y = features
+    model = RandomForestClassifier(n_estimators=15, random_state=0).fit(X, y)
+    compiled = compile_model(model)
+    max_diff, label_match = check_agreement(model, compiled, X, tolerance=1e-6)
+    assert max_diff <= 1e-6
+    assert label_match == 1.0
+
+def test_compiled_forest_agrees_with_xgboost(features):
+    from xgboost import XGBClassifier
+    X, y = features
+    model = XGBClassifier(n_estimators=30, max_depth=4, random_state=0).fit(X, y)
+    compiled = compile_model(model)
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), atol=1e-5)
+
+def test_saved_compiled_model_is_memory_mapped(tmp_path, features):
+    from sklearn.ensemble import RandomForestClassifier
+    X, y = features
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    path = compiled_path_for(str(tmp_path / "model.joblib"))
+    compile_model(model).save(path)
+    assert is_compiled_model(path)
+    loaded = CompiledForest.load(path)
+    np.testing.assert_allclose(loaded.predict_proba(X), model.predict_proba(X), atol=1e-6)
+
+def test_unsupported_models_are_rejected(features):
+    from sklearn.linear_model import LogisticRegression
+    X, y = features
+    with pytest.raises(TypeError):
+        compile_model(LogisticRegression(max_iter=200).fit(X, y))
@@ -0,0 +1,50 @@
+import time
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, ClassifierMixin
+from src.tuning import SuccessiveHalvingSearch
+
+class _SlowClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Predicts 1 where the first feature plus `offset` is positive; fit just sleeps `delay` seconds.
+    """
+
+    def __init__(self, delay=0.0, offset=0.0):
+        self.delay = delay
+        self.offset = offset
+
+    def fit(self, X, y):
+        time.sleep(self.delay)
+        self.classes_ = np.array([0, 1])
+        return self
+
+    def predict(self, X):
+        return (np.asarray(X)[:, 0] + self.offset > 0).astype(int)
+
+    def predict_proba(self, X):
+        positive = self.predict(X).astype(float)
+        return np.column_stack([1 - positive, positive])
+
+def _data(n=600):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"a": rng.normal(size=n), "b": rng.normal(size=n)})
+    return X, (X["a"] > 0).astype(int)
+
+def test_search_trace_and_best_resource():
+    X, y = _data()
+    search = SuccessiveHalvingSearch(_SlowClassifier(), {"offset": [-2.0, -1.0, -0.5, 0.0, 0.5, 1.0, 2.0, 3.0, -3.0]},
+                                     n_candidates=9, eta=3).fit(X, y)
+    assert [trial["round"] for trial in search.trace_].count(0) == 9 and len(search.trace_) == 13
+    assert search.best_params_ == {"offset": 0.0}
+    assert search.best_resource_ == max(trial["resource"] for trial in search.trace_)
+
+def test_time_budget_is_checked_before_every_trial():
+    X, y = _data()
+    search = SuccessiveHalvingSearch(_SlowClassifier(delay=0.05), {"offset": list(np.linspace(-1, 1, 27))},
+                                     n_candidates=27, eta=3, time_budget=0.12)
+    start = time.perf_counter()
+    search.fit(X, y)
+    # A round-level check would run all 27 first-round trials (1.35s of sleeping)
+    assert time.perf_counter() - start < 0.8
+    assert 1 <= len(search.trace_) < 27
+    assert search.best_resource_ == search.trace_[0]["resource"]